@@ -10,6 +10,7 @@ from app.core.config import settings
 from app.models.base import Base
 from app.models.user import User
 from app.models.task import Task
+from app.models.rate_limit import RateLimitBucket  # noqa: F401 - Import to register model
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
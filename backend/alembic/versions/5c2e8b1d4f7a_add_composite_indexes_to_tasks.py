@@ -0,0 +1,40 @@
+"""Add composite indexes to tasks
+
+Revision ID: 5c2e8b1d4f7a
+Revises: 0dd21eeff47b
+Create Date: 2026-10-17 10:12:31.418205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e8b1d4f7a'
+down_revision: Union[str, Sequence[str], None] = '0dd21eeff47b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_tasks_owner_id_status': ['owner_id', 'status'],
+    'ix_tasks_assigned_to_id_status': ['assigned_to_id', 'status'],
+    'ix_tasks_owner_id_updated_at_id': ['owner_id', 'updated_at', 'id'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build without locking writes on Postgres (CONCURRENTLY needs autocommit)
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(
+                name, 'tasks', columns, unique=False, postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='tasks', postgresql_concurrently=True)
@@ -0,0 +1,103 @@
+"""Add rank to tasks
+
+Revision ID: 9f4a6c3e2b1d
+Revises: 5c2e8b1d4f7a
+Create Date: 2026-10-17 14:41:07.226913
+
+"""
+from itertools import groupby
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f4a6c3e2b1d'
+down_revision: Union[str, Sequence[str], None] = '5c2e8b1d4f7a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rank keys as app.core.ranking generated them when this revision was
+# written, copied so later changes there cannot change this migration
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+
+
+def evenly_spaced_ranks(count: int) -> list[str]:
+    """Get ``count`` short, evenly spaced, ascending rank keys."""
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    step = BASE ** width // (count + 1)
+    return [_to_digits((index + 1) * step, width).rstrip('0') for index in range(count)]
+
+
+def _to_digits(value: int, width: int) -> str:
+    digits = []
+    for _ in range(width):
+        value, remainder = divmod(value, BASE)
+        digits.append(DIGITS[remainder])
+    return ''.join(reversed(digits))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    rank_type = sa.String().with_variant(sa.String(collation='C'), 'postgresql')
+    op.add_column('tasks', sa.Column('rank', rank_type, nullable=True))
+
+    # Existing cards keep their creation order within each column
+    tasks = sa.table(
+        'tasks',
+        sa.column('id', sa.Integer),
+        sa.column('owner_id', sa.Integer),
+        sa.column('status', sa.String),
+        sa.column('rank', sa.String),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(tasks.c.id, tasks.c.owner_id, tasks.c.status)
+        .order_by(tasks.c.owner_id, tasks.c.status, tasks.c.id)
+    ).all()
+    for _, column in groupby(rows, key=lambda row: (row.owner_id, row.status)):
+        ids = [row.id for row in column]
+        connection.execute(
+            tasks.update().where(tasks.c.id == sa.bindparam('task_id')),
+            [
+                {'task_id': task_id, 'rank': rank}
+                for task_id, rank in zip(ids, evenly_spaced_ranks(len(ids)), strict=True)
+            ],
+        )
+
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.alter_column('rank', existing_type=rank_type, nullable=False)
+
+    # Swap the index without locking writes on Postgres, as 5c2e8b1d4f7a built it
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_owner_id_status_rank',
+            'tasks',
+            ['owner_id', 'status', 'rank', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_tasks_owner_id_status', table_name='tasks', postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_owner_id_status',
+            'tasks',
+            ['owner_id', 'status'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_tasks_owner_id_status_rank', table_name='tasks', postgresql_concurrently=True
+        )
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('rank')
@@ -0,0 +1,31 @@
+"""Add version to tasks
+
+Revision ID: b71d3e9a4c25
+Revises: 9f4a6c3e2b1d
+Create Date: 2026-10-17 16:02:51.480316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71d3e9a4c25'
+down_revision: Union[str, Sequence[str], None] = '9f4a6c3e2b1d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'tasks', sa.Column('version', sa.Integer(), server_default='1', nullable=False)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('version')
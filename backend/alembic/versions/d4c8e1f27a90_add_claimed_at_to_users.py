@@ -0,0 +1,49 @@
+"""Add claimed_at and the guest pool and expiry index to users
+
+Revision ID: d4c8e1f27a90
+Revises: b71d3e9a4c25
+Create Date: 2026-10-17 18:41:09.230517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4c8e1f27a90'
+down_revision: Union[str, Sequence[str], None] = 'b71d3e9a4c25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+    # An existing guest cannot be told apart from one a visitor already used,
+    # so none may join the pool and be handed out again with its old tasks.
+    # Counting them as claimed at creation lets the guest reaper expire them.
+    users = sa.table(
+        'users',
+        sa.column('is_guest', sa.Boolean),
+        sa.column('created_at', sa.DateTime),
+        sa.column('claimed_at', sa.DateTime),
+    )
+    op.execute(
+        users.update()
+        .where(users.c.is_guest.is_(True))
+        .values(claimed_at=sa.func.coalesce(users.c.created_at, sa.func.current_timestamp()))
+    )
+
+    op.create_index(
+        'ix_users_is_guest_claimed_at', 'users', ['is_guest', 'claimed_at'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_is_guest_claimed_at', table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('claimed_at')
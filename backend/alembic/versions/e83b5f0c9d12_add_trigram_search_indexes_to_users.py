@@ -0,0 +1,43 @@
+"""Add trigram search indexes to users
+
+Revision ID: e83b5f0c9d12
+Revises: d4c8e1f27a90
+Create Date: 2026-10-17 19:27:44.618203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e83b5f0c9d12'
+down_revision: Union[str, Sequence[str], None] = 'd4c8e1f27a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Only Postgres has trigram indexes; elsewhere searches use the
+    # in-memory user directory
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in ('email', 'full_name'):
+        op.create_index(
+            f'ix_users_{column}_trgm',
+            'users',
+            [sa.text(f'lower({column}) gin_trgm_ops')],
+            unique=False,
+            postgresql_using='gin',
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_users_full_name_trgm', table_name='users')
+    op.drop_index('ix_users_email_trgm', table_name='users')
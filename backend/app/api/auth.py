@@ -1,23 +1,38 @@
 """Authentication endpoints."""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session
 
 from app.api.schemas import Token, UserCreate, UserLogin, UserResponse
+from app.core.config import settings
+from app.core.db_metrics import MetricsRoute
 from app.core.dependencies import get_current_user
-from app.core.name_generator import generate_random_name
-from app.core.security import get_password_hash
-from app.models.base import get_db
+from app.core.hashing import PasswordHasher, get_password_hasher
+from app.core.pagination import decode_key_cursor, encode_key_cursor
+from app.core.rate_limit import AuthRateLimiter, get_auth_rate_limiter
+from app.models.base import get_async_db, get_async_session_factory, get_read_db
 from app.models.user import User
-from app.services import auth_service, user_service
+from app.services import auth_service, guest_service, user_service
 
-router = APIRouter(prefix="/auth", tags=["authentication"])
+router = APIRouter(prefix="/auth", tags=["authentication"], route_class=MetricsRoute)
+
+# Typeahead page sizes
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_create: UserCreate, db: Session = Depends(get_db)) -> UserResponse:
+async def register(
+    user_create: UserCreate,
+    db: AsyncSession = Depends(get_async_db),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+    limiter: AuthRateLimiter = Depends(get_auth_rate_limiter),
+) -> UserResponse:
     """Register a new user."""
+    await limiter.check_account(user_create.email)
+
     # Check if user already exists
-    existing_user = user_service.get_user_by_email(db, email=user_create.email)
+    existing_user = await user_service.get_user_by_email_async(db, email=user_create.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -25,14 +40,22 @@ def register(user_create: UserCreate, db: Session = Depends(get_db)) -> UserResp
         )
 
     # Create new user
-    user = user_service.create_user(db, user_create)
+    user = await user_service.create_user_async(db, user_create, hasher)
     return UserResponse.model_validate(user)
 
 
 @router.post("/login", response_model=Token)
-def login(user_login: UserLogin, db: Session = Depends(get_db)) -> Token:
+async def login(
+    user_login: UserLogin,
+    db: AsyncSession = Depends(get_async_db),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+    limiter: AuthRateLimiter = Depends(get_auth_rate_limiter),
+) -> Token:
     """Login user and return JWT token."""
-    user = auth_service.authenticate_user(db, user_login.email, user_login.password)
+    await limiter.check_account(user_login.email)
+    user = await auth_service.authenticate_user_async(
+        db, hasher, user_login.email, user_login.password
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -45,26 +68,24 @@ def login(user_login: UserLogin, db: Session = Depends(get_db)) -> Token:
 
 
 @router.post("/guest", response_model=Token)
-def login_as_guest(db: Session = Depends(get_db)) -> Token:
-    """Create a temporary guest user and return JWT token."""
-    # Generate random name
-    random_name = generate_random_name()
-
-    # Create unique email for guest (using timestamp for uniqueness)
-    import time
-    guest_email = f"guest_{int(time.time() * 1000)}@guest.local"
-
-    # Create guest user
-    guest_user = User(
-        email=guest_email,
-        hashed_password=get_password_hash("guest"),  # Dummy password
-        full_name=random_name,
-        is_guest=True,
-        is_active=True,
-    )
-    db.add(guest_user)
-    db.commit()
-    db.refresh(guest_user)
+async def login_as_guest(
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_async_session_factory),
+) -> Token:
+    """
+    Create a temporary guest user and return JWT token.
+
+    Guests have no usable password, so no hashing is done. With
+    GUEST_POOL_SIZE set, a pre-created guest is claimed when one is
+    available and the pool is topped up after the response.
+    """
+    guest_user = None
+    if settings.GUEST_POOL_SIZE > 0:
+        guest_user = await guest_service.claim_guest_async(db)
+        background_tasks.add_task(guest_service.refill_guest_pool, session_factory)
+    if guest_user is None:
+        guest_user = await guest_service.create_guest_async(db)
 
     # Create and return token
     access_token = auth_service.create_user_token(guest_user.email)
@@ -80,8 +101,40 @@ def get_me(current_user: User = Depends(get_current_user)) -> UserResponse:
 @router.get("/users", response_model=list[UserResponse])
 def get_users(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> list[UserResponse]:
     """Get all users for task assignment."""
     users = db.query(User).filter(User.is_active == True).all()
     return [UserResponse.model_validate(user) for user in users]
+
+
+@router.get("/users/search", response_model=list[UserResponse])
+def search_users(
+    response: Response,
+    q: str = Query("", max_length=100),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+    cursor: str | None = None,
+    exclude_guests: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+) -> list[UserResponse]:
+    """
+    Search active users by name or email, for the assignee typeahead.
+
+    Results are in email order. When more follow, the ``X-Next-Cursor``
+    header holds the ``cursor`` to pass for the next page.
+    """
+    try:
+        after = decode_key_cursor(cursor) if cursor is not None else None
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        ) from exc
+
+    # Fetch one extra user to learn whether another page follows
+    users = user_service.search_users(db, q, limit + 1, after, exclude_guests)
+    if len(users) > limit:
+        users = users[:limit]
+        response.headers["X-Next-Cursor"] = encode_key_cursor(users[-1].email)
+    return [UserResponse.model_validate(user) for user in users]
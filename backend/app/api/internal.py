@@ -0,0 +1,50 @@
+"""Internal diagnostics endpoints."""
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from app.core import db_metrics
+from app.core.dependencies import get_current_superuser
+from app.core.hashing import PasswordHasher, get_password_hasher
+from app.core.user_cache import user_cache
+from app.core.websocket_manager import ConnectionManager
+from app.models.user import User
+
+router = APIRouter(prefix="/internal", tags=["internal"], route_class=db_metrics.MetricsRoute)
+manager = ConnectionManager()
+
+
+@router.get("/db-metrics")
+def get_db_metrics(
+    current_user: User = Depends(get_current_superuser),
+) -> dict[str, Any]:
+    """Get per-route query counts and DB time, connection pool and user cache state."""
+    return {
+        "routes": db_metrics.get_route_stats(),
+        "pools": db_metrics.get_pool_stats(),
+        "user_cache": user_cache.get_stats(),
+    }
+
+
+@router.get("/hash-metrics")
+def get_hash_metrics(
+    current_user: User = Depends(get_current_superuser),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+) -> dict[str, Any]:
+    """Get password hashing queue depth, rejections and latencies."""
+    return hasher.get_stats()
+
+
+@router.get("/ws-metrics")
+async def get_ws_metrics(
+    current_user: User = Depends(get_current_superuser),
+) -> dict[str, Any]:
+    """Get outbound queue lag, drops and coalesced updates for this worker's sockets."""
+    # Async so the connections are read on the event loop that changes them
+    connections = manager.get_connection_stats()
+    return {
+        "connections": connections,
+        "dropped": sum(connection["dropped"] for connection in connections),
+        "coalesced": sum(connection["coalesced"] for connection in connections),
+        "max_lag": max((connection["max_lag"] for connection in connections), default=0),
+    }
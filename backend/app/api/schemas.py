@@ -1,6 +1,6 @@
 """Pydantic schemas for request/response validation."""
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, model_validator
 
 
 class UserCreate(BaseModel):
@@ -66,6 +66,17 @@ class TaskUpdate(BaseModel):
     assigned_to_id: int | None = None
     due_date: datetime | None = None
 
+    @model_validator(mode="after")
+    def check_required_fields(self) -> "TaskUpdate":
+        """Reject clearing fields every task must have."""
+        cleared = [
+            field for field in ("title", "status", "priority")
+            if field in self.model_fields_set and getattr(self, field) is None
+        ]
+        if cleared:
+            raise ValueError(f"{', '.join(cleared)} cannot be null")
+        return self
+
 
 class TaskResponse(BaseModel):
     """Schema for task response."""
@@ -77,8 +88,57 @@ class TaskResponse(BaseModel):
     description: str | None
     status: str
     priority: str
+    rank: str
+    version: int
     owner_id: int
     assigned_to_id: int | None
     created_at: datetime
     updated_at: datetime
     due_date: datetime | None
+
+
+class TaskMove(BaseModel):
+    """Schema for moving a task within or between board columns."""
+
+    status: str | None = None
+    after_id: int | None = None
+
+
+# Most mutations accepted in one batch
+MAX_BATCH_SIZE = 500
+
+
+class TaskBatchUpdate(TaskUpdate):
+    """Schema for one update in a task batch."""
+
+    id: int
+
+
+class TaskBatch(BaseModel):
+    """Schema for creates, updates and deletes applied in one transaction."""
+
+    create: list[TaskCreate] = Field(default_factory=list)
+    update: list[TaskBatchUpdate] = Field(default_factory=list)
+    delete: list[int] = Field(default_factory=list)
+
+    @model_validator(mode="after")
+    def check_batch(self) -> "TaskBatch":
+        """Reject empty or oversized batches and tasks touched twice."""
+        size = len(self.create) + len(self.update) + len(self.delete)
+        if size == 0:
+            raise ValueError("Batch is empty")
+        if size > MAX_BATCH_SIZE:
+            raise ValueError(f"Batch exceeds {MAX_BATCH_SIZE} mutations")
+
+        task_ids = [update.id for update in self.update] + self.delete
+        if len(task_ids) != len(set(task_ids)):
+            raise ValueError("Each task may appear only once per batch")
+        return self
+
+
+class TaskBatchResponse(BaseModel):
+    """Schema for the result of a task batch."""
+
+    created: list[TaskResponse]
+    updated: list[TaskResponse]
+    deleted: list[int]
@@ -1,72 +1,365 @@
 """Task management endpoints."""
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import csv
+import io
+from collections.abc import Iterable, Iterator
+from enum import Enum
 
-from app.api.schemas import TaskCreate, TaskResponse, TaskUpdate
-from app.core.dependencies import get_current_user
-from app.core.websocket_manager import ConnectionManager
-from app.models.base import get_db
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.api.schemas import (
+    TaskBatch,
+    TaskBatchResponse,
+    TaskCreate,
+    TaskMove,
+    TaskResponse,
+    TaskUpdate,
+)
+from app.core.db_metrics import MetricsRoute
+from app.core.dependencies import get_current_user, get_current_user_async
+from app.core.etags import digest_etag, etag_matches, if_match_versions, task_etag
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.websocket_manager import ConnectionManager, EncodedMessage
+from app.models.base import (
+    get_async_db,
+    get_async_session_factory,
+    get_read_db,
+    get_session_factory,
+)
 from app.models.user import User
 from app.services import task_service
 
-router = APIRouter(prefix="/tasks", tags=["tasks"])
+router = APIRouter(prefix="/tasks", tags=["tasks"], route_class=MetricsRoute)
 manager = ConnectionManager()
 
+# Clients must revalidate cached tasks (with If-None-Match) before each use
+CACHE_CONTROL = "private, no-cache"
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Rows fetched from the database and written to the client per chunk
+EXPORT_CHUNK_SIZE = 1000
+
+
+class ExportFormat(str, Enum):
+    """Task export formats."""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
 
 @router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 async def create_task(
     task_create: TaskCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_async_session_factory),
 ) -> TaskResponse:
     """Create a new task."""
-    task = task_service.create_task(db, task_create, current_user)
+    task = await task_service.create_task_async(db, task_create, current_user)
     task_response = TaskResponse.model_validate(task)
 
-    # Broadcast task creation event
-    await manager.broadcast({
-        "type": "task_created",
-        "task": task_response.model_dump(mode='json'),
-    })
+    # Notify users who can see the task
+    await manager.publish_task_event(
+        EncodedMessage({
+            "type": "task_created",
+            "task": task_response.model_dump(mode='json'),
+        }),
+        task.id,
+        visible_to=(task.owner_id, task.assigned_to_id),
+    )
+
+    # Appending to a long column lengthens ranks just like moving does
+    if task_service.needs_rebalance(task):
+        background_tasks.add_task(_rebalance_column, session_factory, task.owner_id, task.status)
 
     return task_response
 
 
+@router.post("/batch", response_model=TaskBatchResponse)
+async def apply_task_batch(
+    batch: TaskBatch,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_async_session_factory),
+) -> TaskBatchResponse:
+    """
+    Create, update and delete many tasks at once.
+
+    The batch is applied atomically: if any task to update or delete is not
+    found, nothing is changed. Subscribers get a single ``tasks_batch`` event.
+    """
+    try:
+        created, updated, deleted = await task_service.apply_task_batch_async(
+            db, batch, current_user
+        )
+    except task_service.TaskNotFoundError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tasks not found: {exc.task_ids}",
+        ) from exc
+
+    result = TaskBatchResponse(
+        created=[TaskResponse.model_validate(task) for task in created],
+        updated=[TaskResponse.model_validate(task) for task in updated],
+        deleted=[row.id for row in deleted],
+    )
+
+    # Notify users who can see any of the tasks, one frame each
+    await manager.publish_task_batch(
+        EncodedMessage({"type": "tasks_batch", **result.model_dump(mode="json")}),
+        [
+            *((task.id, (task.owner_id, task.assigned_to_id), False)
+              for task in (*created, *updated)),
+            *((row.id, (row.owner_id, row.assigned_to_id), True) for row in deleted),
+        ],
+    )
+
+    # One compaction per column, however many of its tasks grew long ranks
+    columns = {
+        (task.owner_id, task.status)
+        for task in (*created, *updated)
+        if task_service.needs_rebalance(task)
+    }
+    for owner_id, task_status in sorted(columns):
+        background_tasks.add_task(_rebalance_column, session_factory, owner_id, task_status)
+
+    return result
+
+
 @router.get("", response_model=list[TaskResponse])
 def get_tasks(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    if_none_match: str | None = Header(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-) -> list[TaskResponse]:
-    """Get all tasks for current user."""
-    tasks = task_service.get_tasks(db, current_user)
+    db: Session = Depends(get_read_db),
+) -> list[TaskResponse] | Response:
+    """
+    Get tasks for current user, most recently updated first.
+
+    Returns one page; when more tasks follow, the ``X-Next-Cursor`` header
+    holds the ``cursor`` to pass for the next page. The ``ETag`` changes
+    whenever any of the user's tasks does; sending it back in
+    ``If-None-Match`` gets a 304 without the tasks being read.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor is not None else None
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        ) from exc
+
+    etag = digest_etag(
+        current_user.id, task_service.get_tasks_fingerprint(db, current_user), limit, cursor
+    )
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+    # Fetch one extra row to learn whether another page follows
+    tasks = task_service.get_tasks_page(db, current_user, limit + 1, after)
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(tasks[-1].updated_at, tasks[-1].id)
     return [TaskResponse.model_validate(task) for task in tasks]
 
 
+@router.get("/export")
+def export_tasks(
+    format: ExportFormat = ExportFormat.NDJSON,
+    current_user: User = Depends(get_current_user),
+    session_factory: sessionmaker = Depends(get_session_factory),
+) -> StreamingResponse:
+    """
+    Export all of the current user's tasks as NDJSON or CSV.
+
+    Rows are streamed as they are read, one chunk at a time, so memory use
+    does not grow with the number of tasks.
+    """
+    return StreamingResponse(
+        _stream_export(session_factory, current_user, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format.value}"'},
+    )
+
+
+def _stream_export(
+    session_factory: sessionmaker, owner: User, format: ExportFormat
+) -> Iterator[str]:
+    """Encode exported rows chunk by chunk (runs in the threadpool)."""
+    # The request's own session is closed before the body is streamed, so
+    # the export holds its own for as long as it runs
+    with session_factory() as db:
+        rows = task_service.iter_tasks_for_export(db, owner, EXPORT_CHUNK_SIZE)
+        encode = _encode_csv if format is ExportFormat.CSV else _encode_ndjson
+        yield from encode(rows)
+
+
+def _encode_ndjson(rows: Iterable[Row]) -> Iterator[str]:
+    lines: list[str] = []
+    for row in rows:
+        lines.append(TaskResponse.model_validate(row).model_dump_json())
+        if len(lines) >= EXPORT_CHUNK_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines.clear()
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _encode_csv(rows: Iterable[Row]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(TaskResponse.model_fields)
+    count = 0
+    for row in rows:
+        writer.writerow(
+            "" if value is None else value
+            for value in TaskResponse.model_validate(row).model_dump(mode="json").values()
+        )
+        count += 1
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
 @router.get("/{task_id}", response_model=TaskResponse)
 def get_task(
     task_id: int,
+    response: Response,
+    if_none_match: str | None = Header(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-) -> TaskResponse:
-    """Get a single task by ID."""
+    db: Session = Depends(get_read_db),
+) -> TaskResponse | Response:
+    """
+    Get a single task by ID.
+
+    The ``ETag`` identifies the task's version: send it in ``If-None-Match``
+    to get a 304 if it is unchanged, or in ``If-Match`` to update or delete
+    the task only if nobody else has changed it meanwhile.
+    """
     task = task_service.get_task(db, task_id, current_user)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found",
         )
+    etag = task_etag(task.id, task.version)
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
     return TaskResponse.model_validate(task)
 
 
+def _not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def _modified_conflict() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Task has been modified",
+    )
+
+
 @router.put("/{task_id}", response_model=TaskResponse)
 async def update_task(
     task_id: int,
     task_update: TaskUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    response: Response,
+    if_match: str | None = Header(None),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> TaskResponse:
+    """
+    Update a task.
+
+    With ``If-Match``, the update only applies if the task is still at that
+    ETag; otherwise it fails with 412 and nothing changes.
+    """
+    try:
+        task = await task_service.update_task_async(
+            db, task_id, task_update, current_user, if_match_versions(if_match, task_id)
+        )
+    except task_service.TaskVersionConflictError as exc:
+        raise _modified_conflict() from exc
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found",
+        )
+    task_response = TaskResponse.model_validate(task)
+    response.headers["ETag"] = task_etag(task.id, task.version)
+
+    # Notify users who can see the task (and anyone who just lost access)
+    await manager.publish_task_event(
+        EncodedMessage({
+            "type": "task_updated",
+            "task": task_response.model_dump(mode='json'),
+        }),
+        task.id,
+        visible_to=(task.owner_id, task.assigned_to_id),
+    )
+
+    return task_response
+
+
+@router.post("/{task_id}/move", response_model=TaskResponse)
+async def move_task(
+    task_id: int,
+    task_move: TaskMove,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_async_session_factory),
 ) -> TaskResponse:
-    """Update a task."""
-    task = task_service.update_task(db, task_id, task_update, current_user)
+    """
+    Move a task to a position in its column or another column.
+
+    The task is placed directly below ``after_id`` (or at the top when it
+    is omitted). Only the moved task is rewritten; when its rank grows too
+    long the column is compacted after the response is sent.
+    """
+    try:
+        task = await task_service.move_task_async(
+            db, task_id, current_user, task_move.status, task_move.after_id
+        )
+    except task_service.TaskNotFoundError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="after_id is not a task in the target column",
+        ) from exc
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -74,31 +367,73 @@ async def update_task(
         )
     task_response = TaskResponse.model_validate(task)
 
-    # Broadcast task update event
-    await manager.broadcast({
-        "type": "task_updated",
-        "task": task_response.model_dump(mode='json'),
-    })
+    await manager.publish_task_event(
+        EncodedMessage({
+            "type": "task_updated",
+            "task": task_response.model_dump(mode='json'),
+        }),
+        task.id,
+        visible_to=(task.owner_id, task.assigned_to_id),
+    )
+
+    if task_service.needs_rebalance(task):
+        background_tasks.add_task(_rebalance_column, session_factory, task.owner_id, task.status)
 
     return task_response
 
 
+async def _rebalance_column(
+    session_factory: async_sessionmaker[AsyncSession], owner_id: int, task_status: str
+) -> None:
+    """Compact a column's ranks and send the new ones to subscribers."""
+    async with session_factory() as db:
+        try:
+            tasks = await task_service.rebalance_column_async(db, owner_id, task_status)
+        except StaleDataError:
+            # A card moved meanwhile; the next long rank triggers another pass
+            return
+    if not tasks:
+        return
+
+    updated = [TaskResponse.model_validate(task) for task in tasks]
+    await manager.publish_task_batch(
+        EncodedMessage({
+            "type": "tasks_batch",
+            "created": [],
+            "updated": [task.model_dump(mode="json") for task in updated],
+            "deleted": [],
+        }),
+        [(task.id, (task.owner_id, task.assigned_to_id), False) for task in tasks],
+    )
+
+
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(
     task_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    if_match: str | None = Header(None),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ) -> None:
-    """Delete a task."""
-    success = task_service.delete_task(db, task_id, current_user)
-    if not success:
+    """Delete a task; with ``If-Match``, only if it is still at that ETag."""
+    try:
+        task = await task_service.delete_task_async(
+            db, task_id, current_user, if_match_versions(if_match, task_id)
+        )
+    except task_service.TaskVersionConflictError as exc:
+        raise _modified_conflict() from exc
+    if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found",
         )
 
-    # Broadcast task deletion event
-    await manager.broadcast({
-        "type": "task_deleted",
-        "task_id": task_id,
-    })
+    # Notify users who could see the task
+    await manager.publish_task_event(
+        EncodedMessage({
+            "type": "task_deleted",
+            "task_id": task_id,
+        }),
+        task_id,
+        visible_to=(task.owner_id, task.assigned_to_id),
+        removed=True,
+    )
@@ -1,21 +1,19 @@
 """WebSocket endpoint for real-time features."""
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, status
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.core.config import settings
-from app.core.websocket_manager import ConnectionManager
-from app.models.base import get_db
+from app.core.websocket_manager import ClientConnection, ConnectionManager
+from app.core.ws_protocol import WireFormat, decode_frame, negotiate_wire_format
+from app.models.base import get_async_session_factory
 from app.services import user_service
 
 router = APIRouter()
 manager = ConnectionManager()
 
 
-async def get_current_user_ws(
-    token: str,
-    db: Session = Depends(get_db),
-) -> int:
+async def get_current_user_ws(token: str, db: AsyncSession) -> int:
     """
     Validate WebSocket JWT token and return user ID.
 
@@ -38,54 +36,100 @@ async def get_current_user_ws(
         email: str | None = payload.get("sub")
         if email is None:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+    except JWTError as exc:
+        raise credentials_exception from exc
 
-    user = user_service.get_user_by_email(db, email=email)
+    user = await user_service.get_user_by_email_async(db, email=email)
     if user is None:
         raise credentials_exception
     return user.id
 
 
+def handle_client_message(connection: ClientConnection, data: str | bytes) -> None:
+    """
+    Handle a message sent by the client.
+
+    Any frame counts as a sign of life for the idle reaper. Supported messages:
+        ``{"type": "pong"}`` answers a server ``ping``.
+        ``{"type": "presence_sync", "version": n}`` requests a full presence
+        snapshot, sent only if ``n`` is not the current presence version.
+
+    Args:
+        connection: Connection the message arrived on
+        data: Raw frame (JSON text, or binary in the negotiated format)
+    """
+    connection.touch()
+    try:
+        message = decode_frame(connection.wire_format, data)
+    except ValueError:
+        return
+    if not isinstance(message, dict):
+        return
+
+    if message.get("type") == "presence_sync":
+        if message.get("version") != manager.presence_version:
+            connection.enqueue(manager.presence_snapshot())
+
+
 @router.websocket("/ws")
 async def websocket_endpoint(
     websocket: WebSocket,
     token: str,
-    db: Session = Depends(get_db),
+    last_seq: int | None = None,
+    stream: str | None = None,
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_async_session_factory),
 ) -> None:
     """
     WebSocket endpoint for real-time communication.
 
+    Clients choose a frame encoding by offering a subprotocol (see
+    ``WireFormat``): JSON text (default), MessagePack, or either one
+    compressed with raw deflate. The server sends ``ping`` messages and
+    closes sockets that stay silent for ``WS_IDLE_TIMEOUT_SECONDS``.
+
     Args:
         websocket: WebSocket connection
         token: JWT token for authentication
-        db: Database session
+        last_seq: Last event seq the client processed, to replay what it missed
+        stream: Stream ID from the client's previous ``session`` message
+        session_factory: Factory for the short-lived authentication session
     """
-    # Authenticate user
+    # Authenticate user; the session is released before the socket is
+    # accepted so open sockets never hold pooled DB connections
     try:
-        user_id = await get_current_user_ws(token, db)
+        async with session_factory() as db:
+            user_id = await get_current_user_ws(token, db)
     except HTTPException:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
-    # Accept connection
-    await websocket.accept()
+    # Accept connection with the client's preferred wire format
+    wire_format = negotiate_wire_format(websocket.scope.get("subprotocols", []))
+    await websocket.accept(subprotocol=wire_format.value if wire_format else None)
 
-    # Register connection
-    manager.connect(user_id, websocket)
+    # Register connection and start its writer task
+    connection = manager.connect(user_id, websocket, wire_format or WireFormat.JSON)
+    connection.start()
 
-    # Send initial presence update
+    # Send a presence snapshot and any missed events to the new socket,
+    # then a presence delta to everyone
+    connection.enqueue(manager.presence_snapshot())
+    if last_seq is not None:
+        manager.resume(connection, last_seq, stream)
+    connection.enqueue(manager.session_info())
     await manager.broadcast_presence_update()
 
     try:
         # Keep connection alive and handle incoming messages
         while True:
             # Wait for any message from client (keeping connection alive)
-            data = await websocket.receive_text()
-            # For now, we just keep the connection open
-            # Future: handle client messages here
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+            data = message.get("text")
+            handle_client_message(connection, data if data is not None else message["bytes"])
     except WebSocketDisconnect:
-        # Unregister connection
-        manager.disconnect(user_id)
+        # Unregister this socket; the user stays online while others remain
+        manager.disconnect(user_id, websocket)
         # Broadcast presence update
         await manager.broadcast_presence_update()
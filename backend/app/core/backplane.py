@@ -0,0 +1,449 @@
+"""Pub/sub backplane that fans WebSocket events out across worker processes."""
+import asyncio
+import base64
+import json
+import logging
+import select
+import socket
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Envelope = dict[str, Any]
+Handler = Callable[[Envelope], None]
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD = 7999
+
+# Room left in a chunk frame for everything but its data
+_CHUNK_OVERHEAD = 128
+
+
+def _encode_envelope(envelope: Envelope) -> str:
+    return json.dumps(envelope, separators=(",", ":"), ensure_ascii=False)
+
+
+def split_payload(payload: str, limit: int) -> list[str]:
+    """
+    Split an encoded envelope into frames of at most ``limit`` bytes.
+
+    Payloads that fit are returned as they are. Larger ones are base64
+    encoded and cut into chunk frames, which :class:`Backplane` reassembles
+    before delivery.
+
+    Args:
+        payload: Encoded envelope
+        limit: Largest frame, in bytes
+
+    Returns:
+        Frames to send, in order
+    """
+    if len(payload.encode("utf-8")) <= limit:
+        return [payload]
+    data = base64.b64encode(payload.encode("utf-8")).decode("ascii")
+    size = limit - _CHUNK_OVERHEAD
+    pieces = [data[start:start + size] for start in range(0, len(data), size)]
+    chunk_id = uuid.uuid4().hex
+    return [
+        _encode_envelope({"chunk": chunk_id, "index": index, "count": len(pieces), "data": piece})
+        for index, piece in enumerate(pieces)
+    ]
+
+
+class Backplane(ABC):
+    """
+    Base class for pub/sub transports.
+
+    Every published envelope is delivered to every subscriber on every worker,
+    including the publisher's own; subscribers filter by origin.
+    """
+
+    # Chunked envelopes being reassembled; the oldest incomplete ones are dropped
+    max_pending_chunks: int = 64
+
+    def __init__(self) -> None:
+        """Initialize backplane."""
+        self._handlers: list[Handler] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._chunks: OrderedDict[str, list[str | None]] = OrderedDict()
+
+    def subscribe(self, handler: Handler) -> None:
+        """
+        Register a handler called with every received envelope.
+
+        Args:
+            handler: Callback run on the event loop
+        """
+        self._handlers.append(handler)
+
+    def unsubscribe(self, handler: Handler) -> None:
+        """
+        Remove a previously registered handler.
+
+        Args:
+            handler: Callback to remove
+        """
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+
+    async def start(self) -> None:
+        """Start receiving envelopes; handlers run on the current event loop."""
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self) -> None:
+        """Stop receiving envelopes."""
+        self._loop = None
+
+    @abstractmethod
+    async def publish(self, envelope: Envelope) -> None:
+        """
+        Publish an envelope to all workers.
+
+        Args:
+            envelope: JSON-serializable envelope
+        """
+
+    def _deliver(self, envelope: Envelope) -> None:
+        for handler in list(self._handlers):
+            try:
+                handler(envelope)
+            except Exception:
+                logger.exception("Backplane handler failed")
+
+    def _receive(self, raw: str) -> None:
+        """Hand a frame read on a transport thread to the event loop."""
+        try:
+            envelope = json.loads(raw)
+        except ValueError:
+            logger.warning("Dropping malformed backplane frame")
+            return
+        if isinstance(envelope, dict) and "chunk" in envelope:
+            envelope = self._reassemble(envelope)
+            if envelope is None:
+                return
+
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._deliver, envelope)
+        except RuntimeError:
+            # Event loop closed during shutdown
+            pass
+
+    def _reassemble(self, frame: dict[str, Any]) -> Envelope | None:
+        """Collect a chunk frame; return the envelope once all its chunks are in."""
+        try:
+            chunk_id, index, count = frame["chunk"], frame["index"], frame["count"]
+            pieces = self._chunks.get(chunk_id)
+            if pieces is None:
+                pieces = self._chunks[chunk_id] = [None] * count
+                while len(self._chunks) > self.max_pending_chunks:
+                    self._chunks.popitem(last=False)
+            pieces[index] = frame["data"]
+        except (KeyError, IndexError, TypeError):
+            logger.warning("Dropping malformed backplane chunk")
+            return None
+        if any(piece is None for piece in pieces):
+            return None
+
+        del self._chunks[chunk_id]
+        try:
+            data = base64.b64decode("".join(piece or "" for piece in pieces))
+            envelope: Envelope = json.loads(data.decode("utf-8"))
+        except ValueError:
+            logger.warning("Dropping malformed chunked backplane envelope")
+            return None
+        return envelope
+
+
+class InProcessBackplane(Backplane):
+    """Backplane for a single process; delivers synchronously to local subscribers."""
+
+    async def publish(self, envelope: Envelope) -> None:
+        """
+        Publish an envelope to subscribers in this process.
+
+        Args:
+            envelope: JSON-serializable envelope
+        """
+        self._deliver(envelope)
+
+
+class PostgresBackplane(Backplane):
+    """
+    Backplane built on Postgres LISTEN/NOTIFY.
+
+    Envelopes too large for one NOTIFY are sent as several chunk frames in
+    order. A publish on a broken connection reconnects and carries on with
+    the frames not yet sent.
+    """
+
+    def __init__(self, dsn: str, channel: str = "pmtool_ws") -> None:
+        """
+        Initialize Postgres backplane.
+
+        Args:
+            dsn: Postgres connection URL (SQLAlchemy driver suffixes are ignored)
+            channel: NOTIFY channel name
+        """
+        super().__init__()
+        self.dsn = make_url(dsn).set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        self.channel = channel
+        self._publisher: Any = None
+        self._publish_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    async def start(self) -> None:
+        """Open the publish connection and start the LISTEN thread."""
+        await super().start()
+        self._stopping.clear()
+        self._publisher = await asyncio.to_thread(self._connect)
+        self._thread = threading.Thread(
+            target=self._listen_forever, name="pg-backplane", daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self) -> None:
+        """Stop the LISTEN thread and close connections."""
+        self._stopping.set()
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join, 5)
+            self._thread = None
+        if self._publisher is not None:
+            self._publisher.close()
+            self._publisher = None
+        await super().stop()
+
+    async def publish(self, envelope: Envelope) -> None:
+        """
+        Publish an envelope with NOTIFY.
+
+        Args:
+            envelope: JSON-serializable envelope
+        """
+        frames = split_payload(_encode_envelope(envelope), MAX_NOTIFY_PAYLOAD)
+        await asyncio.to_thread(self._notify, frames)
+
+    def _connect(self) -> Any:
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        connection = psycopg2.connect(self.dsn)
+        connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        return connection
+
+    def _notify(self, frames: list[str]) -> None:
+        import psycopg2
+
+        with self._publish_lock:
+            sent = 0
+            for attempt in range(2):
+                try:
+                    if self._publisher is None or self._publisher.closed:
+                        self._publisher = self._connect()
+                    with self._publisher.cursor() as cursor:
+                        for frame in frames[sent:]:
+                            cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, frame))
+                            sent += 1
+                    return
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    if self._publisher is not None:
+                        self._publisher.close()
+                        self._publisher = None
+                    if attempt:
+                        raise
+                    logger.warning("Postgres backplane publisher lost; reconnecting")
+
+    def _listen_forever(self) -> None:
+        """Run LISTEN, reconnecting with backoff if the connection drops."""
+        backoff = 0.5
+        while not self._stopping.is_set():
+            try:
+                self._listen()
+                backoff = 0.5
+            except Exception:
+                logger.exception("Postgres backplane listener failed; reconnecting")
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def _listen(self) -> None:
+        from psycopg2 import sql
+
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+            while not self._stopping.is_set():
+                if select.select([connection], [], [], 1.0) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    self._receive(connection.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+
+class SocketBroker:
+    """
+    Minimal TCP broker relaying newline-delimited frames between workers.
+
+    Meant for tests and local multi-worker runs; every frame is relayed to
+    every connected client, including its sender.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """
+        Initialize broker.
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.host = host
+        self.port = port
+        self._server: socket.socket | None = None
+        self._clients: list[socket.socket] = []
+        self._lock = threading.Lock()
+
+    def start(self) -> tuple[str, int]:
+        """
+        Start accepting clients in a background thread.
+
+        Returns:
+            The (host, port) the broker listens on
+        """
+        server = socket.create_server((self.host, self.port))
+        self._server = server
+        self.port = server.getsockname()[1]
+        threading.Thread(target=self._accept, name="ws-broker", daemon=True).start()
+        return self.host, self.port
+
+    def stop(self) -> None:
+        """Close the listening socket and all client connections."""
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        with self._lock:
+            for client in self._clients:
+                client.close()
+            self._clients.clear()
+
+    def _accept(self) -> None:
+        while self._server is not None:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            with self._lock:
+                self._clients.append(client)
+            threading.Thread(target=self._relay, args=(client,), daemon=True).start()
+
+    def _relay(self, client: socket.socket) -> None:
+        try:
+            for line in client.makefile("rb"):
+                with self._lock:
+                    for peer in list(self._clients):
+                        try:
+                            peer.sendall(line)
+                        except OSError:
+                            self._clients.remove(peer)
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                if client in self._clients:
+                    self._clients.remove(client)
+            client.close()
+
+
+class SocketBackplane(Backplane):
+    """Backplane client for :class:`SocketBroker`."""
+
+    def __init__(self, host: str, port: int) -> None:
+        """
+        Initialize socket backplane.
+
+        Args:
+            host: Broker host
+            port: Broker port
+        """
+        super().__init__()
+        self.host = host
+        self.port = port
+        self._socket: socket.socket | None = None
+        self._send_lock = threading.Lock()
+
+    async def start(self) -> None:
+        """Connect to the broker and start the reader thread."""
+        await super().start()
+        self._socket = await asyncio.to_thread(
+            socket.create_connection, (self.host, self.port)
+        )
+        threading.Thread(
+            target=self._read, args=(self._socket,), name="ws-backplane", daemon=True
+        ).start()
+
+    async def stop(self) -> None:
+        """Disconnect from the broker."""
+        if self._socket is not None:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._socket.close()
+            self._socket = None
+        await super().stop()
+
+    async def publish(self, envelope: Envelope) -> None:
+        """
+        Publish an envelope through the broker.
+
+        Args:
+            envelope: JSON-serializable envelope
+        """
+        frame = (_encode_envelope(envelope) + "\n").encode("utf-8")
+        await asyncio.to_thread(self._send, frame)
+
+    def _send(self, frame: bytes) -> None:
+        sock = self._socket
+        if sock is None:
+            return
+        with self._send_lock:
+            sock.sendall(frame)
+
+    def _read(self, sock: socket.socket) -> None:
+        try:
+            for line in sock.makefile("r", encoding="utf-8"):
+                self._receive(line)
+        except (OSError, ValueError):
+            pass
+
+
+def create_backplane() -> Backplane:
+    """
+    Create the backplane selected by ``WS_BACKPLANE``.
+
+    Returns:
+        Configured backplane (not yet started)
+    """
+    kind = settings.WS_BACKPLANE
+    if kind == "memory":
+        return InProcessBackplane()
+    if kind == "postgres":
+        return PostgresBackplane(settings.WS_BACKPLANE_URL or settings.DATABASE_URL)
+    if kind == "socket":
+        host, _, port = settings.WS_BACKPLANE_URL.rpartition(":")
+        return SocketBackplane(host or "127.0.0.1", int(port))
+    raise ValueError(f"Unknown WS_BACKPLANE: {kind!r}")
@@ -0,0 +1,345 @@
+"""Database instrumentation: per-request query stats, slow-query log and pool metrics."""
+import logging
+import threading
+import time
+from collections.abc import Callable, Coroutine
+from contextvars import ContextVar
+from typing import Any
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+slow_query_logger = logging.getLogger("app.db.slow")
+
+# Longest statement text included in a slow-query log line
+MAX_LOGGED_STATEMENT = 1000
+
+
+class RequestStats:
+    """Queries run while handling one HTTP request."""
+
+    __slots__ = ("method", "path", "queries", "db_time")
+
+    def __init__(self, scope: Scope) -> None:
+        """
+        Start collecting stats for a request.
+
+        Args:
+            scope: ASGI scope of the request
+        """
+        self.method: str = scope.get("method", "")
+        # Route template, set by MetricsRoute once a route matches
+        self.path: str | None = None
+        self.queries = 0
+        self.db_time = 0.0
+
+    @property
+    def route(self) -> str:
+        """Method and route template; unmatched paths share one bucket."""
+        return f"{self.method} {self.path or '<unmatched>'}"
+
+
+class MetricsRoute(APIRoute):
+    """
+    APIRoute that reports its path template to the request's stats.
+
+    Used as the ``route_class`` of every router, so stats are grouped by
+    template without relying on what the framework leaves in the scope.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        """Wrap the route's handler to record the matched template."""
+        handler = super().get_route_handler()
+        path = self.path
+
+        async def record_route(request: Request) -> Response:
+            stats = _current_request.get()
+            if stats is not None:
+                stats.path = path
+            return await handler(request)
+
+        return record_route
+
+
+class RouteStats:
+    """Aggregated query stats for one route."""
+
+    __slots__ = ("requests", "queries", "db_time", "max_queries", "max_db_time")
+
+    def __init__(self) -> None:
+        """Initialize empty counters."""
+        self.requests = 0
+        self.queries = 0
+        self.db_time = 0.0
+        self.max_queries = 0
+        self.max_db_time = 0.0
+
+    def add(self, stats: RequestStats) -> None:
+        """
+        Add one finished request.
+
+        Args:
+            stats: The request's stats
+        """
+        self.requests += 1
+        self.queries += stats.queries
+        self.db_time += stats.db_time
+        self.max_queries = max(self.max_queries, stats.queries)
+        self.max_db_time = max(self.max_db_time, stats.db_time)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Get the counters as a JSON-serializable dict.
+
+        Returns:
+            Totals, per-request averages and maxima (times in milliseconds)
+        """
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "db_time_ms": round(self.db_time * 1000, 3),
+            "avg_queries": round(self.queries / self.requests, 2) if self.requests else 0,
+            "avg_db_time_ms": (
+                round(self.db_time * 1000 / self.requests, 3) if self.requests else 0
+            ),
+            "max_queries": self.max_queries,
+            "max_db_time_ms": round(self.max_db_time * 1000, 3),
+        }
+
+
+class PoolWaitStats:
+    """Time spent waiting to check a connection out of a pool."""
+
+    def __init__(self) -> None:
+        """Initialize empty counters."""
+        self.checkouts = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        """
+        Record one checkout attempt.
+
+        Args:
+            wait: Seconds spent waiting
+            timed_out: Whether the attempt gave up with a pool timeout
+        """
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_time += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Get the counters as a JSON-serializable dict.
+
+        Returns:
+            Checkout counts and wait times in milliseconds
+        """
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms": round(self.wait_time * 1000, 3),
+                "avg_wait_ms": round(self.wait_time * 1000 / attempts, 3) if attempts else 0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+class _TimedPoolMixin:
+    """Measures how long checkouts wait for a free connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()  # type: ignore[misc]
+        except PoolTimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+    def recreate(self) -> Any:
+        pool = super().recreate()  # type: ignore[misc]
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    """QueuePool that records checkout wait times."""
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait times."""
+
+
+_current_request: ContextVar[RequestStats | None] = ContextVar(
+    "db_request_stats", default=None
+)
+_route_stats: dict[str, RouteStats] = {}
+_engines: dict[str, Engine] = {}
+
+
+def engine_options(url: str, is_async: bool = False) -> dict[str, Any]:
+    """
+    Get create_engine keyword arguments for an instrumented engine.
+
+    Args:
+        url: Database URL
+        is_async: Whether the engine is created with create_async_engine
+
+    Returns:
+        Keyword arguments (echo and, for queue-pooled backends, the timed pool)
+    """
+    options: dict[str, Any] = {"echo": settings.DB_ECHO}
+    # SQLite picks its own pool class depending on the database
+    if make_url(url).get_backend_name() != "sqlite":
+        options["poolclass"] = TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool
+    return options
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Record query counts and timings for an engine and report its pool.
+
+    Args:
+        engine: Engine to instrument (``AsyncEngine.sync_engine`` for async engines)
+        name: Name the pool is reported under; re-using a name replaces the entry
+    """
+    _engines[name] = engine
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def current_request_stats() -> RequestStats | None:
+    """
+    Get the stats of the request being handled, if any.
+
+    Returns:
+        Stats for the current request, or None outside a request
+    """
+    return _current_request.get()
+
+
+def get_route_stats() -> dict[str, dict[str, Any]]:
+    """
+    Get aggregated stats per route, most DB time first.
+
+    Returns:
+        Mapping of "METHOD /route" to its counters
+    """
+    ordered = sorted(_route_stats.items(), key=lambda item: item[1].db_time, reverse=True)
+    return {route: stats.to_dict() for route, stats in ordered}
+
+
+def get_pool_stats() -> dict[str, dict[str, Any]]:
+    """
+    Get the state of every instrumented engine's pool.
+
+    Returns:
+        Mapping of engine name to pool size, in-use and overflow counts and
+        checkout wait times (when the pool records them)
+    """
+    pools: dict[str, dict[str, Any]] = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        stats: dict[str, Any] = {"class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        wait_stats = getattr(pool, "wait_stats", None)
+        if wait_stats is not None:
+            stats["wait"] = wait_stats.to_dict()
+        pools[name] = stats
+    return pools
+
+
+def reset_metrics() -> None:
+    """Clear the aggregated route stats (for testing)."""
+    _route_stats.clear()
+
+
+class DBMetricsMiddleware:
+    """ASGI middleware collecting query stats for each HTTP request."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Wrap an ASGI app.
+
+        Args:
+            app: Application to wrap
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request with a fresh RequestStats in context."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _current_request.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_request.reset(token)
+            route = stats.route
+            route_stats = _route_stats.get(route)
+            if route_stats is None:
+                route_stats = _route_stats[route] = RouteStats()
+            route_stats.add(stats)
+
+
+def _before_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+
+    if elapsed * 1000 >= settings.DB_SLOW_QUERY_MS:
+        slow_query_logger.warning(
+            "Slow query (%.1f ms) on %s: %s",
+            elapsed * 1000,
+            stats.route if stats is not None else "<no request>",
+            statement[:MAX_LOGGED_STATEMENT],
+        )
+
+
+def _handle_error(context: Any) -> None:
+    starts = context.connection.info.get("query_start") if context.connection else None
+    if starts:
+        starts.pop()
@@ -2,38 +2,97 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.models.base import get_db
+from app.core.read_routing import ReadRouter, is_replica_session
+from app.core.user_cache import user_cache
+from app.models.base import get_async_db, get_read_db, get_read_router
 from app.models.user import User
 from app.services import user_service
 
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    """Get current authenticated user from JWT token."""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _get_token_payload(credentials: HTTPAuthorizationCredentials) -> tuple[str, float | None]:
+    """Get the email a bearer token was issued for, and when it expires."""
     try:
         token = credentials.credentials
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: str | None = payload.get("sub")
         if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+            raise _credentials_exception()
+    except JWTError as exc:
+        raise _credentials_exception() from exc
+    return email, payload.get("exp")
+
+
+def _check_user(user: User | None) -> User:
+    """Reject unknown and deactivated users."""
+    if user is None or not user.is_active:
+        raise _credentials_exception()
+    return user
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_read_db),
+    router: ReadRouter = Depends(get_read_router),
+) -> User:
+    """
+    Get current authenticated user from JWT token.
+
+    Users are served from the user cache when possible. For read-only (sync)
+    endpoints a miss looks the user up on a replica, and on the primary if
+    the replica has not caught up with a new account yet.
+    """
+    user = user_cache.get(credentials.credentials)
+    if user is not None:
+        return user
 
+    generation = user_cache.generation
+    email, expires_at = _get_token_payload(credentials)
     user = user_service.get_user_by_email(db, email=email)
-    if user is None:
-        raise credentials_exception
+    if user is None and is_replica_session(db):
+        with router.primary() as primary_db:
+            user = user_service.get_user_by_email(primary_db, email=email)
+    user = _check_user(user)
 
+    user_cache.put(credentials.credentials, user, expires_at, generation)
     return user
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    """Get current authenticated user using the async session (for async endpoints)."""
+    user = user_cache.get(credentials.credentials)
+    if user is not None:
+        return user
+
+    generation = user_cache.generation
+    email, expires_at = _get_token_payload(credentials)
+    user = _check_user(await user_service.get_user_by_email_async(db, email=email))
+
+    user_cache.put(credentials.credentials, user, expires_at, generation)
+    return user
+
+
+def get_current_superuser(current_user: User = Depends(get_current_user)) -> User:
+    """Get current user, requiring superuser rights."""
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    return current_user
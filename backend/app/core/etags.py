@@ -0,0 +1,83 @@
+"""Entity tags for conditional requests."""
+import hashlib
+from typing import Any
+
+
+def task_etag(task_id: int, version: int) -> str:
+    """
+    Get the ETag of one version of a task.
+
+    Args:
+        task_id: Task ID
+        version: Task version
+
+    Returns:
+        Quoted strong ETag
+    """
+    return f'"{task_id}-{version}"'
+
+
+def digest_etag(*parts: Any) -> str:
+    """
+    Get an ETag summarizing a representation's inputs.
+
+    Args:
+        parts: Values that together determine the representation
+
+    Returns:
+        Quoted strong ETag
+    """
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """
+    Check an If-None-Match header against the current ETag.
+
+    Uses weak comparison, as If-None-Match requires.
+
+    Args:
+        header: If-None-Match header value, if sent
+        etag: Current ETag
+
+    Returns:
+        True if the client's copy is current
+    """
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(_strip_weak(tag) == _strip_weak(etag) for tag in _split(header))
+
+
+def if_match_versions(header: str | None, task_id: int) -> list[int] | None:
+    """
+    Get the task versions an If-Match header allows a write to.
+
+    Uses strong comparison, as If-Match requires, so weak tags never match.
+
+    Args:
+        header: If-Match header value, if sent
+        task_id: Task being written
+
+    Returns:
+        None when the write is unconditional (no header, or ``*``), otherwise
+        the versions that may be overwritten (possibly none)
+    """
+    if header is None or header.strip() == "*":
+        return None
+    prefix = f'"{task_id}-'
+    versions = []
+    for tag in _split(header):
+        if tag.startswith(prefix) and tag.endswith('"') and tag[len(prefix):-1].isdigit():
+            versions.append(int(tag[len(prefix):-1]))
+    return versions
+
+
+def _split(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _strip_weak(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
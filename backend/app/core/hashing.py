@@ -0,0 +1,206 @@
+"""Bounded executor for password hashing, kept off the request threadpool."""
+import asyncio
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from app.core import security
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class HashingUnavailableError(Exception):
+    """Raised when the hashing queue is full and a request must be shed."""
+
+    def __init__(self, retry_after: int) -> None:
+        """
+        Initialize error.
+
+        Args:
+            retry_after: Seconds the client should wait before retrying
+        """
+        super().__init__("Password hashing is saturated")
+        self.retry_after = retry_after
+
+
+class HashLatencyStats:
+    """Queue wait and hashing time of completed jobs."""
+
+    def __init__(self) -> None:
+        """Initialize empty counters."""
+        self.completed = 0
+        self.rejected = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.hash_time = 0.0
+        self.max_hash = 0.0
+
+    def record(self, wait: float, elapsed: float) -> None:
+        """
+        Record one finished job.
+
+        Args:
+            wait: Seconds the job waited for a worker
+            elapsed: Seconds the job ran
+        """
+        self.completed += 1
+        self.wait_time += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.hash_time += elapsed
+        self.max_hash = max(self.max_hash, elapsed)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Get the counters as a JSON-serializable dict.
+
+        Returns:
+            Job counts and times in milliseconds
+        """
+        completed = self.completed or 1
+        return {
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_time * 1000 / completed, 3),
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "avg_hash_ms": round(self.hash_time * 1000 / completed, 3),
+            "max_hash_ms": round(self.max_hash * 1000, 3),
+        }
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on its own threads with admission control.
+
+    bcrypt is CPU-bound and deliberately slow, so a login burst on the shared
+    request threadpool would stall every sync endpoint. Here at most
+    ``workers`` hashes run at once and at most ``queue_size`` more wait;
+    further requests are refused at once with HashingUnavailableError
+    instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int | None = None, queue_size: int | None = None) -> None:
+        """
+        Initialize hasher.
+
+        Args:
+            workers: Hashing threads (defaults to PASSWORD_HASH_WORKERS, or one
+                per CPU core)
+            queue_size: Jobs allowed to wait for a thread (defaults to
+                PASSWORD_HASH_QUEUE_SIZE)
+        """
+        self.workers = workers or settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+        self.queue_size = settings.PASSWORD_HASH_QUEUE_SIZE if queue_size is None else queue_size
+        self.stats = HashLatencyStats()
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending = 0
+        self._running = 0
+        self._lock = threading.Lock()
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password with the configured bcrypt cost.
+
+        Args:
+            password: Plain password
+
+        Returns:
+            bcrypt hash
+
+        Raises:
+            HashingUnavailableError: If the queue is full
+        """
+        return await self.run(security.get_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Check a password against a bcrypt hash.
+
+        Args:
+            password: Plain password
+            hashed_password: Stored hash
+
+        Returns:
+            True if the password matches
+
+        Raises:
+            HashingUnavailableError: If the queue is full
+        """
+        return await self.run(security.verify_password, password, hashed_password)
+
+    async def run(self, function: Callable[..., T], *args: Any) -> T:
+        """
+        Run a hashing function on the hashing threads.
+
+        Args:
+            function: Function to call
+            args: Its arguments
+
+        Returns:
+            The function's result
+
+        Raises:
+            HashingUnavailableError: If the queue is full
+        """
+        with self._lock:
+            if self._pending >= self.workers + self.queue_size:
+                self.stats.rejected += 1
+                raise HashingUnavailableError(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+            executor = self._executor
+
+        submitted = time.perf_counter()
+
+        def job() -> T:
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+            try:
+                return function(*args)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                    self._running -= 1
+                    self.stats.record(started - submitted, time.perf_counter() - started)
+
+        # The slot is freed when the job finishes, even if the request is
+        # cancelled while waiting for it
+        return await asyncio.wrap_future(executor.submit(job))
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get the hasher's state and latencies.
+
+        Returns:
+            Worker and queue sizes, current queue depth and job stats
+        """
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                **self.stats.to_dict(),
+            }
+
+    def shutdown(self) -> None:
+        """Stop the hashing threads once queued jobs finish; they restart on next use."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Get the password hasher dependency."""
+    return password_hasher
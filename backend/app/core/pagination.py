@@ -0,0 +1,75 @@
+"""Opaque cursors for keyset pagination."""
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(updated_at: datetime, item_id: int) -> str:
+    """
+    Encode the sort key of the last item on a page.
+
+    Args:
+        updated_at: Item's update time
+        item_id: Item's ID (breaks ties between equal timestamps)
+
+    Returns:
+        URL-safe opaque cursor
+    """
+    raw = json.dumps([updated_at.isoformat(), item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Opaque cursor from a previous page
+
+    Returns:
+        The (updated_at, id) sort key to continue after
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(item_id, int) or isinstance(item_id, bool):
+            raise ValueError("cursor id must be an integer")
+        return datetime.fromisoformat(updated_at), item_id
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def encode_key_cursor(key: str) -> str:
+    """
+    Encode the unique sort key of the last item on a page.
+
+    Args:
+        key: Item's sort key (e.g. a user's email)
+
+    Returns:
+        URL-safe opaque cursor
+    """
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_key_cursor(cursor: str) -> str:
+    """
+    Decode a cursor produced by encode_key_cursor.
+
+    Args:
+        cursor: Opaque cursor from a previous page
+
+    Returns:
+        The sort key to continue after
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.b64decode(padded, altchars=b"-_", validate=True).decode("utf-8")
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
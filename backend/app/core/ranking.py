@@ -0,0 +1,101 @@
+"""Lexicographic rank keys for ordering cards without renumbering."""
+
+# Digits in ascending order under both byte-wise and locale collations
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+
+def rank_between(before: str | None, after: str | None) -> str:
+    """
+    Get a rank that sorts strictly between two others.
+
+    Ranks are base-36 fractions written without the leading "0." and never
+    end in "0", so there is always room for another key in between. Only
+    the moved item needs a new key. Keys at either end are stepped by one
+    digit, so repeated appends grow them by a digit every ~35 items, and
+    repeatedly splitting one gap by a digit every ~5 moves; see
+    evenly_spaced_ranks for compacting them again.
+
+    Args:
+        before: Rank of the item that should come first, or None for the start
+        after: Rank of the item that should come next, or None for the end
+
+    Returns:
+        New rank key
+
+    Raises:
+        ValueError: If ``before`` does not sort before ``after``
+    """
+    if before is None:
+        return DIGITS[BASE // 2] if after is None else _key_before(after)
+    if after is None:
+        return _key_after(before)
+    if before >= after:
+        raise ValueError(f"Rank {before!r} does not sort before {after!r}")
+    return _midpoint(before, after)
+
+
+def evenly_spaced_ranks(count: int) -> list[str]:
+    """
+    Get short, evenly spaced ranks for a whole list.
+
+    Args:
+        count: Number of keys
+
+    Returns:
+        ``count`` ascending rank keys of the shortest sufficient length
+    """
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    step = BASE ** width // (count + 1)
+    return [_to_digits((index + 1) * step, width).rstrip("0") for index in range(count)]
+
+
+def _key_after(low: str) -> str:
+    """Shortest step up from low: bump the first digit that is not the largest."""
+    for index, char in enumerate(low):
+        if char != DIGITS[-1]:
+            return low[:index] + DIGITS[DIGITS.index(char) + 1]
+    return low + DIGITS[1]
+
+
+def _key_before(high: str) -> str:
+    """Shortest step down from high that does not end in the zero digit."""
+    for index, char in enumerate(high):
+        digit = DIGITS.index(char)
+        if digit > 1:
+            return high[:index] + DIGITS[digit - 1]
+        if digit == 1 and index == len(high) - 1:
+            return high[:index] + DIGITS[0] + DIGITS[-1]
+    raise ValueError(f"No rank sorts before {high!r}")
+
+
+def _midpoint(low: str, high: str | None) -> str:
+    """Midpoint of two digit strings; high=None means one past the largest key."""
+    if high is not None:
+        # Keep the common prefix (treating missing low digits as zeros)
+        prefix = 0
+        while prefix < len(high) and (low[prefix] if prefix < len(low) else "0") == high[prefix]:
+            prefix += 1
+        if prefix:
+            return high[:prefix] + _midpoint(low[prefix:], high[prefix:])
+
+    low_digit = DIGITS.index(low[0]) if low else 0
+    high_digit = DIGITS.index(high[0]) if high is not None else BASE
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit) // 2]
+
+    # Adjacent digits: take the shorter high key if it has more digits,
+    # otherwise keep low's digit and split the remainder
+    if high is not None and len(high) > 1:
+        return high[:1]
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def _to_digits(value: int, width: int) -> str:
+    digits = []
+    for _ in range(width):
+        value, remainder = divmod(value, BASE)
+        digits.append(DIGITS[remainder])
+    return "".join(reversed(digits))
@@ -0,0 +1,343 @@
+"""Rate limiting and load shedding for the authentication endpoints."""
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable
+
+from sqlalchemy import ColumnElement, Table, case, delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.models.base import async_engine
+from app.models.rate_limit import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitedError(Exception):
+    """Raised when a client has used up its requests for now."""
+
+    def __init__(self, retry_after: int) -> None:
+        """
+        Initialize error.
+
+        Args:
+            retry_after: Seconds until the client may try again
+        """
+        super().__init__("Too many requests")
+        self.retry_after = retry_after
+
+
+class BucketStore(ABC):
+    """
+    Base class for token bucket storage.
+
+    A bucket holds up to ``capacity`` tokens and regains ``per_second``
+    tokens a second; each request takes one. A key that was never seen, or
+    not for long enough to refill, has a full bucket.
+    """
+
+    @abstractmethod
+    async def take(
+        self, key: str, capacity: int, per_second: float, now: float | None = None
+    ) -> float:
+        """
+        Take a token from a bucket if it has one.
+
+        Args:
+            key: Bucket key
+            capacity: Bucket size (the allowed burst)
+            per_second: Refill rate
+            now: Current Unix time (for testing)
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one is available
+        """
+
+
+class MemoryBucketStore(BucketStore):
+    """Buckets in this process only; the least recently used are forgotten."""
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        """
+        Initialize store.
+
+        Args:
+            max_keys: Buckets kept; forgetting one refills it
+        """
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(
+        self, key: str, capacity: int, per_second: float, now: float | None = None
+    ) -> float:
+        """Take a token from a bucket if it has one."""
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - updated_at) * per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, max(now, updated_at))
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0.0 if allowed else (1 - tokens) / per_second
+
+    def clear(self) -> None:
+        """Refill every bucket (for testing)."""
+        with self._lock:
+            self._buckets.clear()
+
+
+class DatabaseBucketStore(BucketStore):
+    """
+    Buckets in the ``rate_limit_buckets`` table, shared by every worker.
+
+    Each take is one INSERT ... ON CONFLICT DO UPDATE ... RETURNING, so
+    concurrent takes on a bucket are serialized by its row lock. Rows of
+    buckets that have refilled are deleted every ``cleanup_every`` takes.
+    """
+
+    def __init__(self, engine: AsyncEngine, cleanup_every: int = 1000) -> None:
+        """
+        Initialize store.
+
+        Args:
+            engine: Async engine of a Postgres or SQLite database
+            cleanup_every: Takes between deletions of full buckets
+        """
+        self._insert: Callable[[Table], Any]
+        self._least: Callable[..., ColumnElement[Any]]
+        self._greatest: Callable[..., ColumnElement[Any]]
+        dialect = engine.dialect.name
+        if dialect == "postgresql":
+            self._insert = postgresql.insert
+            self._least, self._greatest = func.least, func.greatest
+        elif dialect == "sqlite":
+            self._insert = sqlite.insert
+            # SQLite's two-argument min() and max() are scalar
+            self._least, self._greatest = func.min, func.max
+        else:
+            raise ValueError(f"No upsert for database {dialect!r}")
+        self.engine = engine
+        self.cleanup_every = cleanup_every
+        self._takes = 0
+
+    async def take(
+        self, key: str, capacity: int, per_second: float, now: float | None = None
+    ) -> float:
+        """Take a token from a bucket if it has one."""
+        now = time.time() if now is None else now
+        bucket = RateLimitBucket.__table__
+
+        # Another worker's clock may be slightly ahead; never refill backwards
+        elapsed = self._greatest(now - bucket.c.updated_at, 0.0)
+        refilled = self._least(bucket.c.tokens + elapsed * per_second, float(capacity))
+        allowed = refilled >= 1
+        tokens = case((allowed, refilled - 1), else_=refilled)
+        insert = self._insert(bucket).values(
+            key=key,
+            tokens=capacity - 1,
+            updated_at=now,
+            full_at=now + 1 / per_second,
+            allowed=capacity >= 1,
+        )
+        statement = insert.on_conflict_do_update(
+            index_elements=[bucket.c.key],
+            set_={
+                "tokens": tokens,
+                "updated_at": self._greatest(bucket.c.updated_at, now),
+                "full_at": now + (capacity - tokens) / per_second,
+                "allowed": allowed,
+            },
+        ).returning(bucket.c.tokens, bucket.c.allowed)
+
+        async with self.engine.begin() as connection:
+            left, taken = (await connection.execute(statement)).one()
+
+        self._takes += 1
+        if self._takes % self.cleanup_every == 0:
+            async with self.engine.begin() as connection:
+                await connection.execute(delete(bucket).where(bucket.c.full_at < now))
+        return 0.0 if taken else (1 - left) / per_second
+
+
+def create_bucket_store() -> BucketStore:
+    """
+    Create the bucket store selected by ``AUTH_RATE_LIMIT_STORE``.
+
+    Returns:
+        Configured bucket store
+    """
+    kind = settings.AUTH_RATE_LIMIT_STORE
+    if kind == "memory":
+        return MemoryBucketStore()
+    if kind == "database":
+        return DatabaseBucketStore(async_engine)
+    raise ValueError(f"Unknown AUTH_RATE_LIMIT_STORE: {kind!r}")
+
+
+class AuthRateLimiter:
+    """
+    Per-IP and per-account token buckets, plus a cap on in-flight auth requests.
+
+    A limit set to 0 is off. If the bucket store fails, requests are let
+    through rather than locking everyone out.
+    """
+
+    def __init__(self, store: BucketStore, max_concurrent: int | None = None) -> None:
+        """
+        Initialize limiter.
+
+        Args:
+            store: Where buckets are kept
+            max_concurrent: In-flight requests allowed (defaults to
+                AUTH_MAX_CONCURRENT_REQUESTS)
+        """
+        self.store = store
+        self.max_concurrent = (
+            settings.AUTH_MAX_CONCURRENT_REQUESTS if max_concurrent is None else max_concurrent
+        )
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    async def check_ip(self, ip: str) -> None:
+        """
+        Count a request from a client address.
+
+        Args:
+            ip: Client IP address
+
+        Raises:
+            RateLimitedError: If the address is over its limit
+        """
+        await self._take(
+            f"ip:{ip}", settings.AUTH_RATE_LIMIT_IP_BURST, settings.AUTH_RATE_LIMIT_IP_PER_MINUTE
+        )
+
+    async def check_account(self, email: str) -> None:
+        """
+        Count a login or registration attempt for an account.
+
+        Args:
+            email: Account email
+
+        Raises:
+            RateLimitedError: If the account is over its limit
+        """
+        await self._take(
+            f"account:{email.lower()}",
+            settings.AUTH_RATE_LIMIT_ACCOUNT_BURST,
+            settings.AUTH_RATE_LIMIT_ACCOUNT_PER_MINUTE,
+        )
+
+    def try_acquire(self) -> bool:
+        """
+        Claim an in-flight slot.
+
+        Returns:
+            False if the cap is reached and the request should be shed
+        """
+        with self._lock:
+            if self.max_concurrent and self._in_flight >= self.max_concurrent:
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self) -> None:
+        """Free a slot claimed by try_acquire."""
+        with self._lock:
+            self._in_flight -= 1
+
+    async def _take(self, key: str, burst: int, per_minute: float) -> None:
+        if burst <= 0 or per_minute <= 0:
+            return
+        try:
+            wait = await self.store.take(key, burst, per_minute / 60)
+        except Exception:
+            logger.warning("Rate limit store failed; allowing request", exc_info=True)
+            return
+        if wait > 0:
+            raise RateLimitedError(math.ceil(wait))
+
+
+auth_rate_limiter = AuthRateLimiter(create_bucket_store())
+
+
+def get_auth_rate_limiter() -> AuthRateLimiter:
+    """Get the authentication rate limiter dependency."""
+    return auth_rate_limiter
+
+
+class AuthRateLimitMiddleware:
+    """
+    ASGI middleware guarding the authentication endpoints.
+
+    POST requests to ``paths`` are refused with 429 once their client IP is over
+    its limit, and with 503 while AUTH_MAX_CONCURRENT_REQUESTS are already
+    in flight. The cap sits below what the hashing pool admits, so bursts
+    are shed here, before bcrypt work, database connections or the request
+    threadpool are taken from other endpoints. Per-account limits need the
+    request body and are checked by the endpoints.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: frozenset[str],
+        limiter: AuthRateLimiter = auth_rate_limiter,
+    ) -> None:
+        """
+        Wrap an ASGI app.
+
+        Args:
+            app: Application to wrap
+            paths: Paths to guard
+            limiter: Limiter to apply
+        """
+        self.app = app
+        self.paths = paths
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request unless its client is limited or the endpoints are saturated."""
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        try:
+            await self.limiter.check_ip(client[0] if client else "unknown")
+        except RateLimitedError as exc:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests, try again later"},
+                headers={"Retry-After": str(exc.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        if not self.limiter.try_acquire():
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Too many authentication requests, try again shortly"},
+                headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release()
@@ -0,0 +1,176 @@
+"""Routing of read-only requests to replica databases, with read-your-writes."""
+import itertools
+import threading
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+
+from sqlalchemy.orm import Session
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Methods that never write, so they do not start a stickiness window
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+_read_primary: ContextVar[bool] = ContextVar("read_primary", default=False)
+
+
+class WriteTracker:
+    """Remembers which clients wrote recently, so their reads see the write."""
+
+    def __init__(self) -> None:
+        """Initialize an empty tracker."""
+        self._last_write: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def mark_write(self, key: str, now: float | None = None) -> None:
+        """
+        Record that a client just wrote.
+
+        Args:
+            key: Client identity (its bearer token)
+            now: Current monotonic time (for testing)
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._last_write[key] = now
+            # Forget clients whose window has passed, so the map stays small
+            if len(self._last_write) > 1024:
+                cutoff = now - settings.DB_REPLICA_STICKY_SECONDS
+                for stale in [k for k, t in self._last_write.items() if t < cutoff]:
+                    del self._last_write[stale]
+
+    def wrote_recently(self, key: str, now: float | None = None) -> bool:
+        """
+        Check whether a client's reads must still go to the primary.
+
+        Args:
+            key: Client identity (its bearer token)
+            now: Current monotonic time (for testing)
+
+        Returns:
+            True if the client wrote within DB_REPLICA_STICKY_SECONDS
+        """
+        now = time.monotonic() if now is None else now
+        last_write = self._last_write.get(key)
+        return last_write is not None and now - last_write < settings.DB_REPLICA_STICKY_SECONDS
+
+    def clear(self) -> None:
+        """Forget all writes (for testing)."""
+        with self._lock:
+            self._last_write.clear()
+
+
+write_tracker = WriteTracker()
+
+
+class ReadRouter:
+    """Opens sessions for read-only requests on a replica, or the primary when needed."""
+
+    def __init__(
+        self, primary: Callable[[], Session], replicas: list[Callable[[], Session]]
+    ) -> None:
+        """
+        Initialize router.
+
+        Args:
+            primary: Session factory for the primary database
+            replicas: Session factories for the replicas, used round-robin;
+                with none, every read goes to the primary
+        """
+        self.primary = primary
+        self.replicas = replicas
+        self._next_replica = itertools.cycle(replicas)
+        self._lock = threading.Lock()
+
+    def session(self) -> Session:
+        """
+        Open a session for a read-only request.
+
+        Returns:
+            A replica session, or a primary session when there are no
+            replicas or the client wrote within the stickiness window
+        """
+        if not self.replicas or _read_primary.get():
+            return self.primary()
+        with self._lock:
+            factory = next(self._next_replica)
+        db = factory()
+        db.info["replica"] = True
+        return db
+
+
+def is_replica_session(db: Session) -> bool:
+    """
+    Check whether a session reads from a replica.
+
+    Args:
+        db: Session opened by a ReadRouter
+
+    Returns:
+        True for replica sessions
+    """
+    return bool(db.info.get("replica", False))
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware pinning a client's reads to the primary after it writes.
+
+    Clients are identified by their bearer token, which is used as is rather
+    than decoded: only a token the app accepted for a successful write can
+    start a window, so this adds no JWT decode to the request path. A request
+    with an unsafe method that succeeds starts a window of
+    DB_REPLICA_STICKY_SECONDS during which ReadRouter sends that client's
+    reads to the primary. Windows are kept per worker process.
+    """
+
+    def __init__(self, app: ASGIApp, tracker: WriteTracker = write_tracker) -> None:
+        """
+        Wrap an ASGI app.
+
+        Args:
+            app: Application to wrap
+            tracker: Where recent writes are recorded
+        """
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request, routing its reads and recording its writes."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        key = _bearer_token(scope)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        token = _read_primary.set(self.tracker.wrote_recently(key))
+        try:
+            if scope["method"] in SAFE_METHODS:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start" and message["status"] < 400:
+                    self.tracker.mark_write(key)
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _read_primary.reset(token)
+
+
+def _bearer_token(scope: Scope) -> str | None:
+    """Get the request's bearer token, if it sends one."""
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            header: str = value.decode("latin-1")
+            scheme, _, credentials = header.partition(" ")
+            if scheme.lower() != "bearer" or not credentials:
+                return None
+            return credentials
+    return None
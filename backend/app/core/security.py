@@ -7,9 +7,20 @@ from jose import jwt
 
 from app.core.config import settings
 
+# Stored for accounts that cannot log in with a password (guests); never a
+# valid bcrypt hash, so no password matches it
+UNUSABLE_PASSWORD_HASH = "!"
+
+
+def is_usable_password_hash(hashed_password: str) -> bool:
+    """Check whether a stored hash can match any password."""
+    return hashed_password != UNUSABLE_PASSWORD_HASH
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
+    if not is_usable_password_hash(hashed_password):
+        return False
     return bcrypt.checkpw(
         plain_password.encode('utf-8'),
         hashed_password.encode('utf-8')
@@ -17,12 +28,19 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 
 def get_password_hash(password: str) -> str:
-    """Hash a password."""
-    salt = bcrypt.gensalt()
+    """Hash a password with BCRYPT_ROUNDS."""
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """Check whether a hash was made with a bcrypt cost other than BCRYPT_ROUNDS."""
+    # bcrypt hashes look like $2b$<cost>$<salt and digest>
+    parts = hashed_password.split('$')
+    return len(parts) < 4 or not parts[2].isdigit() or int(parts[2]) != settings.BCRYPT_ROUNDS
+
+
 def create_access_token(data: dict[str, Any], expires_delta: timedelta | None = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
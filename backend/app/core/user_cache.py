@@ -0,0 +1,211 @@
+"""Cache of authenticated users by bearer token."""
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from app.core.config import settings
+from app.models.user import User
+
+# Session.info key for emails to invalidate once the transaction commits
+_PENDING_KEY = "user_cache_invalidate"
+# Marker in the pending set: a bulk statement changed unknown users
+_ALL_USERS = object()
+
+
+class UserCache:
+    """
+    Bounded TTL/LRU cache of token -> user snapshot.
+
+    A hit skips both decoding the token and looking the user up. Entries
+    expire after USER_CACHE_TTL_SECONDS or when their token does, whichever
+    is first, and are dropped as soon as a change to their user commits in
+    this process. Other processes see the change within the TTL.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        self._entries: OrderedDict[str, tuple[float, str, dict[str, Any]]] = OrderedDict()
+        self._tokens_by_email: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str, now: float | None = None) -> User | None:
+        """
+        Get the user a token was issued to, if cached.
+
+        Args:
+            token: Raw bearer token
+            now: Current time (for testing)
+
+        Returns:
+            A detached copy of the cached user, or None on a miss
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            values = entry[2]
+
+        # Each request gets its own object, so none can alter another's
+        user = User(**values)
+        make_transient_to_detached(user)
+        return user
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped by every invalidation; read it before loading a user."""
+        return self._generation
+
+    def put(
+        self,
+        token: str,
+        user: User,
+        token_expires_at: float | None,
+        generation: int | None = None,
+        now: float | None = None,
+    ) -> None:
+        """
+        Cache the user a token was issued to.
+
+        Args:
+            token: Raw bearer token
+            user: User loaded for it
+            token_expires_at: The token's ``exp`` (Unix time), if any
+            generation: ``generation`` read before the user was loaded; if
+                anything was invalidated since, the user may be stale and is
+                not cached
+            now: Current time (for testing)
+        """
+        if settings.USER_CACHE_SIZE <= 0:
+            return
+        now = time.time() if now is None else now
+        expires_at = now + settings.USER_CACHE_TTL_SECONDS
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (expires_at, user.email, values)
+            self._tokens_by_email.setdefault(user.email, set()).add(token)
+            while len(self._entries) > settings.USER_CACHE_SIZE:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, email: str) -> None:
+        """
+        Drop every cached token of a user.
+
+        Args:
+            email: The user's email
+        """
+        with self._lock:
+            self._generation += 1
+            for token in self._tokens_by_email.pop(email, ()):
+                self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tokens_by_email.clear()
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Get the cache's size and hit counts.
+
+        Returns:
+            Entry count, hits and misses
+        """
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _remove(self, token: str) -> None:
+        _, email, _ = self._entries.pop(token)
+        tokens = self._tokens_by_email.get(email)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_email[email]
+
+
+user_cache = UserCache()
+
+
+def _queue_invalidation(session: Session | None, key: Any) -> None:
+    if session is None:
+        user_cache.clear()
+        return
+    session.info.setdefault(_PENDING_KEY, set()).add(key)
+
+
+def invalidate_after_commit(session: Session, emails: Iterable[str]) -> None:
+    """
+    Drop users' cached tokens once the session's transaction commits.
+
+    For bulk statements run with the ``user_cache_unaffected`` execution
+    option whose affected users are known, so only they are invalidated.
+
+    Args:
+        session: Session running the change
+        emails: Emails of the changed users
+    """
+    for email in emails:
+        _queue_invalidation(session, email)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper: Any, connection: Any, target: User) -> None:
+    session = object_session(target)
+    _queue_invalidation(session, target.email)
+    # A changed email leaves tokens issued for the old one
+    old_email: str
+    for old_email in inspect(target).attrs.email.history.deleted:
+        _queue_invalidation(session, old_email)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_user_write(orm_execute_state: Any) -> None:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is not User:
+        return
+    if orm_execute_state.execution_options.get("user_cache_unaffected", False):
+        return
+    _queue_invalidation(orm_execute_state.session, _ALL_USERS)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session: Session) -> None:
+    # After commit, so a concurrent request cannot re-cache the old row
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if _ALL_USERS in pending:
+        user_cache.clear()
+        return
+    for email in pending:
+        user_cache.invalidate(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,277 @@
+"""In-memory prefix index of users, for searching databases without trigram indexes."""
+import bisect
+import threading
+import time
+from collections.abc import Iterable
+from typing import Any, NamedTuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.user import User
+
+# Session.info key for users changed in the current transaction, by ID
+_CHANGED_KEY = "user_directory_changed"
+# Key in the changed users: a bulk statement changed unknown users
+_ALL_USERS = object()
+# Characters that split emails and names into words
+_SEPARATORS = frozenset(" @.-_+")
+
+
+class DirectoryEntry(NamedTuple):
+    """An active user, as kept in the directory."""
+
+    email: str
+    id: int
+    is_guest: bool
+
+
+class DirectoryUser(NamedTuple):
+    """The fields of a user the directory indexes."""
+
+    id: int
+    email: str
+    full_name: str | None
+    is_guest: bool
+    is_active: bool
+
+    @classmethod
+    def of(cls, user: User) -> "DirectoryUser":
+        """Copy a user's indexed fields, so they can be applied after commit."""
+        return cls(
+            user.id, user.email, user.full_name, bool(user.is_guest), bool(user.is_active)
+        )
+
+
+def search_terms(email: str, full_name: str | None) -> set[str]:
+    """
+    Get the lowercase strings a user can be found by the prefix of.
+
+    Args:
+        email: User's email
+        full_name: User's name, if any
+
+    Returns:
+        The email and name from the start of each of their words on, so
+        "lovelace" and "example.com" both find ada.lovelace@example.com
+    """
+    terms = set()
+    for value in (email, full_name or ""):
+        value = value.lower().strip()
+        for index, char in enumerate(value):
+            if char not in _SEPARATORS and (index == 0 or value[index - 1] in _SEPARATORS):
+                terms.add(value[index:])
+    return terms
+
+
+class UserDirectory:
+    """
+    Sorted prefix index over active users' emails and names.
+
+    Databases without pg_trgm cannot index substring searches, so this
+    process keeps every active user's search terms in a sorted list and
+    finds prefixes by bisection. Only (email, id, is_guest) is kept per user;
+    search results are loaded from the database by ID.
+
+    Users changed in this process are updated in place when the change
+    commits, at the cost of a few list insertions each. A bulk statement
+    whose users are not known makes the next search rebuild the index, as
+    does USER_DIRECTORY_TTL_SECONDS passing, so changes made by other
+    processes show up.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty, stale directory."""
+        self._terms: list[tuple[str, int]] = []
+        self._entries: dict[int, DirectoryEntry] = {}
+        self._by_email: list[DirectoryEntry] = []
+        self._user_terms: dict[int, set[str]] = {}
+        self._built_at: float | None = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        limit: int,
+        after: str | None = None,
+        exclude_guests: bool = False,
+    ) -> list[int]:
+        """
+        Find active users whose email or name has ``query`` at the start of a word.
+
+        Args:
+            db: Database session, used to rebuild a stale index
+            query: Search text (case-insensitive); empty matches everyone
+            limit: Maximum number of IDs to return
+            after: Email of the last user on the previous page
+            exclude_guests: Leave out guest accounts
+
+        Returns:
+            Up to ``limit`` user IDs, in email order
+        """
+        self._refresh(db)
+        prefix = query.lower().strip()
+        ids: list[int] = []
+        # The lists are updated in place, so they are only read under the lock
+        with self._lock:
+            if prefix:
+                matched: set[int] = set()
+                terms = self._terms
+                for term, user_id in terms[bisect.bisect_left(terms, (prefix,)):]:
+                    if not term.startswith(prefix):
+                        break
+                    matched.add(user_id)
+                candidates = sorted(self._entries[user_id] for user_id in matched)
+            else:
+                candidates = self._by_email
+
+            start = 0 if after is None else bisect.bisect_right(candidates, (after, float("inf")))
+            for entry in candidates[start:]:
+                if exclude_guests and entry.is_guest:
+                    continue
+                ids.append(entry.id)
+                if len(ids) == limit:
+                    break
+        return ids
+
+    def update(
+        self, users: Iterable[DirectoryUser] = (), deleted_ids: Iterable[int] = ()
+    ) -> None:
+        """
+        Apply committed changes to users without rebuilding the index.
+
+        Args:
+            users: Inserted or updated users; inactive ones are removed
+            deleted_ids: IDs of deleted users
+        """
+        with self._lock:
+            # A rebuild loading meanwhile may have read the old rows
+            self._generation += 1
+            for user_id in deleted_ids:
+                self._remove(user_id)
+            for user in users:
+                self._remove(user.id)
+                if user.is_active:
+                    self._add(user)
+
+    def invalidate(self) -> None:
+        """Rebuild the index on the next search."""
+        with self._lock:
+            self._generation += 1
+            self._built_at = None
+
+    def _add(self, user: DirectoryUser) -> None:
+        entry = DirectoryEntry(user.email, user.id, user.is_guest)
+        self._entries[user.id] = entry
+        bisect.insort(self._by_email, entry)
+        terms = search_terms(user.email, user.full_name)
+        self._user_terms[user.id] = terms
+        for term in terms:
+            bisect.insort(self._terms, (term, user.id))
+
+    def _remove(self, user_id: int) -> None:
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return
+        del self._by_email[bisect.bisect_left(self._by_email, entry)]
+        for term in self._user_terms.pop(user_id):
+            del self._terms[bisect.bisect_left(self._terms, (term, user_id))]
+
+    def _refresh(self, db: Session) -> None:
+        now = time.monotonic()
+        with self._lock:
+            built_at, generation = self._built_at, self._generation
+        if built_at is not None and now - built_at < settings.USER_DIRECTORY_TTL_SECONDS:
+            return
+
+        rows = db.execute(
+            select(User.id, User.email, User.full_name, User.is_guest).where(
+                User.is_active.is_(True)
+            )
+        ).all()
+        entries = {row.id: DirectoryEntry(row.email, row.id, bool(row.is_guest)) for row in rows}
+        user_terms = {row.id: search_terms(row.email, row.full_name) for row in rows}
+        terms = sorted((term, user_id) for user_id, words in user_terms.items() for term in words)
+
+        with self._lock:
+            self._terms, self._entries, self._user_terms = terms, entries, user_terms
+            self._by_email = sorted(entries.values())
+            # A change that committed while loading may be missing, so the
+            # next search loads again
+            self._built_at = now if generation == self._generation else None
+
+
+user_directory = UserDirectory()
+
+
+def _queue_change(session: Session | None, key: Any, user: DirectoryUser | None) -> None:
+    if session is None:
+        user_directory.invalidate()
+        return
+    session.info.setdefault(_CHANGED_KEY, {})[key] = user
+
+
+def update_after_commit(
+    session: Session, users: Iterable[User] = (), deleted_ids: Iterable[int] = ()
+) -> None:
+    """
+    Update users' directory entries once the session's transaction commits.
+
+    For bulk statements run with the ``user_directory_unaffected`` execution
+    option whose affected users are known, so the index is updated rather
+    than rebuilt.
+
+    Args:
+        session: Session running the change
+        users: Inserted or updated users, as they will be committed
+        deleted_ids: IDs of deleted users
+    """
+    for user in users:
+        _queue_change(session, user.id, DirectoryUser.of(user))
+    for user_id in deleted_ids:
+        _queue_change(session, user_id, None)
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+def _user_changed(mapper: Any, connection: Any, target: User) -> None:
+    _queue_change(object_session(target), target.id, DirectoryUser.of(target))
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper: Any, connection: Any, target: User) -> None:
+    _queue_change(object_session(target), target.id, None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_user_write(orm_execute_state: Any) -> None:
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is not User:
+        return
+    if orm_execute_state.execution_options.get("user_directory_unaffected", False):
+        return
+    _queue_change(orm_execute_state.session, _ALL_USERS, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session: Session) -> None:
+    changed = session.info.pop(_CHANGED_KEY, None)
+    if not changed:
+        return
+    if _ALL_USERS in changed:
+        user_directory.invalidate()
+        return
+    user_directory.update(
+        [user for user in changed.values() if user is not None],
+        [user_id for user_id, user in changed.items() if user is None],
+    )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
@@ -1,16 +1,352 @@
 """WebSocket connection manager for real-time features."""
-from datetime import datetime
-from typing import Any
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Iterable, Sequence
 
-from fastapi import WebSocket
+from fastapi import WebSocket, status
+
+from app.core.backplane import Backplane, Envelope, InProcessBackplane
+from app.core.config import settings
+from app.core.ws_protocol import WireFormat, encode_frame
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy(str, Enum):
+    """What to do when a connection's outbound queue is full."""
+
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+    DISCONNECT = "disconnect"
+
+
+def coalesce_key(message: dict[str, Any]) -> tuple[Any, ...] | None:
+    """
+    Get the key under which a newer message supersedes an older queued one.
+
+    Args:
+        message: Outbound message
+
+    Returns:
+        Key tuple, or None if the message must never be merged
+    """
+    message_type = message.get("type")
+    if message_type == "presence_update":
+        return (message_type,)
+    if message_type in ("task_created", "task_updated", "task_deleted"):
+        task_id = message.get("task_id")
+        if task_id is None:
+            task_id = message.get("task", {}).get("id")
+        return (message_type, task_id)
+    return None
+
+
+class EncodedMessage:
+    """A message serialized once and shared by every recipient."""
+
+    __slots__ = ("payload", "type", "key", "_text", "_frames")
+
+    def __init__(self, payload: dict[str, Any]) -> None:
+        """
+        Wrap a message; it is serialized on first use.
+
+        Args:
+            payload: JSON-serializable message
+        """
+        self.payload = payload
+        self.type: str | None = payload.get("type")
+        self.key = coalesce_key(payload)
+        self._text: str | None = None
+        self._frames: dict[WireFormat, str | bytes] = {}
+
+    @property
+    def text(self) -> str:
+        """JSON text frame, encoded once and cached."""
+        if self._text is None:
+            self._text = json.dumps(self.payload, separators=(",", ":"), ensure_ascii=False)
+        return self._text
+
+    def frame(self, wire_format: WireFormat) -> str | bytes:
+        """
+        Get the frame for a wire format, encoding it once per format.
+
+        Args:
+            wire_format: Negotiated format of the receiving socket
+
+        Returns:
+            Text or binary frame
+        """
+        if wire_format is WireFormat.JSON:
+            return self.text
+        frame = self._frames.get(wire_format)
+        if frame is None:
+            frame = encode_frame(wire_format, self.payload, self.text)
+            self._frames[wire_format] = frame
+        return frame
+
+    def with_seq(self, seq: int) -> "EncodedMessage":
+        """
+        Copy the message with a stream sequence number.
+
+        Args:
+            seq: Sequence number to stamp
+
+        Returns:
+            New message carrying ``seq``
+        """
+        return EncodedMessage({**self.payload, "seq": seq})
+
+
+def encode_message(message: "dict[str, Any] | EncodedMessage") -> EncodedMessage:
+    """
+    Encode a message unless it is already encoded.
+
+    Args:
+        message: Plain or pre-encoded message
+
+    Returns:
+        Pre-encoded message
+    """
+    if isinstance(message, EncodedMessage):
+        return message
+    return EncodedMessage(message)
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    """Return the event loop running in this thread, if any."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class ClientConnection:
+    """A single WebSocket with its own bounded outbound queue and writer task."""
+
+    def __init__(
+        self,
+        user_id: int,
+        websocket: WebSocket,
+        max_queue_size: int = 256,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        wire_format: WireFormat = WireFormat.JSON,
+    ) -> None:
+        """
+        Initialize a client connection.
+
+        Args:
+            user_id: User ID owning the socket
+            websocket: WebSocket connection
+            max_queue_size: Maximum number of undelivered messages
+            overflow_policy: Policy applied when the queue is full
+            wire_format: Frame encoding negotiated with the client
+        """
+        self.user_id = user_id
+        self.websocket = websocket
+        self.wire_format = wire_format
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = OverflowPolicy(overflow_policy)
+        self.connected_at = datetime.now(timezone.utc)
+        # Monotonic time of the last frame received from the client
+        self.last_seen = time.monotonic()
+        self.closed = False
+        self.evicted = False
+
+        # Lag counters
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_lag = 0
+
+        self._queue: deque[EncodedMessage] = deque()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._writer: asyncio.Task[None] | None = None
+
+    @property
+    def lag(self) -> int:
+        """Number of messages waiting to be written to the socket."""
+        return len(self._queue)
+
+    def start(self) -> None:
+        """Start the writer task on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._writer = self._loop.create_task(self._write_loop())
+        if self._queue:
+            self._wakeup.set()
+
+    def stop(self) -> None:
+        """Stop the writer task and discard undelivered messages."""
+        self.closed = True
+        self._queue.clear()
+        self._call_soon(self._cancel_writer)
+
+    def touch(self) -> None:
+        """Record that the client is alive."""
+        self.last_seen = time.monotonic()
+
+    def close(self, code: int) -> None:
+        """
+        Drop undelivered messages and close the socket.
+
+        Args:
+            code: WebSocket close code
+        """
+        self._call_soon(self._close, code)
+
+    def enqueue(self, message: EncodedMessage) -> None:
+        """
+        Queue a message for delivery without waiting on the socket.
+
+        Args:
+            message: Pre-encoded message to send
+        """
+        self._call_soon(self._enqueue, message)
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get lag counters for this connection.
+
+        Returns:
+            Dictionary with queue and delivery counters
+        """
+        return {
+            "user_id": self.user_id,
+            "connected_at": self.connected_at.isoformat(),
+            "lag": self.lag,
+            "max_lag": self.max_lag,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "idle_seconds": round(time.monotonic() - self.last_seen, 3),
+            "closed": self.closed,
+        }
+
+    def _call_soon(self, callback: Callable[..., None], *args: Any) -> None:
+        """Run a callback on the writer's event loop, hopping threads if needed."""
+        loop = self._loop
+        if loop is None or _running_loop() is loop:
+            callback(*args)
+            return
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # Loop already closed; the socket is gone with it
+            self.closed = True
+
+    def _cancel_writer(self) -> None:
+        if self._writer is not None:
+            self._writer.cancel()
+
+    def _close(self, code: int) -> None:
+        # The writer may be stuck sending to a dead peer, so cancel it rather
+        # than queueing the close behind it
+        self.closed = True
+        self._queue.clear()
+        self._cancel_writer()
+        if self._loop is not None:
+            self._loop.create_task(self._send_close(code))
+
+    async def _send_close(self, code: int) -> None:
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            logger.debug("Closing WebSocket for user %s failed", self.user_id, exc_info=True)
+
+    def _enqueue(self, message: EncodedMessage) -> None:
+        if self.closed:
+            return
+
+        if len(self._queue) >= self.max_queue_size:
+            if self.overflow_policy is OverflowPolicy.DISCONNECT:
+                logger.warning(
+                    "Disconnecting slow WebSocket client for user %s (lag %d)",
+                    self.user_id,
+                    len(self._queue),
+                )
+                self.dropped += len(self._queue) + 1
+                self.evicted = True
+                # The writer is likely blocked sending to this very client,
+                # so waking it would leave the socket open
+                self._close(status.WS_1013_TRY_AGAIN_LATER)
+                return
+            if self.overflow_policy is OverflowPolicy.COALESCE and self._replace(message):
+                self.coalesced += 1
+                return
+            self._queue.popleft()
+            self.dropped += 1
+
+        self._queue.append(message)
+        self.max_lag = max(self.max_lag, len(self._queue))
+        self._wake()
+
+    def _replace(self, message: EncodedMessage) -> bool:
+        """Replace a queued message with the same coalesce key in place."""
+        if message.key is None:
+            return False
+        for index, queued in enumerate(self._queue):
+            if queued.key == message.key:
+                self._queue[index] = message
+                return True
+        return False
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _write_loop(self) -> None:
+        """Drain the outbound queue into the socket."""
+        assert self._wakeup is not None
+        wakeup = self._wakeup
+        try:
+            while not self.closed:
+                if not self._queue:
+                    wakeup.clear()
+                    await wakeup.wait()
+                    continue
+                frame = self._queue.popleft().frame(self.wire_format)
+                if isinstance(frame, str):
+                    await self.websocket.send_text(frame)
+                else:
+                    await self.websocket.send_bytes(frame)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("WebSocket send failed for user %s", self.user_id, exc_info=True)
+            self.closed = True
+            self._queue.clear()
 
 
 class ConnectionManager:
-    """Singleton connection manager for WebSocket connections."""
+    """
+    Singleton connection manager for WebSocket connections.
+
+    Sockets are held per process. Events and presence changes are published
+    on a backplane so that every worker delivers them to its own sockets.
+    """
 
     _instance: "ConnectionManager | None" = None
     _initialized: bool = False
 
+    # Number of tasks whose last known audience is remembered
+    max_tracked_tasks: int = 10_000
+
+    # User IDs per presence envelope when replaying a full snapshot
+    presence_chunk_size: int = 500
+
+    # Shared by every heartbeat; clients answer with {"type": "pong"}
+    ping_message = EncodedMessage({"type": "ping"})
+
     def __new__(cls) -> "ConnectionManager":
         """Ensure singleton pattern."""
         if cls._instance is None:
@@ -20,38 +356,227 @@ class ConnectionManager:
     def __init__(self) -> None:
         """Initialize connection manager."""
         if not self._initialized:
-            self.active_connections: dict[int, list[WebSocket]] = {}
+            self.active_connections: dict[int, list[ClientConnection]] = {}
             self.connection_times: dict[int, datetime] = {}
+            # Subscription index: task ID -> users who could see its last event
+            self.task_subscribers: OrderedDict[int, frozenset[int]] = OrderedDict()
+            self.max_queue_size = settings.WS_SEND_QUEUE_SIZE
+            self.overflow_policy = OverflowPolicy(settings.WS_OVERFLOW_POLICY)
+
+            # Debounced presence: users announced as of presence_version
+            self.presence_debounce = settings.WS_PRESENCE_DEBOUNCE_SECONDS
+            self.presence_version = 0
+            self._presence_published: set[int] = set()
+            self._presence_dirty: set[int] = set()
+            self._presence_flush: (
+                tuple[asyncio.AbstractEventLoop, asyncio.TimerHandle] | None
+            ) = None
+
+            # Resumable event stream: events stamped with seq, recent ones kept
+            self.event_seq = 0
+            self.replay_buffer: deque[
+                tuple[int, frozenset[int] | None, EncodedMessage]
+            ] = deque(maxlen=settings.WS_REPLAY_BUFFER_SIZE)
+
+            # Cross-worker state
+            self.node_id = uuid.uuid4().hex
+            self.backplane: Backplane = InProcessBackplane()
+            self.backplane.subscribe(self._on_backplane_message)
+            self.remote_presence: dict[str, set[int]] = {}
+            # Workers publish "alive" every ping interval; the users of one
+            # not heard from within peer_ttl are dropped, so a crashed worker
+            # does not keep them online forever
+            self.peer_ttl = settings.WS_PEER_TTL_SECONDS
+            self._peer_seen: dict[str, float] = {}
+            self._presence_changes: dict[int, bool] = {}
+            self._background_tasks: set[asyncio.Task[None]] = set()
+
+            # Heartbeat: min-heap of (deadline, tiebreak, connection). Entries
+            # are refreshed lazily when they come due rather than on every
+            # message, so each live connection costs one pop and push
+            # (O(log n)) per idle timeout: O(n log n) per period overall.
+            self.ping_interval = settings.WS_PING_INTERVAL_SECONDS
+            self.idle_timeout = settings.WS_IDLE_TIMEOUT_SECONDS
+            self._expiry_heap: list[tuple[float, int, ClientConnection]] = []
+            self._expiry_counter = itertools.count()
+            self._heartbeat_task: asyncio.Task[None] | None = None
             ConnectionManager._initialized = True
 
-    def connect(self, user_id: int, websocket: WebSocket) -> None:
+    async def start_backplane(self, backplane: Backplane) -> None:
+        """
+        Switch to a started backplane and request presence from other workers.
+
+        Args:
+            backplane: Backplane to use
+        """
+        self.backplane.unsubscribe(self._on_backplane_message)
+        self.backplane = backplane
+        backplane.subscribe(self._on_backplane_message)
+        await backplane.start()
+        await self._publish({"kind": "presence_sync"})
+
+    async def stop_backplane(self) -> None:
+        """Withdraw this worker's presence and stop the backplane."""
+        await self._publish({"kind": "presence", "reset": True, "joined": [], "left": []})
+        await self.backplane.stop()
+        self.backplane.unsubscribe(self._on_backplane_message)
+        self.backplane = InProcessBackplane()
+        self.backplane.subscribe(self._on_backplane_message)
+        self.remote_presence.clear()
+        self._peer_seen.clear()
+
+    async def start_heartbeat(self) -> None:
+        """Start pinging local sockets and reaping the ones that stop answering."""
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.get_running_loop().create_task(
+                self._run_heartbeat()
+            )
+
+    async def stop_heartbeat(self) -> None:
+        """Stop the heartbeat task."""
+        task, self._heartbeat_task = self._heartbeat_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def connect(
+        self,
+        user_id: int,
+        websocket: WebSocket,
+        wire_format: WireFormat = WireFormat.JSON,
+    ) -> ClientConnection:
         """
         Connect a user's WebSocket.
 
         Args:
             user_id: User ID to connect
             websocket: WebSocket connection
+            wire_format: Frame encoding negotiated with the client
+
+        Returns:
+            The registered connection; call ``start()`` on it to begin delivery
         """
         if user_id not in self.active_connections:
             self.active_connections[user_id] = []
-            self.connection_times[user_id] = datetime.utcnow()
+            self.connection_times[user_id] = datetime.now(timezone.utc)
+            self._presence_changes[user_id] = True
+            self._presence_dirty.add(user_id)
 
-        self.active_connections[user_id].append(websocket)
+        connection = ClientConnection(
+            user_id,
+            websocket,
+            max_queue_size=self.max_queue_size,
+            overflow_policy=self.overflow_policy,
+            wire_format=wire_format,
+        )
+        self.active_connections[user_id].append(connection)
+        heapq.heappush(
+            self._expiry_heap,
+            (connection.last_seen + self.idle_timeout, next(self._expiry_counter), connection),
+        )
+        return connection
 
-    def disconnect(self, user_id: int) -> None:
+    def disconnect(self, user_id: int, websocket: WebSocket | None = None) -> None:
         """
-        Disconnect a user.
+        Disconnect one of a user's sockets, or all of them.
+
+        The user only goes offline once their last socket is gone.
 
         Args:
             user_id: User ID to disconnect
+            websocket: Socket that closed; None disconnects every socket
         """
-        if user_id in self.active_connections:
+        connections = self.active_connections.get(user_id)
+        if connections is None:
+            return
+
+        if websocket is None:
+            removed, connections[:] = list(connections), []
+        else:
+            removed = [c for c in connections if c.websocket is websocket]
+            connections[:] = [c for c in connections if c.websocket is not websocket]
+        for connection in removed:
+            connection.stop()
+
+        if not connections:
             del self.active_connections[user_id]
             del self.connection_times[user_id]
+            self._presence_changes[user_id] = False
+            self._presence_dirty.add(user_id)
+
+    def reap_idle(self, now: float | None = None) -> int:
+        """
+        Close sockets that have not sent anything within the idle timeout.
+
+        Only heap entries whose deadline has passed are examined, at
+        O(log n) each. A connection that was active since its entry was
+        pushed is found there too and pushed back with its new deadline, so
+        every live connection is examined once per idle timeout.
+
+        Args:
+            now: Current ``time.monotonic()`` value (for testing)
+
+        Returns:
+            Number of sockets closed
+        """
+        if now is None:
+            now = time.monotonic()
+        heap = self._expiry_heap
+        reaped = 0
+        while heap and heap[0][0] <= now:
+            _, _, connection = heapq.heappop(heap)
+            registered = connection in self.active_connections.get(connection.user_id, ())
+            if not registered:
+                continue
+            deadline = connection.last_seen + self.idle_timeout
+            if deadline > now and not connection.closed:
+                heapq.heappush(heap, (deadline, next(self._expiry_counter), connection))
+                continue
+
+            if not connection.closed:
+                logger.info("Closing idle WebSocket for user %s", connection.user_id)
+            connection.close(status.WS_1001_GOING_AWAY)
+            self.disconnect(connection.user_id, connection.websocket)
+            reaped += 1
+
+        if reaped:
+            self._schedule_presence_flush()
+        return reaped
+
+    def send_heartbeat(self) -> None:
+        """Queue a ping on every local socket."""
+        self._deliver(self.ping_message, None)
+
+    def expire_peers(self, now: float | None = None) -> int:
+        """
+        Drop the users of workers that have not been heard from within peer_ttl.
+
+        Args:
+            now: Current ``time.monotonic()`` value (for testing)
+
+        Returns:
+            Number of workers dropped
+        """
+        now = time.monotonic() if now is None else now
+        expired = [
+            origin for origin, seen in self._peer_seen.items() if now - seen > self.peer_ttl
+        ]
+        for origin in expired:
+            del self._peer_seen[origin]
+            users = self.remote_presence.pop(origin, None)
+            if users:
+                logger.warning("Worker %s went silent; dropping its %d users", origin, len(users))
+                self._presence_dirty.update(users)
+        if self._presence_dirty:
+            self._schedule_presence_flush()
+        return len(expired)
 
     def is_connected(self, user_id: int) -> bool:
         """
-        Check if a user is connected.
+        Check if a user is connected to any worker.
 
         Args:
             user_id: User ID to check
@@ -59,16 +584,23 @@ class ConnectionManager:
         Returns:
             True if user is connected, False otherwise
         """
-        return user_id in self.active_connections
+        if user_id in self.active_connections:
+            return True
+        return any(user_id in users for users in self.remote_presence.values())
 
     def get_active_users(self) -> list[int]:
         """
-        Get list of active user IDs.
+        Get list of active user IDs across all workers.
 
         Returns:
             List of user IDs currently connected
         """
-        return list(self.active_connections.keys())
+        if not self.remote_presence:
+            return list(self.active_connections.keys())
+        users = set(self.active_connections)
+        for remote_users in self.remote_presence.values():
+            users |= remote_users
+        return list(users)
 
     def get_presence_info(self, user_id: int) -> dict[str, Any]:
         """
@@ -86,44 +618,433 @@ class ConnectionManager:
             "is_online": is_online,
         }
 
-        if is_online:
+        # Connection time is only known to the worker holding the socket
+        if user_id in self.connection_times:
             presence["connected_at"] = self.connection_times[user_id].isoformat()
 
         return presence
 
+    def get_connection_stats(self) -> list[dict[str, Any]]:
+        """
+        Get lag counters for every open connection.
+
+        Returns:
+            List of per-connection statistics
+        """
+        return [
+            connection.get_stats()
+            for connections in list(self.active_connections.values())
+            for connection in connections
+        ]
+
     def clear_all(self) -> None:
         """Clear all connections (for testing)."""
+        for connections in self.active_connections.values():
+            for connection in connections:
+                connection.stop()
         self.active_connections.clear()
         self.connection_times.clear()
+        self.task_subscribers.clear()
+        self.remote_presence.clear()
+        self._peer_seen.clear()
+        self._presence_changes.clear()
+        self.event_seq = 0
+        self.replay_buffer.clear()
+        self.presence_version = 0
+        self._presence_published.clear()
+        self._presence_dirty.clear()
+        self._presence_flush = None
+        self._expiry_heap.clear()
 
-    async def send_personal_message(self, message: dict[str, Any], user_id: int) -> None:
+    async def send_personal_message(
+        self, message: dict[str, Any] | EncodedMessage, user_id: int
+    ) -> None:
         """
-        Send a message to a specific user's connections.
+        Queue a message for a specific user's connections on every worker.
 
         Args:
             message: Message to send
             user_id: User ID to send to
         """
-        if user_id in self.active_connections:
-            for websocket in self.active_connections[user_id]:
-                await websocket.send_json(message)
+        await self.send_to_users(message, [user_id])
 
-    async def broadcast(self, message: dict[str, Any]) -> None:
+    async def send_to_users(
+        self, message: dict[str, Any] | EncodedMessage, user_ids: Iterable[int]
+    ) -> None:
         """
-        Broadcast a message to all connected users.
+        Queue a message for the connections of the given users only.
+
+        Args:
+            message: Message to send
+            user_ids: Recipient user IDs; offline users are skipped
+        """
+        encoded = encode_message(message)
+        await self._emit({"kind": "users", "users": list(set(user_ids))}, encoded)
+
+    async def publish_task_event(
+        self,
+        message: dict[str, Any] | EncodedMessage,
+        task_id: int,
+        visible_to: Iterable[int | None],
+        removed: bool = False,
+    ) -> None:
+        """
+        Send a task event to the users who can see the task.
+
+        Users who could see the task at its previous event (for example a
+        former assignee) are included so they can drop it from their board.
+
+        Args:
+            message: Task event to send
+            task_id: ID of the task the event is about
+            visible_to: Users who can see the task now (owner, assignee)
+            removed: Whether the task no longer exists
+        """
+        encoded = encode_message(message)
+        envelope = {
+            "kind": "task",
+            "task_id": task_id,
+            "visible_to": [user_id for user_id in visible_to if user_id is not None],
+            "removed": removed,
+        }
+        await self._emit(envelope, encoded)
+
+    async def publish_task_batch(
+        self,
+        message: dict[str, Any] | EncodedMessage,
+        tasks: Iterable[tuple[int, Iterable[int | None], bool]],
+    ) -> None:
+        """
+        Send one event covering many tasks to the users who can see them.
+
+        The message must list tasks under ``created`` and ``updated`` (task
+        dicts with an ``id``) and ``deleted`` (task IDs). Each user gets one
+        frame with the tasks they can see; users who see the same tasks share
+        an encoded frame.
+
+        Args:
+            message: Batch event to send
+            tasks: (task ID, users who can see it now, whether it was removed)
+        """
+        encoded = encode_message(message)
+        envelope = {
+            "kind": "task_batch",
+            "tasks": [
+                {
+                    "task_id": task_id,
+                    "visible_to": [user_id for user_id in visible_to if user_id is not None],
+                    "removed": removed,
+                }
+                for task_id, visible_to, removed in tasks
+            ],
+        }
+        await self._emit(envelope, encoded)
+
+    async def broadcast(self, message: dict[str, Any] | EncodedMessage) -> None:
+        """
+        Queue a message for all connected users on every worker.
+
+        The message is serialized once and the same frame is shared by every
+        connection. Delivery happens on each connection's writer task, so a
+        stalled client never delays the caller or other clients.
 
         Args:
             message: Message to broadcast
         """
-        for connections in self.active_connections.values():
-            for websocket in connections:
-                await websocket.send_json(message)
+        await self._emit({"kind": "broadcast"}, encode_message(message))
 
-    async def broadcast_presence_update(self) -> None:
-        """Broadcast current presence information to all connected users."""
-        active_users = self.get_active_users()
-        message = {
+    @property
+    def stream_id(self) -> str:
+        """
+        Identifier of this worker's event stream; seq values are only valid within it.
+
+        Each worker numbers events in the order it delivers them. That order
+        differs between workers, because a worker delivers its own events
+        before they cross the backplane. So a client that reconnects to a
+        different worker cannot resume and is sent ``resync_required``.
+        Replay only saves the refetch when the client returns to the same
+        worker, e.g. with one worker or sticky load balancing.
+        """
+        return self.node_id
+
+    def session_info(self) -> EncodedMessage:
+        """
+        Build the message telling a client where the event stream stands.
+
+        Returns:
+            ``session`` message with the stream ID and latest seq
+        """
+        return EncodedMessage({
+            "type": "session",
+            "stream": self.stream_id,
+            "seq": self.event_seq,
+        })
+
+    def resume(self, connection: ClientConnection, last_seq: int, stream: str | None) -> bool:
+        """
+        Queue the events a reconnecting client missed.
+
+        Only a ``stream`` issued by this worker can be resumed; see
+        :attr:`stream_id`.
+
+        Args:
+            connection: The client's new connection
+            last_seq: Last sequence number the client processed
+            stream: Stream ID the sequence number belongs to
+
+        Returns:
+            True if the gap was replayed, False if the client was told to resync
+        """
+        oldest = self.replay_buffer[0][0] if self.replay_buffer else self.event_seq + 1
+        if stream != self.stream_id or last_seq > self.event_seq or last_seq < oldest - 1:
+            connection.enqueue(EncodedMessage({
+                "type": "resync_required",
+                "stream": self.stream_id,
+                "seq": self.event_seq,
+            }))
+            return False
+
+        user_id = connection.user_id
+        for seq, audience, message in self.replay_buffer:
+            if seq > last_seq and (audience is None or user_id in audience):
+                connection.enqueue(message)
+        return True
+
+    def presence_snapshot(self) -> EncodedMessage:
+        """
+        Build a full presence message for the current presence version.
+
+        Returns:
+            ``presence_update`` message with every announced user
+        """
+        return EncodedMessage({
             "type": "presence_update",
-            "users": active_users,
-        }
-        await self.broadcast(message)
+            "version": self.presence_version,
+            "users": sorted(self._presence_published),
+        })
+
+    async def broadcast_presence_update(self) -> None:
+        """
+        Schedule a presence delta for all connected users.
+
+        Changes are coalesced over ``WS_PRESENCE_DEBOUNCE_SECONDS`` and sent as
+        one ``presence_delta`` listing who joined and left, stamped with the
+        new presence version. Clients that miss a version ask for a snapshot.
+        """
+        self._schedule_presence_flush()
+
+    def _schedule_presence_flush(self) -> None:
+        if self.presence_debounce <= 0:
+            self._flush_presence()
+            return
+
+        pending = self._presence_flush
+        if pending is not None and pending[0].is_running():
+            return
+        loop = asyncio.get_running_loop()
+        handle = loop.call_later(self.presence_debounce, self._flush_presence)
+        self._presence_flush = (loop, handle)
+
+    def _flush_presence(self) -> None:
+        """Send the net presence change since the last version, if any."""
+        self._presence_flush = None
+
+        changes, self._presence_changes = self._presence_changes, {}
+        if changes:
+            self._spawn(self._publish({
+                "kind": "presence",
+                "joined": [user_id for user_id, joined in changes.items() if joined],
+                "left": [user_id for user_id, joined in changes.items() if not joined],
+            }))
+
+        dirty, self._presence_dirty = self._presence_dirty, set()
+        published = self._presence_published
+        joined = sorted(
+            user_id for user_id in dirty
+            if user_id not in published and self.is_connected(user_id)
+        )
+        left = sorted(
+            user_id for user_id in dirty
+            if user_id in published and not self.is_connected(user_id)
+        )
+        if not joined and not left:
+            return
+
+        published.update(joined)
+        published.difference_update(left)
+        self.presence_version += 1
+        message = EncodedMessage({
+            "type": "presence_delta",
+            "version": self.presence_version,
+            "joined": joined,
+            "left": left,
+        })
+        self._deliver(message, None)
+
+    async def _emit(self, envelope: Envelope, encoded: EncodedMessage) -> None:
+        """Deliver an event locally, then publish it for other workers."""
+        self._dispatch(envelope, encoded)
+        envelope["message"] = encoded.payload
+        await self._publish(envelope)
+
+    async def _publish(self, envelope: Envelope) -> None:
+        envelope["origin"] = self.node_id
+        try:
+            await self.backplane.publish(envelope)
+        except Exception:
+            logger.exception("Failed to publish %r envelope", envelope.get("kind"))
+
+    def _on_backplane_message(self, envelope: Envelope) -> None:
+        """Handle an envelope published by another worker."""
+        origin = envelope.get("origin")
+        if origin == self.node_id:
+            return
+        kind = envelope.get("kind")
+        if origin is not None:
+            known = origin in self._peer_seen
+            self._peer_seen[origin] = time.monotonic()
+            if not known and kind == "alive":
+                # Back after being expired: ask it to resend its users
+                self._spawn(self._publish({"kind": "presence_sync", "to": origin}))
+
+        if kind == "alive":
+            return
+        if kind == "presence":
+            self._apply_remote_presence(origin, envelope)
+        elif kind == "presence_sync":
+            if envelope.get("to") in (None, self.node_id):
+                self._spawn(self._publish_presence_snapshot())
+        elif kind in ("broadcast", "users", "task", "task_batch"):
+            self._dispatch(envelope, EncodedMessage(envelope["message"]))
+        else:
+            logger.warning("Ignoring unknown backplane envelope %r", kind)
+
+    def _dispatch(self, envelope: Envelope, encoded: EncodedMessage) -> None:
+        """Stamp an event envelope with the next seq and deliver it to local sockets."""
+        kind = envelope["kind"]
+        deliveries: Sequence[tuple[frozenset[int] | None, EncodedMessage]]
+        if kind == "broadcast":
+            deliveries = [(None, encoded)]
+        elif kind == "users":
+            deliveries = [(frozenset(envelope["users"]), encoded)]
+        elif kind == "task":
+            audience = self._route_task_event(
+                envelope["task_id"], envelope["visible_to"], envelope["removed"]
+            )
+            deliveries = [(audience, encoded)]
+        elif kind == "task_batch":
+            deliveries = self._route_task_batch(envelope["tasks"], encoded)
+        else:
+            return
+
+        for recipients, message in deliveries:
+            self.event_seq += 1
+            stamped = message.with_seq(self.event_seq)
+            self.replay_buffer.append((self.event_seq, recipients, stamped))
+            self._deliver(stamped, recipients)
+
+    def _route_task_event(
+        self, task_id: int, visible_to: Iterable[int], removed: bool
+    ) -> frozenset[int]:
+        """Update the subscription index and return the users to notify."""
+        audience = frozenset(visible_to)
+        previous = self.task_subscribers.pop(task_id, frozenset())
+        if not removed:
+            self.task_subscribers[task_id] = audience
+            while len(self.task_subscribers) > self.max_tracked_tasks:
+                self.task_subscribers.popitem(last=False)
+        return audience | previous
+
+    def _route_task_batch(
+        self, tasks: list[dict[str, Any]], encoded: EncodedMessage
+    ) -> list[tuple[frozenset[int], EncodedMessage]]:
+        """Group users by the batch tasks they can see; one message per group."""
+        visible: dict[int, set[int]] = {}
+        for task in tasks:
+            audience = self._route_task_event(
+                task["task_id"], task["visible_to"], task["removed"]
+            )
+            for user_id in audience:
+                visible.setdefault(user_id, set()).add(task["task_id"])
+
+        groups: dict[frozenset[int], set[int]] = {}
+        for user_id, task_ids in visible.items():
+            groups.setdefault(frozenset(task_ids), set()).add(user_id)
+
+        all_task_ids = {task["task_id"] for task in tasks}
+        payload = encoded.payload
+        deliveries = []
+        for shared_ids, user_ids in groups.items():
+            message = encoded
+            if shared_ids != all_task_ids:
+                message = EncodedMessage({
+                    **payload,
+                    "created": [task for task in payload["created"] if task["id"] in shared_ids],
+                    "updated": [task for task in payload["updated"] if task["id"] in shared_ids],
+                    "deleted": [
+                        task_id for task_id in payload["deleted"] if task_id in shared_ids
+                    ],
+                })
+            deliveries.append((frozenset(user_ids), message))
+        return deliveries
+
+    def _deliver(self, encoded: EncodedMessage, user_ids: Iterable[int] | None) -> None:
+        """Queue a frame on local connections (all of them when user_ids is None)."""
+        if user_ids is None:
+            targets = list(self.active_connections.values())
+        else:
+            targets = [
+                self.active_connections[user_id]
+                for user_id in user_ids
+                if user_id in self.active_connections
+            ]
+        for connections in targets:
+            for connection in list(connections):
+                connection.enqueue(encoded)
+
+    def _apply_remote_presence(self, origin: str | None, envelope: Envelope) -> None:
+        if origin is None:
+            return
+        users = self.remote_presence.setdefault(origin, set())
+        if envelope.get("reset"):
+            self._presence_dirty.update(users)
+            users.clear()
+        joined = envelope.get("joined", ())
+        left = envelope.get("left", ())
+        users.update(joined)
+        users.difference_update(left)
+        if not users:
+            del self.remote_presence[origin]
+
+        self._presence_dirty.update(joined)
+        self._presence_dirty.update(left)
+        self._schedule_presence_flush()
+
+    async def _publish_presence_snapshot(self) -> None:
+        """Publish this worker's users in chunks, replacing what peers know."""
+        users = list(self.active_connections)
+        size = self.presence_chunk_size
+        chunks = [users[start:start + size] for start in range(0, len(users), size)] or [[]]
+        for index, chunk in enumerate(chunks):
+            await self._publish({
+                "kind": "presence",
+                "reset": index == 0,
+                "joined": chunk,
+                "left": [],
+            })
+
+    async def _run_heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            try:
+                self.send_heartbeat()
+                self.reap_idle()
+                self.expire_peers()
+            except Exception:
+                logger.exception("WebSocket heartbeat failed")
+            await self._publish({"kind": "alive"})
+
+    def _spawn(self, coroutine: Any) -> None:
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
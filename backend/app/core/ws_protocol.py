@@ -0,0 +1,96 @@
+"""WebSocket wire formats negotiated through subprotocols."""
+import json
+import zlib
+from enum import Enum
+from typing import Any
+
+import msgpack
+
+
+class WireFormat(str, Enum):
+    """
+    Frame encodings a client can request with ``Sec-WebSocket-Protocol``.
+
+    Clients that offer no known subprotocol get plain JSON text frames. The
+    ``+deflate`` variants are raw-deflate compressed binary frames, compressed
+    once per event rather than once per socket as permessage-deflate would.
+    """
+
+    JSON = "pmtool.json"
+    JSON_DEFLATE = "pmtool.json+deflate"
+    MSGPACK = "pmtool.msgpack"
+    MSGPACK_DEFLATE = "pmtool.msgpack+deflate"
+
+
+def negotiate_wire_format(offered: list[str]) -> WireFormat | None:
+    """
+    Pick the first supported subprotocol in the client's order of preference.
+
+    Args:
+        offered: Subprotocols offered by the client
+
+    Returns:
+        Chosen wire format, or None if the client offered none we support
+    """
+    for subprotocol in offered:
+        try:
+            return WireFormat(subprotocol)
+        except ValueError:
+            continue
+    return None
+
+
+def encode_frame(wire_format: WireFormat, payload: dict[str, Any], text: str) -> str | bytes:
+    """
+    Encode a message for a wire format.
+
+    Args:
+        wire_format: Target format
+        payload: Message payload
+        text: The payload's JSON encoding, reused by the JSON formats
+
+    Returns:
+        Text frame for JSON, binary frame otherwise
+    """
+    if wire_format is WireFormat.JSON:
+        return text
+    if wire_format is WireFormat.JSON_DEFLATE:
+        return _deflate(text.encode("utf-8"))
+
+    packed: bytes = msgpack.packb(payload)
+    if wire_format is WireFormat.MSGPACK_DEFLATE:
+        return _deflate(packed)
+    return packed
+
+
+def decode_frame(wire_format: WireFormat, data: str | bytes) -> Any:
+    """
+    Decode a frame received from a client.
+
+    Text frames are always JSON, whatever format was negotiated.
+
+    Args:
+        wire_format: Negotiated format
+        data: Raw frame
+
+    Returns:
+        Decoded message
+
+    Raises:
+        ValueError: If the frame cannot be decoded
+    """
+    if isinstance(data, str):
+        return json.loads(data)
+    try:
+        if wire_format in (WireFormat.JSON_DEFLATE, WireFormat.MSGPACK_DEFLATE):
+            data = zlib.decompress(data, -zlib.MAX_WBITS)
+        if wire_format in (WireFormat.MSGPACK, WireFormat.MSGPACK_DEFLATE):
+            return msgpack.unpackb(data)
+    except (zlib.error, ValueError, msgpack.UnpackException) as exc:
+        raise ValueError("Malformed frame") from exc
+    return json.loads(data)
+
+
+def _deflate(data: bytes) -> bytes:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
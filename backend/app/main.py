@@ -1,28 +1,105 @@
 """Main FastAPI application entry point."""
-from fastapi import FastAPI
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from app.api import auth, tasks, websocket
+from app.api import auth, internal, tasks, websocket
+from app.core.backplane import create_backplane
 from app.core.config import settings
+from app.core.db_metrics import DBMetricsMiddleware, MetricsRoute
+from app.core.hashing import HashingUnavailableError, password_hasher
+from app.core.rate_limit import AuthRateLimitMiddleware, RateLimitedError
+from app.core.read_routing import ReadYourWritesMiddleware
+from app.core.websocket_manager import ConnectionManager
+from app.models.base import AsyncSessionLocal
+from app.services import guest_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Start and stop background services."""
+    manager = ConnectionManager()
+    await manager.start_backplane(create_backplane())
+    await manager.start_heartbeat()
+    await guest_service.refill_guest_pool(AsyncSessionLocal)
+    reaper = None
+    if settings.GUEST_TTL_HOURS > 0:
+        reaper = asyncio.create_task(guest_service.run_guest_reaper(AsyncSessionLocal))
+    yield
+    if reaper is not None:
+        reaper.cancel()
+        with suppress(asyncio.CancelledError):
+            await reaper
+    await manager.stop_heartbeat()
+    await manager.stop_backplane()
+    password_hasher.shutdown()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     description="Real-time project management tool API",
+    lifespan=lifespan,
+)
+# Routes declared on the app itself report their template to the query stats
+app.router.route_class = MetricsRoute
+
+# Per-request query counts and DB time
+app.add_middleware(DBMetricsMiddleware)
+
+# Keep a client's reads on the primary database right after it writes
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Throttle and shed the bcrypt-heavy endpoints before they reach the app
+app.add_middleware(
+    AuthRateLimitMiddleware,
+    paths=frozenset(
+        f"{settings.API_V1_PREFIX}/auth/{name}" for name in ("login", "register", "guest")
+    ),
 )
 
-# CORS middleware
+# CORS middleware, added last so it is outermost: responses the middleware
+# above return on their own (429, 503) still carry CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+
+@app.exception_handler(HashingUnavailableError)
+async def hashing_unavailable_handler(
+    request: Request, exc: HashingUnavailableError
+) -> JSONResponse:
+    """Shed logins and registrations while password hashing is saturated."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many authentication requests, try again shortly"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(RateLimitedError)
+async def rate_limited_handler(request: Request, exc: RateLimitedError) -> JSONResponse:
+    """Refuse attempts on an account that is over its limit."""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many attempts, try again later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 # Include routers
 app.include_router(auth.router, prefix=settings.API_V1_PREFIX)
 app.include_router(tasks.router, prefix=settings.API_V1_PREFIX)
+app.include_router(internal.router, prefix=settings.API_V1_PREFIX)
 app.include_router(websocket.router)  # WebSocket endpoint (no prefix)
 
 
@@ -1,13 +1,73 @@
 """Base database model and session management."""
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime, timezone
+
+from fastapi import Depends
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
+from app.core.db_metrics import engine_options, instrument_engine
+from app.core.read_routing import ReadRouter
+
+# Async drivers used for each sync database backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(url: str | URL) -> URL:
+    """
+    Convert a database URL to use the backend's async driver.
+
+    Args:
+        url: Sync database URL, e.g. ``postgresql://...``
+
+    Returns:
+        The same URL with an async driver, e.g. ``postgresql+asyncpg://...``
+    """
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or url.get_dialect().is_async:
+        return url
+    return url.set(drivername=driver)
+
 
-engine = create_engine(settings.DATABASE_URL, echo=True)
+def utcnow() -> datetime:
+    """Get the current UTC time, naive as the DateTime columns store it."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+instrument_engine(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_engines = [
+    create_engine(url, **engine_options(url)) for url in settings.DATABASE_REPLICA_URLS
+]
+for index, replica_engine in enumerate(replica_engines):
+    instrument_engine(replica_engine, f"replica{index}")
+read_router = ReadRouter(
+    SessionLocal,
+    [
+        sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+        for replica_engine in replica_engines
+    ],
+)
+
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    **engine_options(settings.DATABASE_URL, is_async=True),
+)
+instrument_engine(async_engine.sync_engine, "async")
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
@@ -18,3 +78,45 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_router() -> ReadRouter:
+    """Get the router that picks the database for read-only requests."""
+    return read_router
+
+
+def get_read_db(router: ReadRouter = Depends(get_read_router)) -> Iterator[Session]:
+    """
+    Get database session dependency for read-only endpoints.
+
+    The session reads from a replica when one is configured, unless the
+    client wrote recently (see ReadYourWritesMiddleware). Never write
+    through it.
+    """
+    db = router.session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Get async database session dependency, for ``async def`` endpoints."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_session_factory() -> sessionmaker:
+    """
+    Get the session factory dependency.
+
+    For long-lived handlers (WebSockets, streaming responses) that should
+    open a session only for as long as they need it, instead of holding
+    the one from get_db for their whole lifetime.
+    """
+    return SessionLocal
+
+
+def get_async_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Get the async session factory dependency (see get_session_factory)."""
+    return AsyncSessionLocal
@@ -0,0 +1,18 @@
+"""Rate limit bucket model."""
+from sqlalchemy import Boolean, Column, Float, String
+
+from app.models.base import Base
+
+
+class RateLimitBucket(Base):
+    """Token bucket shared by every worker (see DatabaseBucketStore)."""
+
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    # Unix times; a bucket is full again, and its row redundant, after full_at
+    updated_at = Column(Float, nullable=False)
+    full_at = Column(Float, nullable=False, index=True)
+    # Whether the last take succeeded, returned by the same statement
+    allowed = Column(Boolean, nullable=False)
@@ -1,12 +1,16 @@
 """Task model."""
 from datetime import datetime
 from enum import Enum
+from typing import TYPE_CHECKING
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
 
+if TYPE_CHECKING:
+    from app.models.user import User
+
 
 class TaskStatus(str, Enum):
     """Task status enum."""
@@ -28,24 +32,55 @@ class Task(Base):
     """Task database model."""
 
     __tablename__ = "tasks"
-
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, nullable=False)
-    description = Column(Text, nullable=True)
-    status = Column(String, default=TaskStatus.TODO, nullable=False)
-    priority = Column(String, default=TaskPriority.MEDIUM, nullable=False)
+    __table_args__ = (
+        # Board columns per owner, in card order, and per assignee
+        Index("ix_tasks_owner_id_status_rank", "owner_id", "status", "rank", "id"),
+        Index("ix_tasks_assigned_to_id_status", "assigned_to_id", "status"),
+        # Owner's tasks in update order (id breaks ties for stable paging)
+        Index("ix_tasks_owner_id_updated_at_id", "owner_id", "updated_at", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    title: Mapped[str] = mapped_column(String, nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    status: Mapped[str] = mapped_column(String, default=TaskStatus.TODO, nullable=False)
+    priority: Mapped[str] = mapped_column(String, default=TaskPriority.MEDIUM, nullable=False)
+
+    # Position within the board column (see app.core.ranking); byte-wise
+    # collation keeps Postgres ordering identical to Python's
+    rank: Mapped[str] = mapped_column(
+        String().with_variant(String(collation="C"), "postgresql"), nullable=False
+    )
 
     # Foreign key to user who created the task
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
 
     # Assigned user (can be same as owner or different)
-    assigned_to_id = Column(Integer, ForeignKey("users.id"), nullable=True)
-
-    # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    due_date = Column(DateTime, nullable=True)
+    assigned_to_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("users.id"), nullable=True
+    )
+
+    # Bumped on every change; clients send it back in If-Match
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default="1"
+    )
+
+    # Timestamps (nullable columns, but always set by their defaults)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=True, default=datetime.utcnow
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+    due_date: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    # ORM flushes check and bump the version (bulk statements bump it explicitly)
+    __mapper_args__ = {"version_id_col": version}
 
     # Relationships
-    owner = relationship("User", foreign_keys=[owner_id], backref="owned_tasks")
-    assigned_to = relationship("User", foreign_keys=[assigned_to_id], backref="assigned_tasks")
+    owner: Mapped["User"] = relationship(
+        "User", foreign_keys=[owner_id], backref="owned_tasks"
+    )
+    assigned_to: Mapped["User | None"] = relationship(
+        "User", foreign_keys=[assigned_to_id], backref="assigned_tasks"
+    )
@@ -1,6 +1,7 @@
 """User model."""
 from datetime import datetime
-from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
 from app.models.base import Base
 
 
@@ -8,13 +9,41 @@ class User(Base):
     """User database model."""
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Unclaimed pooled guests (claimed_at IS NULL) for claims and refills,
+        # and expired guests, oldest first, for the guest reaper
+        Index("ix_users_is_guest_claimed_at", "is_guest", "claimed_at"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True, nullable=False)
-    hashed_password = Column(String, nullable=False)
-    full_name = Column(String, nullable=True)
-    is_active = Column(Boolean, default=True)
-    is_superuser = Column(Boolean, default=False)
-    is_guest = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    email: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
+    hashed_password: Mapped[str] = mapped_column(String, nullable=False)
+    full_name: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Flags and timestamps are nullable columns, but always set by their defaults
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=True, default=True)
+    is_superuser: Mapped[bool] = mapped_column(Boolean, nullable=True, default=False)
+    is_guest: Mapped[bool] = mapped_column(Boolean, nullable=True, default=False)
+    # When a guest was handed out; NULL while it waits in the guest pool
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=True, default=datetime.utcnow
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+# Substring search on email and name (pg_trgm). Other databases have no
+# equivalent; the user directory searches them from memory instead.
+Index(
+    "ix_users_email_trgm",
+    func.lower(User.email).label("lower_email"),
+    postgresql_using="gin",
+    postgresql_ops={"lower_email": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_users_full_name_trgm",
+    func.lower(User.full_name).label("lower_full_name"),
+    postgresql_using="gin",
+    postgresql_ops={"lower_full_name": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
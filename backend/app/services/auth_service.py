@@ -1,10 +1,18 @@
 """Authentication service."""
 from datetime import timedelta
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.security import create_access_token, verify_password
+from app.core.hashing import PasswordHasher
+from app.core.security import (
+    create_access_token,
+    is_usable_password_hash,
+    needs_rehash,
+    verify_password,
+)
+from app.models.user import User
 from app.services import user_service
 
 
@@ -18,6 +26,38 @@ def authenticate_user(db: Session, email: str, password: str):
     return user
 
 
+async def authenticate_user_async(
+    db: AsyncSession, hasher: PasswordHasher, email: str, password: str
+) -> User | None:
+    """
+    Authenticate a user by email and password, hashing off the request threads.
+
+    A password hashed with an outdated bcrypt cost is rehashed with the
+    current one while the plain password is at hand.
+
+    Args:
+        db: Async database session
+        hasher: Password hasher to verify and rehash with
+        email: User's email address
+        password: Plain password
+
+    Returns:
+        The user, or None if the email or password is wrong
+
+    Raises:
+        HashingUnavailableError: If the hashing queue is full
+    """
+    user = await user_service.get_user_by_email_async(db, email)
+    if not user or not is_usable_password_hash(user.hashed_password):
+        return None
+    if not await hasher.verify(password, user.hashed_password):
+        return None
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = await hasher.hash(password)
+        await db.commit()
+    return user
+
+
 def create_user_token(email: str) -> str:
     """Create access token for user."""
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
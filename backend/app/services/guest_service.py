@@ -0,0 +1,240 @@
+"""Guest account service."""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.name_generator import generate_random_name
+from app.core.security import UNUSABLE_PASSWORD_HASH
+from app.core.user_cache import invalidate_after_commit
+from app.core.user_directory import update_after_commit
+from app.models.base import utcnow
+from app.models.task import Task
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+GUEST_EMAIL_DOMAIN = "guest.local"
+
+# Whether this process is already topping up the pool
+_refilling = False
+
+
+def _guest_values(pooled: bool = False) -> dict:
+    # Random IDs cannot collide however many guests arrive at once, and the
+    # unusable hash means no bcrypt work per guest
+    return {
+        "email": f"guest_{uuid.uuid4().hex}@{GUEST_EMAIL_DOMAIN}",
+        "hashed_password": UNUSABLE_PASSWORD_HASH,
+        "full_name": generate_random_name(),
+        "is_guest": True,
+        "is_active": not pooled,
+        "claimed_at": None if pooled else utcnow(),
+    }
+
+
+async def create_guest_async(db: AsyncSession) -> User:
+    """
+    Create a guest account.
+
+    Args:
+        db: Async database session
+
+    Returns:
+        New guest user
+    """
+    guest = User(**_guest_values())
+    db.add(guest)
+    await db.commit()
+    return guest
+
+
+async def claim_guest_async(db: AsyncSession) -> User | None:
+    """
+    Take a pre-created guest account from the pool.
+
+    Pooled guests have no ``claimed_at`` and are inactive until claimed,
+    which keeps them out of user listings; guests deactivated after a claim
+    are never handed out again. Concurrent claims never get the same
+    account: on Postgres they skip each other's locked rows, and the
+    ``claimed_at`` check makes a lost race return None rather than a shared
+    account.
+
+    Args:
+        db: Async database session
+
+    Returns:
+        Claimed guest, or None if the pool is empty
+    """
+    candidate = (
+        select(User.id)
+        .where(User.is_guest.is_(True), User.claimed_at.is_(None))
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    guest = await db.scalar(
+        update(User)
+        .where(User.id == candidate, User.claimed_at.is_(None))
+        .values(is_active=True, claimed_at=utcnow())
+        .returning(User)
+        # Nobody holds a token for an unclaimed guest
+        .execution_options(
+            synchronize_session=False,
+            user_cache_unaffected=True,
+            user_directory_unaffected=True,
+        )
+    )
+    if guest is not None:
+        update_after_commit(db.sync_session, [guest])
+    await db.commit()
+    return guest
+
+
+async def refill_guest_pool_async(db: AsyncSession, size: int) -> int:
+    """
+    Top the pool of unclaimed guests up to ``size`` in one INSERT.
+
+    Args:
+        db: Async database session
+        size: Number of unclaimed guests to keep
+
+    Returns:
+        Number of guests created
+    """
+    result = await db.execute(
+        select(func.count())
+        .select_from(User)
+        .where(User.is_guest.is_(True), User.claimed_at.is_(None))
+    )
+    available = result.scalar_one()
+    missing = size - available
+    if missing <= 0:
+        return 0
+    # Pooled guests are inactive, so they are not in the user directory
+    await db.execute(
+        insert(User).execution_options(user_directory_unaffected=True),
+        [_guest_values(pooled=True) for _ in range(missing)],
+    )
+    await db.commit()
+    return missing
+
+
+async def refill_guest_pool(session_factory: async_sessionmaker[AsyncSession]) -> None:
+    """Top up the guest pool to GUEST_POOL_SIZE unless this process already is."""
+    global _refilling
+    if _refilling or settings.GUEST_POOL_SIZE <= 0:
+        return
+    _refilling = True
+    try:
+        async with session_factory() as db:
+            created = await refill_guest_pool_async(db, settings.GUEST_POOL_SIZE)
+        if created:
+            logger.info("Added %d guests to the pool", created)
+    finally:
+        _refilling = False
+
+
+async def reap_expired_guests_async(
+    db: AsyncSession, batch_size: int, now: datetime | None = None
+) -> int:
+    """
+    Delete one batch of expired guests and their tasks in one transaction.
+
+    A guest expires GUEST_TTL_HOURS after it was claimed, whether or not it
+    is still active. Pooled guests that were never claimed do not expire.
+    Tasks the guests own are deleted; tasks assigned to them by others are
+    unassigned. On Postgres, concurrent reapers skip each other's locked
+    rows.
+
+    Args:
+        db: Async database session
+        batch_size: Most guests to delete
+        now: Current time (for testing)
+
+    Returns:
+        Number of guests deleted
+    """
+    cutoff = (now or utcnow()) - timedelta(hours=settings.GUEST_TTL_HOURS)
+    guests = (
+        await db.execute(
+            select(User.id, User.email)
+            .where(
+                User.is_guest.is_(True),
+                User.claimed_at < cutoff,
+            )
+            .order_by(User.claimed_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+    ).all()
+    if not guests:
+        return 0
+
+    guest_ids = [guest.id for guest in guests]
+    await db.execute(
+        delete(Task)
+        .where(Task.owner_id.in_(guest_ids))
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(
+        update(Task)
+        .where(Task.assigned_to_id.in_(guest_ids))
+        .values(assigned_to_id=None, version=Task.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(
+        delete(User)
+        .where(User.id.in_(guest_ids))
+        .execution_options(
+            synchronize_session=False,
+            user_cache_unaffected=True,
+            user_directory_unaffected=True,
+        )
+    )
+    invalidate_after_commit(db.sync_session, [guest.email for guest in guests])
+    update_after_commit(db.sync_session, deleted_ids=guest_ids)
+    await db.commit()
+    return len(guests)
+
+
+async def reap_expired_guests(session_factory: async_sessionmaker[AsyncSession]) -> int:
+    """
+    Delete every expired guest, GUEST_REAPER_BATCH_SIZE at a time.
+
+    Each batch is its own short transaction, with a pause of
+    GUEST_REAPER_PAUSE_SECONDS between batches so a large backlog does not
+    hold locks or connections away from requests.
+
+    Args:
+        session_factory: Async session factory
+
+    Returns:
+        Number of guests deleted
+    """
+    batch_size = settings.GUEST_REAPER_BATCH_SIZE
+    total = 0
+    while True:
+        async with session_factory() as db:
+            reaped = await reap_expired_guests_async(db, batch_size)
+        total += reaped
+        if reaped < batch_size:
+            break
+        await asyncio.sleep(settings.GUEST_REAPER_PAUSE_SECONDS)
+    if total:
+        logger.info("Deleted %d expired guests", total)
+    return total
+
+
+async def run_guest_reaper(session_factory: async_sessionmaker[AsyncSession]) -> None:
+    """Reap expired guests every GUEST_REAPER_INTERVAL_SECONDS until cancelled."""
+    while True:
+        try:
+            await reap_expired_guests(session_factory)
+        except Exception:
+            logger.exception("Guest reaper failed")
+        await asyncio.sleep(settings.GUEST_REAPER_INTERVAL_SECONDS)
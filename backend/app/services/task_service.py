@@ -1,31 +1,218 @@
 """Task service for business logic."""
+from collections.abc import Iterator
+from datetime import datetime
+
+from sqlalchemy import Select, delete, func, insert, select, tuple_, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import ReturningDelete, ReturningInsert, ReturningUpdate
 
-from app.api.schemas import TaskCreate, TaskUpdate
+from app.api.schemas import TaskBatch, TaskCreate, TaskUpdate
+from app.core.config import settings
+from app.core.ranking import evenly_spaced_ranks, rank_between
 from app.models.task import Task
 from app.models.user import User
 
 
-def create_task(db: Session, task_create: TaskCreate, owner: User) -> Task:
-    """Create a new task."""
-    db_task = Task(
-        title=task_create.title,
-        description=task_create.description,
-        status=task_create.status,
-        priority=task_create.priority,
-        owner_id=owner.id,
-        assigned_to_id=task_create.assigned_to_id,
-        due_date=task_create.due_date,
+class TaskNotFoundError(LookupError):
+    """Raised when tasks named in a batch do not exist or belong to someone else."""
+
+    def __init__(self, task_ids: list[int]) -> None:
+        """
+        Initialize error.
+
+        Args:
+            task_ids: IDs that could not be found
+        """
+        super().__init__(f"Tasks not found: {task_ids}")
+        self.task_ids = task_ids
+
+
+class TaskVersionConflictError(Exception):
+    """Raised when a conditional write finds the task at another version."""
+
+    def __init__(self, task_id: int) -> None:
+        """
+        Initialize error.
+
+        Args:
+            task_id: ID of the task that changed
+        """
+        super().__init__(f"Task {task_id} has been modified")
+        self.task_id = task_id
+
+
+def _task_values(task_create: TaskCreate, owner: User, rank: str) -> dict:
+    return {**task_create.model_dump(), "owner_id": owner.id, "rank": rank}
+
+
+def _last_rank_query(owner_id: int, status: str) -> Select[tuple[str]]:
+    return (
+        select(Task.rank)
+        .where(Task.owner_id == owner_id, Task.status == status)
+        .order_by(Task.rank.desc(), Task.id.desc())
+        .limit(1)
     )
-    db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
-    return db_task
 
 
-def get_tasks(db: Session, owner: User) -> list[Task]:
-    """Get all tasks for a user."""
-    return db.query(Task).filter(Task.owner_id == owner.id).all()
+def _next_rank_query(
+    owner_id: int, status: str, after: str | None, exclude_id: int
+) -> Select[tuple[str]]:
+    query = select(Task.rank).where(
+        Task.owner_id == owner_id, Task.status == status, Task.id != exclude_id
+    )
+    if after is not None:
+        query = query.where(Task.rank > after)
+    return query.order_by(Task.rank, Task.id).limit(1)
+
+
+def _column_query(owner_id: int, status: str) -> Select[tuple[Task]]:
+    return (
+        select(Task)
+        .where(Task.owner_id == owner_id, Task.status == status)
+        .order_by(Task.rank, Task.id)
+    )
+
+
+def _returning(db: AsyncSession, kind: str) -> bool:
+    """Whether the database supports ``kind`` (insert/update/delete) ... RETURNING."""
+    return getattr(db.get_bind().dialect, f"{kind}_returning", False)
+
+
+def _insert_statement(values: dict) -> ReturningInsert[tuple[Task]]:
+    return insert(Task).values(values).returning(Task)
+
+
+def _update_statement(
+    task_id: int, owner_id: int, values: dict, versions: list[int] | None = None
+) -> ReturningUpdate[tuple[Task]]:
+    query = update(Task).where(Task.id == task_id, Task.owner_id == owner_id)
+    if versions is not None:
+        query = query.where(Task.version.in_(versions))
+    return (
+        query.values({**values, "version": Task.version + 1})
+        .returning(Task)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+
+
+def _delete_statement(
+    task_id: int, owner_id: int, versions: list[int] | None = None
+) -> ReturningDelete[tuple[int, int, int | None]]:
+    query = delete(Task).where(Task.id == task_id, Task.owner_id == owner_id)
+    if versions is not None:
+        query = query.where(Task.version.in_(versions))
+    return (
+        query.returning(Task.id, Task.owner_id, Task.assigned_to_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _exists_query(task_id: int, owner_id: int) -> Select[tuple[int]]:
+    return select(Task.id).where(Task.id == task_id, Task.owner_id == owner_id)
+
+
+def needs_rebalance(task: Task) -> bool:
+    """Whether a task's rank has grown long enough to compact its column."""
+    return len(task.rank) > settings.TASK_RANK_MAX_LENGTH
+
+
+def get_tasks_fingerprint(
+    db: Session, owner: User
+) -> tuple[int, int | None, int | None, datetime | None]:
+    """
+    Get a value that changes whenever any of a user's tasks does.
+
+    Deleting a task lowers the count, and creating or updating one moves
+    the latest ``updated_at`` forward (as well as raising the maximum ID or
+    a version). Together these catch a delete followed by a create even
+    where IDs are reused, as SQLite does for the highest one. It is one
+    aggregate over the owner's tasks, much cheaper than reading and
+    serializing them.
+
+    Args:
+        db: Database session
+        owner: User whose tasks to summarize
+
+    Returns:
+        Task count, highest task ID, sum of task versions and latest update
+    """
+    count, max_id, versions, updated_at = db.execute(
+        select(
+            func.count(), func.max(Task.id), func.sum(Task.version), func.max(Task.updated_at)
+        ).where(Task.owner_id == owner.id)
+    ).one()
+    return count, max_id, versions, updated_at
+
+
+def get_tasks_page(
+    db: Session,
+    owner: User,
+    limit: int,
+    after: tuple[datetime, int] | None = None,
+) -> list[Task]:
+    """
+    Get one page of a user's tasks, most recently updated first.
+
+    Pages are keyed on (updated_at, id) rather than offsets, so each page
+    is an index range scan and tasks created meanwhile never shift later
+    pages.
+
+    Args:
+        db: Database session
+        owner: User whose tasks to list
+        limit: Maximum number of tasks to return
+        after: Sort key of the last task on the previous page
+
+    Returns:
+        Up to ``limit`` tasks
+    """
+    query = select(Task).where(Task.owner_id == owner.id)
+    if after is not None:
+        query = query.where(tuple_(Task.updated_at, Task.id) < after)
+    query = query.order_by(Task.updated_at.desc(), Task.id.desc()).limit(limit)
+    return list(db.scalars(query))
+
+
+def iter_tasks_for_export(
+    db: Session, owner: User, chunk_size: int = 1000
+) -> Iterator[Row]:
+    """
+    Stream a user's tasks in ID order without loading them all.
+
+    Rows are fetched ``chunk_size`` at a time through a server-side cursor
+    (where the driver supports one) and returned as plain rows, so no ORM
+    objects accumulate in the session.
+
+    Args:
+        db: Database session; must stay open while iterating
+        owner: User whose tasks to export
+        chunk_size: Rows fetched per round trip
+
+    Yields:
+        Rows with the TaskResponse fields
+    """
+    query = (
+        select(
+            Task.id,
+            Task.title,
+            Task.description,
+            Task.status,
+            Task.priority,
+            Task.rank,
+            Task.version,
+            Task.owner_id,
+            Task.assigned_to_id,
+            Task.created_at,
+            Task.updated_at,
+            Task.due_date,
+        )
+        .where(Task.owner_id == owner.id)
+        .order_by(Task.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    yield from db.execute(query)
 
 
 def get_task(db: Session, task_id: int, owner: User) -> Task | None:
@@ -37,30 +224,304 @@ def get_task(db: Session, task_id: int, owner: User) -> Task | None:
     )
 
 
-def update_task(
-    db: Session, task_id: int, task_update: TaskUpdate, owner: User
-) -> Task | None:
-    """Update a task."""
-    db_task = get_task(db, task_id, owner)
-    if not db_task:
-        return None
-
+def _apply_update(db_task: Task, task_update: TaskUpdate) -> None:
     # Update only provided fields
     update_data = task_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_task, field, value)
 
-    db.commit()
-    db.refresh(db_task)
+
+async def create_task_async(
+    db: AsyncSession, task_create: TaskCreate, owner: User
+) -> Task:
+    """
+    Create a new task at the bottom of its column.
+
+    Where the database supports it, the row is inserted and read back in
+    one INSERT ... RETURNING statement.
+    """
+    last_rank = await db.scalar(_last_rank_query(owner.id, task_create.status))
+    values = _task_values(task_create, owner, rank_between(last_rank, None))
+    if _returning(db, "insert"):
+        db_task = (await db.execute(_insert_statement(values))).scalar_one()
+        await db.commit()
+        return db_task
+
+    db_task = Task(**values)
+    db.add(db_task)
+    await db.commit()
+    await db.refresh(db_task)
+    return db_task
+
+
+async def get_tasks_async(db: AsyncSession, owner: User) -> list[Task]:
+    """Get all tasks for a user without blocking the event loop."""
+    result = await db.scalars(select(Task).where(Task.owner_id == owner.id))
+    return list(result.all())
+
+
+async def get_task_async(db: AsyncSession, task_id: int, owner: User) -> Task | None:
+    """Get a single task by ID without blocking the event loop."""
+    result = await db.execute(
+        select(Task).where(Task.id == task_id, Task.owner_id == owner.id).limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def update_task_async(
+    db: AsyncSession,
+    task_id: int,
+    task_update: TaskUpdate,
+    owner: User,
+    versions: list[int] | None = None,
+) -> Task | None:
+    """
+    Update a task.
+
+    Where the database supports it, the owner check, the write and the read
+    back are one UPDATE ... RETURNING statement.
+
+    Args:
+        db: Async database session
+        task_id: ID of the task to update
+        task_update: Fields to change
+        owner: User the task belongs to
+        versions: Versions the task must be at to be updated, or None to
+            update whatever its version
+
+    Returns:
+        Updated task, or None if it was not found
+
+    Raises:
+        TaskVersionConflictError: If the task is not at one of ``versions``
+    """
+    changes = task_update.model_dump(exclude_unset=True)
+    if changes and _returning(db, "update"):
+        result = await db.execute(_update_statement(task_id, owner.id, changes, versions))
+        db_task = result.scalar_one_or_none()
+        if db_task is None and versions is not None:
+            if await db.scalar(_exists_query(task_id, owner.id)) is not None:
+                raise TaskVersionConflictError(task_id)
+        await db.commit()
+        return db_task
+
+    db_task = await get_task_async(db, task_id, owner)
+    if not db_task:
+        return None
+    if versions is not None and db_task.version not in versions:
+        raise TaskVersionConflictError(task_id)
+
+    _apply_update(db_task, task_update)
+    await db.commit()
+    await db.refresh(db_task)
+    return db_task
+
+
+async def delete_task_async(
+    db: AsyncSession, task_id: int, owner: User, versions: list[int] | None = None
+) -> Row | Task | None:
+    """
+    Delete a task.
+
+    Where the database supports it, this is one DELETE ... RETURNING
+    statement, and the result is an (id, owner_id, assigned_to_id) row
+    rather than the task.
+
+    Args:
+        db: Async database session
+        task_id: ID of the task to delete
+        owner: User the task belongs to
+        versions: Versions the task must be at to be deleted, or None to
+            delete whatever its version
+
+    Returns:
+        Deleted task's id, owner_id and assigned_to_id, or None if it was
+        not found
+
+    Raises:
+        TaskVersionConflictError: If the task is not at one of ``versions``
+    """
+    if _returning(db, "delete"):
+        deleted = (
+            await db.execute(_delete_statement(task_id, owner.id, versions))
+        ).first()
+        if deleted is None and versions is not None:
+            if await db.scalar(_exists_query(task_id, owner.id)) is not None:
+                raise TaskVersionConflictError(task_id)
+        await db.commit()
+        return deleted
+
+    db_task = await get_task_async(db, task_id, owner)
+    if not db_task:
+        return None
+    if versions is not None and db_task.version not in versions:
+        raise TaskVersionConflictError(task_id)
+
+    await db.delete(db_task)
+    await db.commit()
     return db_task
 
 
-def delete_task(db: Session, task_id: int, owner: User) -> bool:
-    """Delete a task."""
-    db_task = get_task(db, task_id, owner)
+async def move_task_async(
+    db: AsyncSession,
+    task_id: int,
+    owner: User,
+    status: str | None = None,
+    after_id: int | None = None,
+) -> Task | None:
+    """
+    Move a task within its column or into another one.
+
+    The task gets a rank between its new neighbours, so only its own row is
+    written however long the column is. Ranks lengthen as one gap is split
+    over and over; see needs_rebalance and rebalance_column_async.
+
+    Args:
+        db: Async database session
+        task_id: ID of the task to move
+        owner: User the task belongs to
+        status: Column to move into; None keeps the current one
+        after_id: Task the moved one should follow, or None for the top
+
+    Returns:
+        Moved task, or None if it was not found
+
+    Raises:
+        TaskNotFoundError: If ``after_id`` is not a task of the owner in the
+            target column
+    """
+    db_task = await get_task_async(db, task_id, owner)
     if not db_task:
-        return False
+        return None
+    status = status or db_task.status
+
+    before_rank = None
+    if after_id is not None:
+        before = await get_task_async(db, after_id, owner)
+        if before is None or before.id == task_id or before.status != status:
+            raise TaskNotFoundError([after_id])
+        before_rank = before.rank
+
+    after_rank = await db.scalar(_next_rank_query(owner.id, status, before_rank, task_id))
+    changes = {"status": status, "rank": rank_between(before_rank, after_rank)}
+    if _returning(db, "update"):
+        result = await db.execute(_update_statement(task_id, owner.id, changes))
+        await db.commit()
+        return result.scalar_one_or_none()
+
+    db_task.status, db_task.rank = changes["status"], changes["rank"]
+    await db.commit()
+    await db.refresh(db_task)
+    return db_task
+
+
+async def rebalance_column_async(db: AsyncSession, owner_id: int, status: str) -> list[Task]:
+    """
+    Give every task in a column a short, evenly spaced rank.
+
+    Args:
+        db: Async database session
+        owner_id: ID of the user whose column to compact
+        status: Column to compact
+
+    Returns:
+        Tasks whose rank changed, in board order
+
+    Raises:
+        StaleDataError: If a task changed while the column was compacted
+    """
+    tasks = list(await db.scalars(_column_query(owner_id, status)))
+    changed = []
+    for task, rank in zip(tasks, evenly_spaced_ranks(len(tasks)), strict=True):
+        if task.rank != rank:
+            task.rank = rank
+            changed.append(task)
+    await db.commit()
+    return changed
+
+
+async def apply_task_batch_async(
+    db: AsyncSession, batch: TaskBatch, owner: User
+) -> tuple[list[Task], list[Task], list[Row]]:
+    """
+    Apply a batch of task mutations in one transaction with set-based SQL.
+
+    Creates are one multi-row INSERT. Updates sharing the same changes (the
+    usual bulk move or reassign) are one UPDATE per distinct change set.
+    Deletes are one DELETE. Nothing is written unless every updated and
+    deleted task belongs to the owner.
+
+    Args:
+        db: Async database session
+        batch: Mutations to apply
+        owner: User the tasks belong to
+
+    Returns:
+        Created tasks, updated tasks, and (id, owner_id, assigned_to_id)
+        rows of deleted tasks
+
+    Raises:
+        TaskNotFoundError: If a task to update or delete was not found
+    """
+    task_ids = [task_update.id for task_update in batch.update] + batch.delete
+    if task_ids:
+        found = set(await db.scalars(
+            select(Task.id).where(Task.id.in_(task_ids), Task.owner_id == owner.id)
+        ))
+        missing = [task_id for task_id in task_ids if task_id not in found]
+        if missing:
+            raise TaskNotFoundError(missing)
+
+    created: list[Task] = []
+    if batch.create:
+        # New tasks go to the bottom of their columns, in request order
+        last_ranks: dict[str, str | None] = {}
+        values = []
+        for task_create in batch.create:
+            if task_create.status not in last_ranks:
+                last_ranks[task_create.status] = await db.scalar(
+                    _last_rank_query(owner.id, task_create.status)
+                )
+            rank = last_ranks[task_create.status] = rank_between(
+                last_ranks[task_create.status], None
+            )
+            values.append(_task_values(task_create, owner, rank))
+        created = list(await db.scalars(
+            insert(Task).returning(Task, sort_by_parameter_order=True), values
+        ))
+
+    # Group updates by their change set so identical changes share a statement
+    groups: dict[tuple, list[int]] = {}
+    for task_update in batch.update:
+        changes = task_update.model_dump(exclude_unset=True, exclude={"id"})
+        groups.setdefault(tuple(sorted(changes.items())), []).append(task_update.id)
+
+    updated: list[Task] = []
+    for change_set, ids in groups.items():
+        if not change_set:
+            updated.extend(await db.scalars(select(Task).where(Task.id.in_(ids))))
+            continue
+        updated.extend(await db.scalars(
+            update(Task)
+            .where(Task.id.in_(ids), Task.owner_id == owner.id)
+            .values({**dict(change_set), "version": Task.version + 1})
+            .returning(Task),
+            execution_options={"synchronize_session": False},
+        ))
+
+    # Report updates in request order
+    position = {task_update.id: index for index, task_update in enumerate(batch.update)}
+    updated.sort(key=lambda task: position[task.id])
+
+    deleted: list[Row] = []
+    if batch.delete:
+        result = await db.execute(
+            delete(Task)
+            .where(Task.id.in_(batch.delete), Task.owner_id == owner.id)
+            .returning(Task.id, Task.owner_id, Task.assigned_to_id),
+            execution_options={"synchronize_session": False},
+        )
+        deleted = list(result)
 
-    db.delete(db_task)
-    db.commit()
-    return True
+    await db.commit()
+    return created, updated, deleted
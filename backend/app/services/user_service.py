@@ -1,7 +1,11 @@
 """User service for business logic."""
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.hashing import PasswordHasher, password_hasher
 from app.core.security import get_password_hash
+from app.core.user_directory import user_directory
 from app.models.user import User
 from app.api.schemas import UserCreate
 
@@ -11,15 +15,84 @@ def get_user_by_email(db: Session, email: str) -> User | None:
     return db.query(User).filter(User.email == email).first()
 
 
-def create_user(db: Session, user_create: UserCreate) -> User:
-    """Create a new user."""
-    hashed_password = get_password_hash(user_create.password)
-    db_user = User(
+def _build_user(user_create: UserCreate, hashed_password: str) -> User:
+    return User(
         email=user_create.email,
         hashed_password=hashed_password,
         full_name=user_create.full_name,
     )
+
+
+def create_user(db: Session, user_create: UserCreate) -> User:
+    """Create a new user."""
+    db_user = _build_user(user_create, get_password_hash(user_create.password))
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
     return db_user
+
+
+async def get_user_by_email_async(db: AsyncSession, email: str) -> User | None:
+    """Get user by email address without blocking the event loop."""
+    result = await db.execute(select(User).where(User.email == email).limit(1))
+    return result.scalar_one_or_none()
+
+
+async def create_user_async(
+    db: AsyncSession, user_create: UserCreate, hasher: PasswordHasher = password_hasher
+) -> User:
+    """Create a new user without blocking the event loop on hashing or the database."""
+    db_user = _build_user(user_create, await hasher.hash(user_create.password))
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
+def search_users(
+    db: Session,
+    query: str,
+    limit: int,
+    after: str | None = None,
+    exclude_guests: bool = False,
+) -> list[User]:
+    """
+    Find active users by name or email, for typeahead.
+
+    On Postgres this is a case-insensitive substring match served by the
+    trigram indexes. Elsewhere it matches prefixes of words in the name or
+    email, using the in-memory user directory. Either way results are in
+    email order and paged by email, so each page costs about the same.
+
+    Args:
+        db: Database session
+        query: Search text; empty matches everyone
+        limit: Maximum number of users to return
+        after: Email of the last user on the previous page
+        exclude_guests: Leave out guest accounts
+
+    Returns:
+        Up to ``limit`` users
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        ids = user_directory.search(db, query, limit, after, exclude_guests)
+        users = {user.id: user for user in db.scalars(
+            select(User).where(User.id.in_(ids), User.is_active.is_(True))
+        )}
+        # The directory may be a little behind; drop users since deactivated
+        return [users[user_id] for user_id in ids if user_id in users]
+
+    statement = select(User).where(User.is_active.is_(True))
+    pattern = query.lower().strip()
+    if pattern:
+        statement = statement.where(
+            or_(
+                func.lower(User.email).contains(pattern, autoescape=True),
+                func.lower(User.full_name).contains(pattern, autoescape=True),
+            )
+        )
+    if exclude_guests:
+        statement = statement.where(User.is_guest.is_(False))
+    if after is not None:
+        statement = statement.where(User.email > after)
+    return list(db.scalars(statement.order_by(User.email).limit(limit)))
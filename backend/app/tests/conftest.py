@@ -1,26 +1,56 @@
 """Pytest configuration and fixtures for testing."""
+import os
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
+from app.core.db_metrics import instrument_engine
+from app.core.rate_limit import auth_rate_limiter
+from app.core.read_routing import ReadRouter
+from app.core.user_cache import user_cache
+from app.core.user_directory import user_directory
 from app.core.websocket_manager import ConnectionManager
 from app.main import app
-from app.models.base import Base, get_db
+from app.models.base import (
+    Base,
+    get_async_database_url,
+    get_async_db,
+    get_async_session_factory,
+    get_db,
+    get_read_router,
+    get_session_factory,
+)
+from app.models.rate_limit import RateLimitBucket  # noqa: F401 - Import to register model
 from app.models.task import Task  # noqa: F401 - Import to register model
 from app.models.user import User  # noqa: F401 - Import to register model
 
-# Test database URL (using SQLite in memory for fast tests)
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Test database URL (a SQLite file, so the sync and async engines share it)
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# aiosqlite connections are bound to the event loop that opened them and
+# TestClient runs each request on its own loop, so connections are not pooled
+async_engine = create_async_engine(
+    get_async_database_url(SQLALCHEMY_DATABASE_URL),
+    poolclass=NullPool,
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+
 
 def override_get_db():
     """Override database dependency for testing."""
@@ -31,7 +61,32 @@ def override_get_db():
         db.close()
 
 
+def override_get_read_router() -> ReadRouter:
+    """Override read router dependency for testing (no replicas)."""
+    return ReadRouter(TestingSessionLocal, [])
+
+
+def override_get_session_factory() -> sessionmaker:
+    """Override session factory dependency for testing."""
+    return TestingSessionLocal
+
+
+async def override_get_async_db():
+    """Override async database dependency for testing."""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+def override_get_async_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Override async session factory dependency for testing."""
+    return TestingAsyncSessionLocal
+
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_router] = override_get_read_router
+app.dependency_overrides[get_session_factory] = override_get_session_factory
+app.dependency_overrides[get_async_db] = override_get_async_db
+app.dependency_overrides[get_async_session_factory] = override_get_async_session_factory
 
 
 @pytest.fixture(autouse=True)
@@ -41,6 +96,12 @@ def setup_database():
     # Clear WebSocket connections (singleton state)
     manager = ConnectionManager()
     manager.clear_all()
+    # Tokens issued within the same second are identical across tests
+    user_cache.clear()
+    # Dropping the tables does not go through the session, so the search
+    # index would otherwise still hold the previous test's users
+    user_directory.invalidate()
+    auth_rate_limiter.store.clear()
     yield
     Base.metadata.drop_all(bind=engine)
 
@@ -1,8 +1,24 @@
 """Tests for authentication endpoints - TDD."""
+import asyncio
+import threading
+import time
+from collections.abc import Iterator
+from datetime import timedelta
+
+import pytest
 from fastapi.testclient import TestClient
 
+from app.core import security
+from app.core.config import settings
+from app.core.hashing import HashingUnavailableError, PasswordHasher, get_password_hasher
+from app.core.security import UNUSABLE_PASSWORD_HASH, get_password_hash
+from app.core.user_directory import user_directory
+from app.main import app
+from app.models.base import utcnow
+from app.models.task import Task
 from app.models.user import User
-from app.tests.conftest import TestingSessionLocal
+from app.services import auth_service, guest_service
+from app.tests.conftest import TestingAsyncSessionLocal, TestingSessionLocal
 
 
 class TestUserRegistration:
@@ -248,3 +264,351 @@ class TestGetCurrentUser:
             headers={"Authorization": "Bearer invalid-token"},
         )
         assert response.status_code == 401
+
+
+class TestPasswordHashing:
+    """Test suite for the bounded password-hashing executor."""
+
+    @pytest.fixture
+    def blocked_hasher(self) -> Iterator[PasswordHasher]:
+        """A one-thread hasher with no queue whose only thread is busy."""
+        hasher = PasswordHasher(workers=1, queue_size=0)
+        gate = threading.Event()
+        blocker = threading.Thread(target=asyncio.run, args=(hasher.run(gate.wait),))
+        blocker.start()
+        while hasher.get_stats()["running"] == 0:
+            time.sleep(0.001)
+
+        app.dependency_overrides[get_password_hasher] = lambda: hasher
+        try:
+            yield hasher
+        finally:
+            del app.dependency_overrides[get_password_hasher]
+            gate.set()
+            blocker.join()
+            hasher.shutdown()
+
+    async def test_full_queue_sheds_jobs(self) -> None:
+        """Test that jobs beyond the workers and queue are refused at once."""
+        hasher = PasswordHasher(workers=1, queue_size=1)
+        gate = threading.Event()
+        first = asyncio.ensure_future(hasher.run(gate.wait))
+        second = asyncio.ensure_future(hasher.run(gate.wait))
+        await asyncio.sleep(0.05)
+
+        stats = hasher.get_stats()
+        assert (stats["running"], stats["queued"]) == (1, 1)
+        with pytest.raises(HashingUnavailableError):
+            await hasher.run(gate.wait)
+
+        gate.set()
+        await asyncio.gather(first, second)
+        stats = hasher.get_stats()
+        assert (stats["completed"], stats["rejected"], stats["queued"]) == (2, 1, 0)
+        assert stats["max_hash_ms"] > 0
+        hasher.shutdown()
+
+    def test_saturated_login_gets_503(
+        self, client: TestClient, blocked_hasher: PasswordHasher
+    ) -> None:
+        """Test that logins are shed with Retry-After while hashing is saturated."""
+        with TestingSessionLocal() as db:
+            db.add(User(
+                email="test@example.com", hashed_password=get_password_hash("securepassword123")
+            ))
+            db.commit()
+
+        response = client.post(
+            "/api/v1/auth/login",
+            json={"email": "test@example.com", "password": "securepassword123"},
+        )
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)
+
+        # Endpoints that do not hash are unaffected
+        assert client.get("/health").status_code == 200
+
+    def test_login_rehashes_with_new_cost(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that changing BCRYPT_ROUNDS rehashes a password at login."""
+        credentials = {"email": "test@example.com", "password": "securepassword123"}
+        monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+        client.post("/api/v1/auth/register", json=credentials)
+        monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+
+        assert client.post("/api/v1/auth/login", json=credentials).status_code == 200
+        with TestingSessionLocal() as db:
+            user = db.query(User).filter(User.email == credentials["email"]).one()
+            assert user.hashed_password.startswith("$2b$05$")
+        assert client.post("/api/v1/auth/login", json=credentials).status_code == 200
+
+    def test_hash_metrics(self, client: TestClient) -> None:
+        """Test that superusers can read the hashing queue and latencies."""
+        client.post(
+            "/api/v1/auth/register",
+            json={"email": "admin@example.com", "password": "securepassword123"},
+        )
+        with TestingSessionLocal() as db:
+            db.query(User).filter(User.email == "admin@example.com").update(
+                {"is_superuser": True}
+            )
+            db.commit()
+        token = client.post(
+            "/api/v1/auth/login",
+            json={"email": "admin@example.com", "password": "securepassword123"},
+        ).json()["access_token"]
+
+        response = client.get(
+            "/api/v1/internal/hash-metrics", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["completed"] >= 2  # registration hash and login check
+        assert {"queued", "running", "rejected", "avg_wait_ms", "max_hash_ms"} <= set(stats)
+
+
+class TestGuestLogin:
+    """Test suite for guest accounts."""
+
+    def guest_token(self, client: TestClient) -> str:
+        """Log in as a new guest and return the token."""
+        response = client.post("/api/v1/auth/guest")
+        assert response.status_code == 200
+        return response.json()["access_token"]
+
+    def test_guests_skip_hashing(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that guests get distinct accounts without any bcrypt work."""
+        def no_hashing(*args: object) -> None:
+            raise AssertionError("guest login hashed a password")
+
+        monkeypatch.setattr(security.bcrypt, "hashpw", no_hashing)
+        monkeypatch.setattr(security.bcrypt, "checkpw", no_hashing)
+        tokens = [self.guest_token(client) for _ in range(20)]
+
+        emails = set()
+        for token in tokens:
+            me = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"})
+            assert me.json()["is_guest"] is True
+            emails.add(me.json()["email"])
+        assert len(emails) == 20
+
+    async def test_guest_password_never_matches(self) -> None:
+        """Test that nobody can log in to a guest account with a password."""
+        async with TestingAsyncSessionLocal() as db:
+            guest = await guest_service.create_guest_async(db)
+            hasher = PasswordHasher(workers=1)
+            for password in ("guest", UNUSABLE_PASSWORD_HASH, ""):
+                assert await auth_service.authenticate_user_async(
+                    db, hasher, guest.email, password
+                ) is None
+            assert hasher.get_stats()["completed"] == 0  # rejected without bcrypt
+        assert security.verify_password("!", UNUSABLE_PASSWORD_HASH) is False
+
+    def test_guest_pool_is_claimed_and_refilled(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that pooled guests are handed out and the pool is topped up."""
+        monkeypatch.setattr(settings, "GUEST_POOL_SIZE", 3)
+
+        def pool() -> set[str]:
+            with TestingSessionLocal() as db:
+                return {
+                    user.email for user in
+                    db.query(User).filter(User.is_guest, User.claimed_at.is_(None))
+                }
+
+        # Empty pool: a fresh guest is created, then the pool is filled
+        self.guest_token(client)
+        before = pool()
+        assert len(before) == 3
+
+        token = self.guest_token(client)
+        me = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"}).json()
+        assert me["email"] in before
+        assert me["is_active"] is True
+        after = pool()
+        assert len(after) == 3 and me["email"] not in after
+
+        # Unclaimed guests are not listed as users
+        users = client.get(
+            "/api/v1/auth/users", headers={"Authorization": f"Bearer {token}"}
+        ).json()
+        assert not after & {user["email"] for user in users}
+
+    async def test_concurrent_claims_get_distinct_guests(self) -> None:
+        """Test that two claims never hand out the same pooled guest."""
+        async with TestingAsyncSessionLocal() as db:
+            assert await guest_service.refill_guest_pool_async(db, 2) == 2
+            assert await guest_service.refill_guest_pool_async(db, 2) == 0
+
+        async def claim() -> User | None:
+            async with TestingAsyncSessionLocal() as db:
+                return await guest_service.claim_guest_async(db)
+
+        claimed = await asyncio.gather(claim(), claim(), claim())
+        emails = [guest.email for guest in claimed if guest is not None]
+        assert len(emails) == len(set(emails)) == 2
+
+    async def test_deactivated_guests_are_not_pooled(self) -> None:
+        """Test that a claimed guest that was deactivated is never handed out again."""
+        async with TestingAsyncSessionLocal() as db:
+            db.add(User(**{**guest_service._guest_values(), "is_active": False}))
+            await db.commit()
+            assert await guest_service.claim_guest_async(db) is None
+            assert await guest_service.refill_guest_pool_async(db, 1) == 1
+            guest = await guest_service.claim_guest_async(db)
+            assert guest is not None and guest.claimed_at is not None
+
+    def test_expired_guests_are_reaped(self, client: TestClient, auth_token: str) -> None:
+        """Test that expired guests and their tasks are deleted, and nothing else."""
+        guest_token = self.guest_token(client)
+        guest_headers = {"Authorization": f"Bearer {guest_token}"}
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        guest_id = client.get("/api/v1/auth/me", headers=guest_headers).json()["id"]
+        assert client.post(
+            "/api/v1/tasks", json={"title": "Guest task"}, headers=guest_headers
+        ).status_code == 201
+        assigned = client.post(
+            "/api/v1/tasks", json={"title": "Mine", "assigned_to_id": guest_id}, headers=headers
+        ).json()
+        fresh_token = self.guest_token(client)
+
+        expired = utcnow() - timedelta(hours=settings.GUEST_TTL_HOURS + 1)
+        with TestingSessionLocal() as db:
+            db.get(User, guest_id).claimed_at = expired
+            db.add(User(**guest_service._guest_values(pooled=True), created_at=expired))
+            db.commit()
+
+        assert asyncio.run(guest_service.reap_expired_guests(TestingAsyncSessionLocal)) == 1
+
+        assert client.get("/api/v1/auth/me", headers=guest_headers).status_code == 401
+        assert client.get(
+            "/api/v1/auth/me", headers={"Authorization": f"Bearer {fresh_token}"}
+        ).status_code == 200
+        task = client.get(f"/api/v1/tasks/{assigned['id']}", headers=headers).json()
+        assert task["assigned_to_id"] is None
+        assert task["version"] == assigned["version"] + 1
+        with TestingSessionLocal() as db:
+            assert db.query(Task).filter(Task.owner_id == guest_id).count() == 0
+            # Unclaimed pooled guests never expire
+            assert db.query(User).filter(User.is_guest, User.claimed_at.is_(None)).count() == 1
+
+    async def test_reaper_works_in_batches(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that reaping commits per batch and pauses between batches."""
+        monkeypatch.setattr(settings, "GUEST_REAPER_BATCH_SIZE", 2)
+        monkeypatch.setattr(settings, "GUEST_REAPER_PAUSE_SECONDS", 0.0)
+        expired = utcnow() - timedelta(hours=settings.GUEST_TTL_HOURS + 1)
+        with TestingSessionLocal() as db:
+            db.add_all(
+                User(**{**guest_service._guest_values(), "claimed_at": expired}) for _ in range(5)
+            )
+            db.commit()
+
+        pauses: list[float] = []
+        sleep = asyncio.sleep
+
+        async def record_sleep(delay: float) -> None:
+            pauses.append(delay)
+            await sleep(delay)
+
+        monkeypatch.setattr(guest_service.asyncio, "sleep", record_sleep)
+        assert await guest_service.reap_expired_guests(TestingAsyncSessionLocal) == 5
+        assert len(pauses) == 2  # between the three batches of 2, 2 and 1
+        with TestingSessionLocal() as db:
+            assert db.query(User).count() == 0
+
+
+class TestUserSearch:
+    """Test suite for the user search typeahead."""
+
+    def add_users(self) -> None:
+        """Add a few users and a guest directly, without bcrypt."""
+        with TestingSessionLocal() as db:
+            for email, full_name in [
+                ("ada@example.com", "Ada Lovelace"),
+                ("alan.turing@example.com", "Alan Turing"),
+                ("grace@example.com", "Grace Hopper"),
+                ("linus@example.org", "Linus T"),
+            ]:
+                db.add(User(email=email, hashed_password="x", full_name=full_name))
+            db.add(User(email="inactive@example.com", hashed_password="x", is_active=False))
+            db.add(User(**guest_service._guest_values()))
+            db.commit()
+
+    def search(self, client: TestClient, token: str, **params: object) -> list[str]:
+        """Search and return the matching emails."""
+        response = client.get(
+            "/api/v1/auth/users/search",
+            params=params,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 200
+        return [user["email"] for user in response.json()]
+
+    def test_matches_name_and_email_words(self, client: TestClient, auth_token: str) -> None:
+        """Test case-insensitive prefix matches on any word of name or email."""
+        self.add_users()
+        assert self.search(client, auth_token, q="AL") == ["alan.turing@example.com"]
+        assert self.search(client, auth_token, q="hop") == ["grace@example.com"]
+        assert self.search(client, auth_token, q="turing") == ["alan.turing@example.com"]
+        assert self.search(client, auth_token, q="example.org") == ["linus@example.org"]
+        assert self.search(client, auth_token, q="inactive") == []
+        assert self.search(client, auth_token, q="zz") == []
+
+    def test_exclude_guests(self, client: TestClient, auth_token: str) -> None:
+        """Test that guests are listed unless excluded."""
+        self.add_users()
+        everyone = self.search(client, auth_token)
+        assert len(everyone) == 6  # four users, the test user and the guest
+        assert everyone == sorted(everyone)
+        members = self.search(client, auth_token, exclude_guests=True)
+        assert [email for email in everyone if "guest" not in email] == members
+
+    def test_pages_with_cursor(self, client: TestClient, auth_token: str) -> None:
+        """Test that pages follow on from each other without gaps or repeats."""
+        self.add_users()
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        emails: list[str] = []
+        cursor = None
+        while True:
+            params: dict[str, object] = {"limit": 2, "exclude_guests": True}
+            if cursor is not None:
+                params["cursor"] = cursor
+            response = client.get("/api/v1/auth/users/search", params=params, headers=headers)
+            emails += [user["email"] for user in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+        assert emails == self.search(client, auth_token, exclude_guests=True)
+
+        response = client.get(
+            "/api/v1/auth/users/search", params={"cursor": "%%%"}, headers=headers
+        )
+        assert response.status_code == 400
+
+    def test_sees_user_changes(self, client: TestClient, auth_token: str) -> None:
+        """Test that new and deactivated users show up in the next search."""
+        assert self.search(client, auth_token, q="ada") == []
+        self.add_users()
+        assert self.search(client, auth_token, q="ada") == ["ada@example.com"]
+
+        with TestingSessionLocal() as db:
+            db.query(User).filter(User.email == "ada@example.com").one().is_active = False
+            db.commit()
+        assert self.search(client, auth_token, q="ada") == []
+
+    def test_updates_index_in_place(self, client: TestClient, auth_token: str) -> None:
+        """Test that user inserts and updates do not rebuild the directory."""
+        self.add_users()
+        assert self.search(client, auth_token, q="ada") == ["ada@example.com"]
+        built_at = user_directory._built_at
+
+        with TestingSessionLocal() as db:
+            db.add(User(email="adele@example.com", hashed_password="x", full_name="Adele"))
+            db.query(User).filter(User.email == "ada@example.com").one().is_active = False
+            db.commit()
+        assert self.search(client, auth_token, q="ad") == ["adele@example.com"]
+        assert user_directory._built_at == built_at
@@ -0,0 +1,341 @@
+"""Tests for the cross-worker WebSocket backplane."""
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+import psycopg2
+import pytest
+
+from app.core.backplane import (
+    MAX_NOTIFY_PAYLOAD,
+    Envelope,
+    InProcessBackplane,
+    PostgresBackplane,
+    SocketBackplane,
+    SocketBroker,
+    split_payload,
+)
+from app.core.websocket_manager import ConnectionManager
+from app.tests.test_websocket import FakeWebSocket
+
+
+async def wait_for(predicate: Any, timeout: float = 2.0) -> None:
+    """Poll until predicate() is truthy."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met before timeout")
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def broker() -> Any:
+    """Run a socket broker for the duration of a test."""
+    broker = SocketBroker()
+    broker.start()
+    yield broker
+    broker.stop()
+
+
+@pytest.fixture
+async def remote_worker(broker: SocketBroker) -> AsyncIterator[tuple[SocketBackplane, list]]:
+    """Attach the manager and a simulated second worker to the broker."""
+    manager = ConnectionManager()
+    await manager.start_backplane(SocketBackplane(broker.host, broker.port))
+
+    received: list[Envelope] = []
+    remote = SocketBackplane(broker.host, broker.port)
+    remote.subscribe(received.append)
+    await remote.start()
+
+    yield remote, received
+
+    await remote.stop()
+    await manager.stop_backplane()
+
+
+class TestInProcessBackplane:
+    """Test suite for envelopes arriving from other workers."""
+
+    async def test_remote_task_event_reaches_local_socket(self) -> None:
+        """Test that a task event published elsewhere is delivered locally."""
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        manager.connect(5, websocket).start()
+
+        await manager.backplane.publish({
+            "origin": "other-worker",
+            "kind": "task",
+            "task_id": 1,
+            "visible_to": [5],
+            "removed": False,
+            "message": {"type": "task_created", "task": {"id": 1}},
+        })
+        await asyncio.sleep(0)
+
+        assert websocket.sent == [{"type": "task_created", "task": {"id": 1}, "seq": 1}]
+        assert manager.task_subscribers[1] == frozenset({5})
+
+    async def test_own_envelopes_are_ignored(self) -> None:
+        """Test that a worker does not deliver its own events twice."""
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        manager.connect(5, websocket).start()
+
+        await manager.send_personal_message({"type": "hello"}, 5)
+        await asyncio.sleep(0)
+
+        assert websocket.sent == [{"type": "hello", "seq": 1}]
+
+    async def test_remote_presence(self) -> None:
+        """Test that users connected to other workers count as online."""
+        manager = ConnectionManager()
+        backplane = InProcessBackplane()
+        backplane.subscribe(manager._on_backplane_message)
+        manager.connect(1, "ws1")
+
+        backplane._deliver({"origin": "w2", "kind": "presence", "joined": [2, 3], "left": []})
+        assert set(manager.get_active_users()) == {1, 2, 3}
+        assert manager.get_presence_info(2)["is_online"] is True
+
+        backplane._deliver({"origin": "w2", "kind": "presence", "joined": [], "left": [3]})
+        assert set(manager.get_active_users()) == {1, 2}
+
+        backplane._deliver({"origin": "w2", "kind": "presence", "reset": True, "joined": []})
+        assert manager.get_active_users() == [1]
+
+
+    async def test_resume_is_per_worker(self) -> None:
+        """Test that a client moving to another worker resyncs instead of replaying."""
+        manager = ConnectionManager()
+        manager.connect(5, FakeWebSocket())
+        await manager.backplane.publish({
+            "origin": "other-worker",
+            "kind": "users",
+            "users": [5],
+            "message": {"type": "hello"},
+        })
+        assert manager.event_seq == 1
+
+        # The event is buffered here, but seq 0 on the other worker's stream
+        # says nothing about where the client stands in this one
+        moved = manager.connect(5, FakeWebSocket())
+        assert not manager.resume(moved, 0, "other-worker")
+        assert [message.type for message in moved._queue] == ["resync_required"]
+
+        # Returning to the same worker replays the gap
+        returned = manager.connect(5, FakeWebSocket())
+        assert manager.resume(returned, 0, manager.stream_id)
+        assert [message.payload for message in returned._queue] == [
+            {"type": "hello", "seq": 1}
+        ]
+
+
+class TestPeerExpiry:
+    """Test suite for dropping the users of workers that stop publishing."""
+
+    async def test_silent_worker_users_expire(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a crashed worker's users go offline and return when it does."""
+        manager = ConnectionManager()
+        monkeypatch.setattr(manager, "presence_debounce", 0)
+        published: list[Envelope] = []
+        manager.backplane.subscribe(published.append)
+        manager.connect(1, FakeWebSocket())
+        manager._on_backplane_message(
+            {"origin": "w2", "kind": "presence", "joined": [2], "left": []}
+        )
+        assert set(manager.get_active_users()) == {1, 2}
+
+        # Heard from recently: nothing expires
+        assert manager.expire_peers() == 0
+        assert manager.expire_peers(now=time.monotonic() + manager.peer_ttl + 1) == 1
+        assert manager.get_active_users() == [1]
+        assert manager._presence_published == {1}
+
+        # A heartbeat from the expired worker asks it for its users again
+        manager._on_backplane_message({"origin": "w2", "kind": "alive"})
+        await asyncio.sleep(0)
+        assert {"origin": manager.node_id, "kind": "presence_sync", "to": "w2"} in published
+
+    async def test_sync_addressed_to_another_worker_is_ignored(self) -> None:
+        """Test that only the worker a presence_sync names answers it."""
+        manager = ConnectionManager()
+        published: list[Envelope] = []
+        manager.backplane.subscribe(published.append)
+        manager.connect(1, FakeWebSocket())
+
+        manager._on_backplane_message({"origin": "w2", "kind": "presence_sync", "to": "w3"})
+        await asyncio.sleep(0)
+        assert published == []
+
+        manager._on_backplane_message(
+            {"origin": "w2", "kind": "presence_sync", "to": manager.node_id}
+        )
+        await asyncio.sleep(0)
+        assert published[0]["joined"] == [1]
+
+
+class TestChunking:
+    """Test suite for envelopes larger than one NOTIFY."""
+
+    async def test_large_envelope_is_reassembled(self) -> None:
+        """Test that an oversized envelope arrives whole, after all its chunks."""
+        backplane = InProcessBackplane()
+        received: list[Envelope] = []
+        backplane.subscribe(received.append)
+        await backplane.start()
+
+        envelope = {"kind": "broadcast", "message": {"type": "bulk", "ids": list(range(5000))}}
+        frames = split_payload(json.dumps(envelope), 1000)
+        assert len(frames) > 1
+        assert all(len(frame.encode("utf-8")) <= 1000 for frame in frames)
+
+        # Another envelope's chunks may arrive in between
+        other = split_payload(json.dumps({"kind": "broadcast", "message": "é" * 800}), 1000)
+        for frame in [*frames[:-1], *other, frames[-1]]:
+            backplane._receive(frame)
+        await asyncio.sleep(0)
+
+        assert [item["message"] for item in received] == ["é" * 800, envelope["message"]]
+        assert backplane._chunks == {}
+
+    def test_small_envelope_is_sent_as_is(self) -> None:
+        """Test that envelopes within the limit are not chunked."""
+        payload = json.dumps({"kind": "presence_sync"})
+        assert split_payload(payload, MAX_NOTIFY_PAYLOAD) == [payload]
+
+    def test_incomplete_envelopes_are_bounded(self) -> None:
+        """Test that chunk sets missing a frame are eventually dropped."""
+        backplane = InProcessBackplane()
+        backplane.max_pending_chunks = 2
+        for _ in range(3):
+            backplane._receive(split_payload(json.dumps({"data": "x" * 2000}), 1000)[0])
+        assert len(backplane._chunks) == 2
+
+
+class FakeCursor:
+    """psycopg2 cursor stand-in that records NOTIFY payloads."""
+
+    def __init__(self, connection: "FakeConnection") -> None:
+        self.connection = connection
+
+    def __enter__(self) -> "FakeCursor":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        pass
+
+    def execute(self, query: str, params: tuple[str, str]) -> None:
+        if self.connection.fail_after is not None:
+            if self.connection.fail_after == 0:
+                self.connection.closed = 2
+                raise psycopg2.OperationalError("server closed the connection unexpectedly")
+            self.connection.fail_after -= 1
+        self.connection.sent.append(params[1])
+
+
+class FakeConnection:
+    """psycopg2 connection stand-in that can fail after some statements."""
+
+    def __init__(self, fail_after: int | None = None) -> None:
+        self.fail_after = fail_after
+        self.closed = 0
+        self.sent: list[str] = []
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self)
+
+    def close(self) -> None:
+        self.closed = 1
+
+
+class TestPostgresPublisher:
+    """Test suite for publishing with NOTIFY."""
+
+    def test_publisher_reconnects_and_resumes(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a lost connection is replaced and only unsent frames are resent."""
+        backplane = PostgresBackplane("postgresql://localhost/test")
+        broken, fresh = FakeConnection(fail_after=1), FakeConnection()
+        backplane._publisher = broken
+        monkeypatch.setattr(backplane, "_connect", lambda: fresh)
+
+        backplane._notify(["a", "b", "c"])
+        assert broken.sent == ["a"]
+        assert fresh.sent == ["b", "c"]
+        assert backplane._publisher is fresh
+
+    def test_publisher_gives_up_after_one_retry(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a database that stays down fails the publish, then recovers."""
+        backplane = PostgresBackplane("postgresql://localhost/test")
+        backplane._publisher = FakeConnection(fail_after=0)
+        monkeypatch.setattr(backplane, "_connect", lambda: FakeConnection(fail_after=0))
+        with pytest.raises(psycopg2.OperationalError):
+            backplane._notify(["a"])
+        assert backplane._publisher is None
+
+        fresh = FakeConnection()
+        monkeypatch.setattr(backplane, "_connect", lambda: fresh)
+        backplane._notify(["a"])
+        assert fresh.sent == ["a"]
+
+
+class TestSocketBackplane:
+    """Test suite for the socket broker transport."""
+
+    async def test_broker_relays_between_clients(self, broker: SocketBroker) -> None:
+        """Test that an envelope published by one client reaches the other."""
+        received: list[Envelope] = []
+        first = SocketBackplane(broker.host, broker.port)
+        second = SocketBackplane(broker.host, broker.port)
+        second.subscribe(received.append)
+        await first.start()
+        await second.start()
+        await wait_for(lambda: len(broker._clients) == 2)
+
+        await first.publish({"kind": "broadcast", "message": {"type": "ping"}})
+        await wait_for(lambda: received)
+
+        assert received == [{"kind": "broadcast", "message": {"type": "ping"}}]
+        await first.stop()
+        await second.stop()
+
+    async def test_events_cross_workers(self, remote_worker: tuple) -> None:
+        """Test that events flow both ways between the manager and another worker."""
+        remote, received = remote_worker
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        manager.connect(7, websocket).start()
+
+        # Local broadcast reaches the other worker
+        await manager.broadcast({"type": "task_deleted", "task_id": 3})
+        await wait_for(
+            lambda: any(envelope.get("kind") == "broadcast" for envelope in received)
+        )
+
+        # The other worker's event reaches the local socket
+        await remote.publish({
+            "origin": "remote",
+            "kind": "users",
+            "users": [7],
+            "message": {"type": "task_updated", "task": {"id": 3}},
+        })
+        await wait_for(
+            lambda: {"type": "task_updated", "task": {"id": 3}, "seq": 2} in websocket.sent
+        )
+
+    async def test_presence_snapshot_on_sync(self, remote_worker: tuple) -> None:
+        """Test that a worker answers presence_sync with its connected users."""
+        remote, received = remote_worker
+        manager = ConnectionManager()
+        manager.connect(7, FakeWebSocket())
+
+        await remote.publish({"origin": "remote", "kind": "presence_sync"})
+        await wait_for(
+            lambda: any(
+                envelope.get("kind") == "presence" and envelope.get("reset")
+                and envelope.get("joined") == [7]
+                for envelope in received
+            )
+        )
@@ -0,0 +1,124 @@
+"""Tests for database instrumentation."""
+import logging
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.core import db_metrics
+from app.core.config import settings
+from app.core.db_metrics import TimedQueuePool, instrument_engine
+from app.models.user import User
+from app.tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def superuser_token(client: TestClient, auth_token: str) -> str:
+    """Promote the test user to superuser and return their token."""
+    with TestingSessionLocal() as db:
+        user = db.query(User).filter(User.email == "testuser@example.com").one()
+        user.is_superuser = True
+        db.commit()
+    return auth_token
+
+
+class TestRequestMetrics:
+    """Test suite for per-route query stats."""
+
+    def test_queries_counted_per_route(self, client: TestClient, superuser_token: str) -> None:
+        """Test that each route reports its query count and DB time."""
+        headers = {"Authorization": f"Bearer {superuser_token}"}
+        db_metrics.reset_metrics()
+        client.post("/api/v1/tasks", json={"title": "A"}, headers=headers)
+        client.get("/api/v1/tasks", headers=headers)
+        client.get("/api/v1/tasks", headers=headers)
+
+        response = client.get("/api/v1/internal/db-metrics", headers=headers)
+        assert response.status_code == 200
+        routes = response.json()["routes"]
+
+        listing = routes["GET /api/v1/tasks"]
+        assert listing["requests"] == 2
+        # ETag check + task query, twice; the user comes from the cache warmed by the POST
+        assert listing["queries"] == 4
+        assert listing["max_queries"] == 2
+        assert listing["db_time_ms"] > 0
+        assert routes["POST /api/v1/tasks"]["requests"] == 1
+        assert response.json()["user_cache"]["hits"] > 0
+
+    def test_unmatched_paths_share_a_bucket(self, client: TestClient) -> None:
+        """Test that arbitrary URLs do not grow the route table."""
+        db_metrics.reset_metrics()
+        client.get("/no/such/path")
+        client.get("/another/missing/path")
+
+        assert db_metrics.get_route_stats()["GET <unmatched>"]["requests"] == 2
+
+    def test_routes_grouped_by_template(self, client: TestClient, auth_token: str) -> None:
+        """Test that requests are grouped by path template, not by URL."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        db_metrics.reset_metrics()
+        client.get("/api/v1/tasks/1", headers=headers)
+        client.get("/api/v1/tasks/2", headers=headers)
+        client.get("/health")
+
+        routes = db_metrics.get_route_stats()
+        assert routes["GET /api/v1/tasks/{task_id}"]["requests"] == 2
+        assert routes["GET /health"]["requests"] == 1
+        assert "GET <unmatched>" not in routes
+
+    def test_metrics_require_superuser(self, client: TestClient, auth_token: str) -> None:
+        """Test that ordinary users cannot read the metrics."""
+        response = client.get(
+            "/api/v1/internal/db-metrics",
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+        assert response.status_code == 403
+
+    def test_slow_queries_logged_with_route(
+        self,
+        client: TestClient,
+        auth_token: str,
+        monkeypatch: pytest.MonkeyPatch,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        """Test that queries over the threshold are logged with their route."""
+        monkeypatch.setattr(settings, "DB_SLOW_QUERY_MS", 0.0)
+        with caplog.at_level(logging.WARNING, logger="app.db.slow"):
+            client.get("/api/v1/tasks", headers={"Authorization": f"Bearer {auth_token}"})
+
+        messages = [record.getMessage() for record in caplog.records]
+        assert any("GET /api/v1/tasks" in message and "FROM tasks" in message
+                   for message in messages)
+
+
+class TestPoolMetrics:
+    """Test suite for connection pool stats."""
+
+    def test_pool_reports_usage_and_timeouts(self, tmp_path: Any) -> None:
+        """Test that checkouts, in-use connections and timeouts are reported."""
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=TimedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+        )
+        instrument_engine(engine, "test")
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                with pytest.raises(PoolTimeoutError):
+                    engine.connect()
+
+                stats = db_metrics.get_pool_stats()["test"]
+                assert stats["checked_out"] == 1
+                assert stats["size"] == 1
+                assert stats["wait"]["checkouts"] == 1
+                assert stats["wait"]["timeouts"] == 1
+                assert stats["wait"]["max_wait_ms"] >= 50
+        finally:
+            db_metrics._engines.pop("test")
+            engine.dispose()
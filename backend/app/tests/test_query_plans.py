@@ -0,0 +1,435 @@
+"""Query-plan regression tests: task queries must be served by an index."""
+import asyncio
+import os
+import re
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import pytest
+from alembic.command import downgrade, upgrade
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.etags import task_etag
+from app.core.ranking import evenly_spaced_ranks
+from app.core.read_routing import ReadRouter
+from app.main import app
+from app.models import base
+from app.models.task import Task
+from app.models.user import User
+from app.services import task_service
+from app.services.auth_service import create_user_token
+from app.tests.conftest import TestingSessionLocal, async_engine, engine
+
+SEED_USERS = 50
+SEED_TASKS = 20_000
+STATUSES = ("todo", "in_progress", "done")
+
+# A throwaway Postgres database for the plan tests that need the real
+# planner and the indexes the migrations build; skipped when unset
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Board filter and ordering shapes, with the index that should serve each
+BOARD_QUERIES = [
+    pytest.param(
+        select(Task).where(Task.owner_id == 1, Task.status == "todo"),
+        "ix_tasks_owner_id_status_rank",
+        id="owner_status",
+    ),
+    pytest.param(
+        select(Task).where(Task.assigned_to_id == 1, Task.status == "todo"),
+        "ix_tasks_assigned_to_id_status",
+        id="assignee_status",
+    ),
+    pytest.param(
+        select(Task).where(Task.assigned_to_id == 1),
+        "ix_tasks_assigned_to_id_status",
+        id="assignee",
+    ),
+    pytest.param(
+        select(Task)
+        .where(Task.owner_id == 1)
+        .order_by(Task.updated_at.desc(), Task.id.desc())
+        .limit(50),
+        "ix_tasks_owner_id_updated_at_id",
+        id="owner_recent",
+    ),
+    pytest.param(
+        task_service._column_query(1, "todo"),
+        "ix_tasks_owner_id_status_rank",
+        id="column_order",
+    ),
+    pytest.param(
+        task_service._last_rank_query(1, "todo"),
+        "ix_tasks_owner_id_status_rank",
+        id="column_last_rank",
+    ),
+    pytest.param(
+        task_service._next_rank_query(1, "todo", "i", 1),
+        "ix_tasks_owner_id_status_rank",
+        id="column_next_rank",
+    ),
+]
+
+
+TASKS_TABLE = re.compile(r"\btasks\b")
+
+
+@contextmanager
+def captured_queries(bind: Engine) -> Iterator[list[tuple[str, Any]]]:
+    """Collect the statements (other than INSERTs) on tasks executed on an engine."""
+    queries: list[tuple[str, Any]] = []
+
+    def record(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        if (
+            TASKS_TABLE.search(statement)
+            and not statement.lstrip().upper().startswith("INSERT")
+        ):
+            queries.append((statement, parameters))
+
+    event.listen(bind, "before_cursor_execute", record)
+    try:
+        yield queries
+    finally:
+        event.remove(bind, "before_cursor_execute", record)
+
+
+def full_scans(db: Session, statement: str, parameters: Any) -> list[str]:
+    """Return the plan steps that scan the whole tasks table."""
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return [row[3] for row in rows if row[3].startswith("SCAN tasks")]
+
+
+def seed(db: Session) -> None:
+    """Fill the tables with enough users and tasks for the planner to care."""
+    db.execute(insert(User), [
+        {"id": user_id, "email": f"user{user_id}@example.com", "hashed_password": "x"}
+        for user_id in range(1, SEED_USERS + 1)
+    ])
+    start = datetime(2026, 1, 1)
+    ranks = evenly_spaced_ranks(SEED_TASKS)
+    db.execute(insert(Task), [
+        {
+            "title": f"Task {n}",
+            "status": STATUSES[n % len(STATUSES)],
+            "priority": "medium",
+            "rank": ranks[n],
+            "owner_id": n % SEED_USERS + 1,
+            "assigned_to_id": (n * 7) % SEED_USERS + 1,
+            "created_at": start,
+            "updated_at": start + timedelta(minutes=n),
+        }
+        for n in range(SEED_TASKS)
+    ])
+    db.commit()
+    db.execute(text("ANALYZE"))
+    db.commit()
+
+
+@pytest.fixture
+def seeded_db() -> Iterator[Session]:
+    """A session over a tasks table large enough for the planner to care."""
+    with TestingSessionLocal() as db:
+        seed(db)
+        yield db
+
+
+def exercise_task_routes(client: TestClient) -> None:
+    """
+    Call every task route as seeded user 1, the way the board does.
+
+    Covers creates, the list fingerprint and its keyset pages, the export,
+    reads, updates including a stale ``If-Match``, moves, a column
+    rebalance, a batch and a delete.
+    """
+    headers = {"Authorization": f"Bearer {create_user_token('user1@example.com')}"}
+
+    response = client.post("/api/v1/tasks", json={"title": "New"}, headers=headers)
+    assert response.status_code == 201
+    task = response.json()
+
+    response = client.get("/api/v1/tasks", params={"limit": 50}, headers=headers)
+    assert response.status_code == 200
+    others = [other for other in response.json() if other["id"] != task["id"]]
+    response = client.get(
+        "/api/v1/tasks",
+        params={"limit": 50, "cursor": response.headers["X-Next-Cursor"]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    response = client.get("/api/v1/tasks/export", params={"format": "csv"}, headers=headers)
+    assert response.status_code == 200
+
+    response = client.get(f"/api/v1/tasks/{task['id']}", headers=headers)
+    assert response.status_code == 200
+
+    response = client.put(
+        f"/api/v1/tasks/{task['id']}",
+        json={"title": "Renamed"},
+        headers={**headers, "If-Match": task_etag(task["id"], task["version"])},
+    )
+    assert response.status_code == 200
+    # The old ETag no longer matches, which is answered from _exists_query
+    response = client.put(
+        f"/api/v1/tasks/{task['id']}",
+        json={"title": "Stale"},
+        headers={**headers, "If-Match": task_etag(task["id"], task["version"])},
+    )
+    assert response.status_code == 412
+
+    after = next(other for other in others if other["status"] == "done")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        # Every rank is now too long, so the move also compacts the column
+        monkeypatch.setattr(settings, "TASK_RANK_MAX_LENGTH", 0)
+        response = client.post(
+            f"/api/v1/tasks/{task['id']}/move",
+            json={"status": "done", "after_id": after["id"]},
+            headers=headers,
+        )
+    assert response.status_code == 200
+
+    response = client.post(
+        "/api/v1/tasks/batch",
+        json={
+            "create": [{"title": "Batched"}],
+            "update": [
+                {"id": other["id"], "status": "in_progress"} for other in others[1:3]
+            ],
+            "delete": [others[3]["id"]],
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    response = client.delete(f"/api/v1/tasks/{task['id']}", headers=headers)
+    assert response.status_code == 204
+
+
+def statement_kinds(queries: list[tuple[str, Any]]) -> set[str]:
+    """Return the SQL verbs among captured statements."""
+    return {statement.split(None, 1)[0].upper() for statement, _ in queries}
+
+
+class TestTaskQueryPlans:
+    """Test suite asserting no task query falls back to a full table scan."""
+
+    def test_route_queries_use_indexes(self, seeded_db: Session, client: TestClient) -> None:
+        """Test every query the task routes run, sync and async, against the seeded table."""
+        with (
+            captured_queries(engine) as sync_queries,
+            captured_queries(async_engine.sync_engine) as async_queries,
+        ):
+            exercise_task_routes(client)
+
+        queries = sync_queries + async_queries
+        assert statement_kinds(queries) == {"SELECT", "UPDATE", "DELETE"}
+        for statement, parameters in queries:
+            assert full_scans(seeded_db, statement, parameters) == [], statement
+
+    @pytest.mark.parametrize(("query", "index"), BOARD_QUERIES)
+    def test_board_access_patterns_use_indexes(
+        self, seeded_db: Session, query: Any, index: str
+    ) -> None:
+        """Test the board's filter and ordering shapes."""
+        compiled = query.compile(engine)
+        statement = str(compiled)
+        parameters = tuple(compiled.params[name] for name in compiled.positiontup)
+
+        assert full_scans(seeded_db, statement, parameters) == []
+
+        plan = " ".join(
+            row[3] for row in seeded_db.connection().exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            )
+        )
+        assert "USE TEMP B-TREE" not in plan  # ordering comes from the index
+        assert index in plan
+
+
+def postgres_plan(db: Session, statement: str, parameters: Any) -> list[dict[str, Any]]:
+    """Return every node of a statement's Postgres plan."""
+    document = db.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {statement}", parameters
+    ).scalar_one()
+    return plan_nodes(document)
+
+
+async def postgres_async_plans(
+    bind: AsyncEngine, queries: list[tuple[str, Any]]
+) -> list[list[dict[str, Any]]]:
+    """Return the plan nodes of statements captured on an asyncpg engine."""
+    async with bind.connect() as conn:
+        return [
+            plan_nodes((await conn.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters
+            )).scalar_one())
+            for statement, parameters in queries
+        ]
+
+
+def plan_nodes(document: Any) -> list[dict[str, Any]]:
+    """Flatten an ``EXPLAIN (FORMAT JSON)`` document into its nodes."""
+    nodes, pending = [], [document[0]["Plan"]]
+    while pending:
+        node = pending.pop()
+        nodes.append(node)
+        pending.extend(node.get("Plans", []))
+    return nodes
+
+
+def seq_scans(nodes: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Return the plan nodes that scan the whole tasks table."""
+    return [
+        node for node in nodes
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") == "tasks"
+    ]
+
+
+@pytest.fixture(scope="module")
+def postgres_engine() -> Iterator[Engine]:
+    """
+    A Postgres database migrated to head and seeded.
+
+    Running the migrations rather than create_all() means the plans use the
+    indexes production gets: built CONCURRENTLY, over the C-collated rank.
+    """
+    if not POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+
+    config = Config(str(ALEMBIC_INI))
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        # alembic/env.py migrates whatever settings.DATABASE_URL names
+        monkeypatch.setattr(settings, "DATABASE_URL", POSTGRES_URL)
+        upgrade(config, "head")
+        postgres = create_engine(POSTGRES_URL)
+        try:
+            with Session(postgres) as db:
+                seed(db)
+            yield postgres
+        finally:
+            postgres.dispose()
+            downgrade(config, "base")
+
+
+def route_to(
+    monkeypatch: pytest.MonkeyPatch,
+    sessions: sessionmaker,
+    async_sessions: async_sessionmaker[AsyncSession],
+) -> None:
+    """Serve the app's database dependencies from other session factories."""
+
+    def get_db() -> Iterator[Session]:
+        with sessions() as db:
+            yield db
+
+    async def get_async_db() -> AsyncIterator[AsyncSession]:
+        async with async_sessions() as db:
+            yield db
+
+    overrides = {
+        base.get_db: get_db,
+        base.get_read_router: lambda: ReadRouter(sessions, []),
+        base.get_session_factory: lambda: sessions,
+        base.get_async_db: get_async_db,
+        base.get_async_session_factory: lambda: async_sessions,
+    }
+    for dependency, override in overrides.items():
+        monkeypatch.setitem(app.dependency_overrides, dependency, override)
+
+
+@pytest.fixture
+def postgres_db(postgres_engine: Engine) -> Iterator[Session]:
+    """A session on the seeded Postgres database."""
+    with Session(postgres_engine) as db:
+        yield db
+
+
+@pytest.mark.postgres
+class TestPostgresQueryPlans:
+    """Test suite asserting Postgres serves task queries from the migrated indexes."""
+
+    def test_route_queries_use_indexes(
+        self,
+        postgres_engine: Engine,
+        postgres_db: Session,
+        client: TestClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test every query the task routes run, sync and async, against the seeded table."""
+        assert POSTGRES_URL
+        async_postgres = create_async_engine(
+            base.get_async_database_url(POSTGRES_URL), poolclass=NullPool
+        )
+        route_to(
+            monkeypatch,
+            sessionmaker(bind=postgres_engine, autoflush=False),
+            async_sessionmaker(bind=async_postgres, autoflush=False, expire_on_commit=False),
+        )
+
+        with (
+            captured_queries(postgres_engine) as sync_queries,
+            captured_queries(async_postgres.sync_engine) as async_queries,
+        ):
+            exercise_task_routes(client)
+
+        assert statement_kinds(sync_queries + async_queries) == {"SELECT", "UPDATE", "DELETE"}
+        for statement, parameters in sync_queries:
+            assert seq_scans(postgres_plan(postgres_db, statement, parameters)) == [], statement
+        plans = asyncio.run(postgres_async_plans(async_postgres, async_queries))
+        for (statement, _), nodes in zip(async_queries, plans, strict=True):
+            assert seq_scans(nodes) == [], statement
+
+    def test_migrated_indexes(self, postgres_db: Session) -> None:
+        """Test the concurrently built indexes are valid and ranks sort bytewise."""
+        rows = postgres_db.execute(text(
+            "SELECT c.relname, i.indisvalid, i.indcollation::oid[] AS collations"
+            " FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid"
+            " WHERE i.indrelid = 'tasks'::regclass"
+        )).all()
+        indexes = {row.relname: row for row in rows}
+
+        # A failed CREATE INDEX CONCURRENTLY leaves an invalid index behind
+        assert {param.values[1] for param in BOARD_QUERIES} <= set(indexes)
+        assert all(row.indisvalid for row in rows)
+
+        # The third key of the rank index must compare ranks as Python does
+        collation = postgres_db.scalar(
+            text("SELECT collname FROM pg_collation WHERE oid = :oid"),
+            {"oid": indexes["ix_tasks_owner_id_status_rank"].collations[2]},
+        )
+        assert collation == "C"
+
+    @pytest.mark.parametrize(("query", "index"), BOARD_QUERIES)
+    def test_board_access_patterns_use_indexes(
+        self, postgres_engine: Engine, postgres_db: Session, query: Any, index: str
+    ) -> None:
+        """Test the board's filter and ordering shapes, including rank order."""
+        compiled = query.compile(postgres_engine)
+        statement = str(compiled)
+        nodes = postgres_plan(postgres_db, statement, compiled.params)
+
+        assert seq_scans(nodes) == []
+        assert index in {node.get("Index Name") for node in nodes}
+        if "LIMIT" in statement:
+            # Top-N reads must walk the index in order rather than sort
+            assert not any(
+                node["Node Type"] in ("Sort", "Incremental Sort") for node in nodes
+            ), statement
@@ -0,0 +1,158 @@
+"""Tests for rate limiting and load shedding of the authentication endpoints."""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.rate_limit import (
+    AuthRateLimiter,
+    BucketStore,
+    DatabaseBucketStore,
+    MemoryBucketStore,
+    RateLimitedError,
+    auth_rate_limiter,
+)
+from app.tests.conftest import async_engine
+
+
+@pytest.fixture(params=["memory", "database"])
+def store(request: pytest.FixtureRequest) -> BucketStore:
+    """Each bucket store, which must behave the same."""
+    if request.param == "memory":
+        return MemoryBucketStore()
+    return DatabaseBucketStore(async_engine, cleanup_every=1)
+
+
+class TestBucketStores:
+    """Test suite for token bucket storage."""
+
+    async def test_burst_then_refill(self, store: BucketStore) -> None:
+        """Test that a bucket allows its burst, then one request per refilled token."""
+        for _ in range(3):
+            assert await store.take("k", 3, 0.5, now=1000.0) == 0
+        assert await store.take("k", 3, 0.5, now=1000.0) == pytest.approx(2.0)
+        # A refused request does not use up anything
+        assert await store.take("k", 3, 0.5, now=1001.0) == pytest.approx(1.0)
+        assert await store.take("k", 3, 0.5, now=1002.0) == 0
+        assert await store.take("k", 3, 0.5, now=1002.0) > 0
+
+        # Buckets never hold more than their capacity, and are independent
+        for _ in range(3):
+            assert await store.take("k", 3, 0.5, now=5000.0) == 0
+        assert await store.take("k", 3, 0.5, now=5000.0) > 0
+        assert await store.take("other", 3, 0.5, now=5000.0) == 0
+
+    async def test_clock_skew_does_not_refill_backwards(self, store: BucketStore) -> None:
+        """Test that a take stamped earlier than the last one is not penalized."""
+        assert await store.take("k", 1, 1.0, now=1000.0) == 0
+        assert await store.take("k", 1, 1.0, now=999.0) == pytest.approx(1.0)
+        assert await store.take("k", 1, 1.0, now=1001.0) == 0
+
+    async def test_memory_store_is_bounded(self) -> None:
+        """Test that the least recently used buckets are forgotten (and so refilled)."""
+        store = MemoryBucketStore(max_keys=2)
+        await store.take("a", 1, 0.001, now=0.0)
+        await store.take("b", 1, 0.001, now=0.0)
+        await store.take("c", 1, 0.001, now=0.0)
+        assert await store.take("a", 1, 0.001, now=0.0) == 0
+
+
+class TestAuthRateLimits:
+    """Test suite for the limits on login, registration and guest endpoints."""
+
+    def test_ip_limit(self, client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that one address is throttled without affecting other endpoints."""
+        monkeypatch.setattr(settings, "AUTH_RATE_LIMIT_IP_BURST", 3)
+        for _ in range(3):
+            assert client.post("/api/v1/auth/guest").status_code == 200
+
+        response = client.post("/api/v1/auth/guest")
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        response = client.post(
+            "/api/v1/auth/login", json={"email": "a@example.com", "password": "x"}
+        )
+        assert response.status_code == 429
+        assert client.get("/health").status_code == 200
+
+    def test_account_limit(
+        self, client: TestClient, auth_token: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that guessing one account's password is throttled per account."""
+        monkeypatch.setattr(settings, "AUTH_RATE_LIMIT_ACCOUNT_BURST", 2)
+        auth_rate_limiter.store.clear()
+        attempt = {"email": "testuser@example.com", "password": "wrongpassword"}
+        for _ in range(2):
+            assert client.post("/api/v1/auth/login", json=attempt).status_code == 401
+
+        response = client.post("/api/v1/auth/login", json=attempt)
+        assert response.status_code == 429
+        assert "Retry-After" in response.headers
+        other = {"email": "someone@example.com", "password": "wrongpassword"}
+        assert client.post("/api/v1/auth/login", json=other).status_code == 401
+
+        # Authenticated traffic is unaffected
+        response = client.get(
+            "/api/v1/tasks", headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        assert response.status_code == 200
+
+    def test_saturated_endpoints_shed_load(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that requests beyond the in-flight cap get 503 at once."""
+        monkeypatch.setattr(auth_rate_limiter, "max_concurrent", 1)
+        assert auth_rate_limiter.try_acquire()
+        try:
+            response = client.post("/api/v1/auth/guest")
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == str(
+                settings.PASSWORD_HASH_RETRY_AFTER_SECONDS
+            )
+        finally:
+            auth_rate_limiter.release()
+        assert client.post("/api/v1/auth/guest").status_code == 200
+
+    def test_refusals_carry_cors_headers(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that browsers can read 429 and 503 responses from another origin."""
+        origin = settings.CORS_ORIGINS[0]
+        headers = {"Origin": origin}
+        monkeypatch.setattr(settings, "AUTH_RATE_LIMIT_IP_BURST", 1)
+        assert client.post("/api/v1/auth/guest", headers=headers).status_code == 200
+
+        response = client.post("/api/v1/auth/guest", headers=headers)
+        assert response.status_code == 429
+        assert response.headers["Access-Control-Allow-Origin"] == origin
+
+        monkeypatch.setattr(settings, "AUTH_RATE_LIMIT_IP_BURST", 0)
+        monkeypatch.setattr(auth_rate_limiter, "max_concurrent", 1)
+        assert auth_rate_limiter.try_acquire()
+        try:
+            response = client.post("/api/v1/auth/guest", headers=headers)
+        finally:
+            auth_rate_limiter.release()
+        assert response.status_code == 503
+        assert response.headers["Access-Control-Allow-Origin"] == origin
+
+    async def test_store_failure_allows_requests(self) -> None:
+        """Test that the limiter fails open if its store is unavailable."""
+        class BrokenStore(BucketStore):
+            async def take(self, *args: object, **kwargs: object) -> float:
+                raise ConnectionError("store is down")
+
+        limiter = AuthRateLimiter(BrokenStore())
+        await limiter.check_ip("10.0.0.1")
+        await limiter.check_account("a@example.com")
+
+    async def test_zero_turns_limit_off(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a limit of 0 never throttles."""
+        monkeypatch.setattr(settings, "AUTH_RATE_LIMIT_IP_BURST", 0)
+        limiter = AuthRateLimiter(MemoryBucketStore())
+        for _ in range(100):
+            await limiter.check_ip("10.0.0.1")
+
+        monkeypatch.setattr(settings, "AUTH_RATE_LIMIT_IP_BURST", 1)
+        await limiter.check_ip("10.0.0.1")
+        with pytest.raises(RateLimitedError):
+            await limiter.check_ip("10.0.0.1")
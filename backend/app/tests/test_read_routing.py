@@ -0,0 +1,151 @@
+"""Tests for routing reads to replica databases."""
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core import dependencies
+from app.core.config import settings
+from app.core.read_routing import ReadRouter, write_tracker
+from app.main import app
+from app.models.base import Base, get_read_router
+from app.models.task import Task
+from app.models.user import User
+from app.tests.conftest import TestingSessionLocal, override_get_read_router
+
+
+@pytest.fixture
+def replica(tmp_path: Any) -> Iterator[sessionmaker]:
+    """A second database standing in for a replica that has not caught up."""
+    replica_engine = create_engine(
+        f"sqlite:///{tmp_path / 'replica.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(bind=replica_engine)
+    replica_session = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    router = ReadRouter(TestingSessionLocal, [replica_session])
+
+    write_tracker.clear()
+    app.dependency_overrides[get_read_router] = lambda: router
+    try:
+        yield replica_session
+    finally:
+        app.dependency_overrides[get_read_router] = override_get_read_router
+        write_tracker.clear()
+        replica_engine.dispose()
+
+
+def replicate_users(replica: sessionmaker) -> None:
+    """Copy the primary's users to the replica."""
+    with TestingSessionLocal() as primary_db, replica() as replica_db:
+        rows = primary_db.execute(select(User.__table__)).mappings().all()
+        replica_db.execute(insert(User), [dict(row) for row in rows])
+        replica_db.commit()
+
+
+class TestReadRouting:
+    """Test suite for replica reads and read-your-writes stickiness."""
+
+    def test_reads_go_to_replica(
+        self, client: TestClient, auth_token: str, replica: sessionmaker
+    ) -> None:
+        """Test that read-only routes are served from the replica."""
+        replicate_users(replica)
+        with replica() as replica_db:
+            user_id = replica_db.scalar(select(User.id))
+            replica_db.add(Task(title="Only on replica", owner_id=user_id, rank="i"))
+            replica_db.commit()
+        headers = {"Authorization": f"Bearer {auth_token}"}
+
+        tasks = client.get("/api/v1/tasks", headers=headers).json()
+        assert [task["title"] for task in tasks] == ["Only on replica"]
+        assert client.get(f"/api/v1/tasks/{tasks[0]['id']}", headers=headers).status_code == 200
+        assert len(client.get("/api/v1/auth/users", headers=headers).json()) == 1
+
+    def test_reads_follow_writes_to_primary(
+        self,
+        client: TestClient,
+        auth_token: str,
+        replica: sessionmaker,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that a client reads its own write, then returns to the replica."""
+        replicate_users(replica)
+        headers = {"Authorization": f"Bearer {auth_token}"}
+
+        response = client.post("/api/v1/tasks", json={"title": "Fresh"}, headers=headers)
+        assert response.status_code == 201
+        tasks = client.get("/api/v1/tasks", headers=headers).json()
+        assert [task["title"] for task in tasks] == ["Fresh"]
+
+        monkeypatch.setattr(settings, "DB_REPLICA_STICKY_SECONDS", 0.0)
+        assert client.get("/api/v1/tasks", headers=headers).json() == []
+
+    def test_cached_tokens_are_not_decoded(
+        self,
+        client: TestClient,
+        auth_token: str,
+        replica: sessionmaker,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that stickiness needs no JWT decode once the user is cached."""
+        replicate_users(replica)
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        client.get("/api/v1/auth/me", headers=headers)
+        client.post("/api/v1/tasks", json={"title": "Warm"}, headers=headers)
+
+        decoded: list[str] = []
+
+        def decode(token: str, *args: Any, **kwargs: Any) -> Any:
+            decoded.append(token)
+            return original_decode(token, *args, **kwargs)
+
+        original_decode = dependencies.jwt.decode
+        monkeypatch.setattr(dependencies.jwt, "decode", decode)
+        response = client.post("/api/v1/tasks", json={"title": "Fresh"}, headers=headers)
+        assert response.status_code == 201
+        tasks = client.get("/api/v1/tasks", headers=headers).json()
+
+        assert [task["title"] for task in tasks] == ["Fresh", "Warm"]
+        assert decoded == []
+
+    def test_failed_writes_do_not_pin_reads(
+        self, client: TestClient, auth_token: str, replica: sessionmaker
+    ) -> None:
+        """Test that only successful writes start a stickiness window."""
+        replicate_users(replica)
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        with TestingSessionLocal() as primary_db:
+            primary_db.add(Task(title="Primary only", owner_id=1, rank="i"))
+            primary_db.commit()
+
+        assert client.put("/api/v1/tasks/99999", json={}, headers=headers).status_code == 404
+        assert client.get("/api/v1/tasks", headers=headers).json() == []
+
+    def test_new_user_falls_back_to_primary(
+        self, client: TestClient, auth_token: str, replica: sessionmaker
+    ) -> None:
+        """Test that a user the replica has not seen yet can still authenticate."""
+        response = client.get(
+            "/api/v1/auth/me", headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        assert response.status_code == 200
+        assert response.json()["email"] == "testuser@example.com"
+
+    def test_replicas_used_round_robin(self) -> None:
+        """Test that reads are spread over replicas and the primary takes none."""
+        opened: list[str] = []
+
+        def factory(name: str) -> Any:
+            def open_session() -> Any:
+                opened.append(name)
+                return TestingSessionLocal()
+            return open_session
+
+        router = ReadRouter(factory("primary"), [factory("a"), factory("b")])
+        for _ in range(4):
+            router.session().close()
+        assert opened == ["a", "b", "a", "b"]
@@ -1,5 +1,32 @@
 """Tests for task management endpoints - TDD."""
+import csv
+import io
+import json
+import random
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.api import tasks as tasks_api
+from app.api.schemas import TaskCreate, TaskUpdate, UserCreate
+from app.api.tasks import ExportFormat
+from app.core.config import settings
+from app.core.etags import if_match_versions
+from app.core.ranking import evenly_spaced_ranks, rank_between
+from app.main import app
+from app.models.base import get_db
+from app.models.user import User
+from app.services import task_service, user_service
+from app.tests.conftest import (
+    TestingAsyncSessionLocal,
+    TestingSessionLocal,
+    async_engine,
+    engine,
+    override_get_db,
+)
 
 
 class TestCreateTask:
@@ -137,6 +164,653 @@ class TestGetTasks:
         assert response.status_code == 404
 
 
+class TestTaskPagination:
+    """Test suite for cursor-paginated task listing."""
+
+    def create_tasks(self, client: TestClient, auth_token: str, count: int) -> list[int]:
+        """Create tasks and return their IDs in creation order."""
+        return [
+            client.post(
+                "/api/v1/tasks",
+                json={"title": f"Task {n}"},
+                headers={"Authorization": f"Bearer {auth_token}"},
+            ).json()["id"]
+            for n in range(count)
+        ]
+
+    def test_pages_cover_all_tasks_newest_first(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that following the cursor visits every task once, in order."""
+        created = self.create_tasks(client, auth_token, 5)
+        headers = {"Authorization": f"Bearer {auth_token}"}
+
+        seen: list[int] = []
+        cursor = None
+        pages = 0
+        while True:
+            params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+            response = client.get("/api/v1/tasks", params=params, headers=headers)
+            assert response.status_code == 200
+            seen += [task["id"] for task in response.json()]
+            pages += 1
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+
+        assert pages == 3
+        assert seen == list(reversed(created))
+
+    def test_inserts_do_not_shift_later_pages(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that a task created mid-pagination neither repeats nor skips rows."""
+        created = self.create_tasks(client, auth_token, 4)
+        headers = {"Authorization": f"Bearer {auth_token}"}
+
+        first = client.get("/api/v1/tasks", params={"limit": 2}, headers=headers)
+        self.create_tasks(client, auth_token, 1)
+        second = client.get(
+            "/api/v1/tasks",
+            params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]},
+            headers=headers,
+        )
+
+        ids = [task["id"] for task in first.json() + second.json()]
+        assert ids == list(reversed(created))
+        assert "X-Next-Cursor" not in second.headers
+
+    def test_invalid_cursor(self, client: TestClient, auth_token: str) -> None:
+        """Test that a malformed cursor is rejected."""
+        response = client.get(
+            "/api/v1/tasks",
+            params={"cursor": "not-a-cursor"},
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+        assert response.status_code == 400
+
+    def test_limit_is_capped(self, client: TestClient, auth_token: str) -> None:
+        """Test that page size cannot exceed the maximum."""
+        response = client.get(
+            "/api/v1/tasks",
+            params={"limit": 100_000},
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+        assert response.status_code == 422
+
+
+class TestExportTasks:
+    """Test suite for streaming task export."""
+
+    @pytest.fixture(autouse=True)
+    def small_chunks(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Export in small chunks so tests span several of them."""
+        monkeypatch.setattr(tasks_api, "EXPORT_CHUNK_SIZE", 2)
+
+    def create_tasks(self, client: TestClient, auth_token: str, count: int) -> None:
+        """Create numbered tasks."""
+        for n in range(count):
+            client.post(
+                "/api/v1/tasks",
+                json={"title": f"Task {n}", "description": 'a, "quoted"\nline'},
+                headers={"Authorization": f"Bearer {auth_token}"},
+            )
+
+    def test_export_ndjson(self, client: TestClient, auth_token: str) -> None:
+        """Test streaming tasks as newline-delimited JSON."""
+        self.create_tasks(client, auth_token, 5)
+        with client.stream(
+            "GET", "/api/v1/tasks/export", headers={"Authorization": f"Bearer {auth_token}"}
+        ) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/x-ndjson"
+            body = response.read().decode()
+
+        rows = [json.loads(line) for line in body.splitlines()]
+        assert [row["title"] for row in rows] == [f"Task {n}" for n in range(5)]
+        assert rows[0]["description"] == 'a, "quoted"\nline'
+
+    def test_export_streams_in_chunks(self, client: TestClient, auth_token: str) -> None:
+        """Test that rows are read and encoded one chunk at a time."""
+        self.create_tasks(client, auth_token, 5)
+        with TestingSessionLocal() as db:
+            owner = db.query(User).filter(User.email == "testuser@example.com").one()
+
+        ndjson = list(tasks_api._stream_export(TestingSessionLocal, owner, ExportFormat.NDJSON))
+        assert [chunk.count("\n") for chunk in ndjson] == [2, 2, 1]
+
+        csv_chunks = list(tasks_api._stream_export(TestingSessionLocal, owner, ExportFormat.CSV))
+        assert len(csv_chunks) == 3
+
+    def test_export_csv(self, client: TestClient, auth_token: str) -> None:
+        """Test streaming tasks as CSV with a header row."""
+        self.create_tasks(client, auth_token, 3)
+        response = client.get(
+            "/api/v1/tasks/export",
+            params={"format": "csv"},
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="tasks.csv"' in response.headers["content-disposition"]
+
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["title"] for row in rows] == ["Task 0", "Task 1", "Task 2"]
+        assert rows[0]["description"] == 'a, "quoted"\nline'
+        assert rows[0]["assigned_to_id"] == ""
+
+    def test_export_only_own_tasks(self, client: TestClient, auth_token: str) -> None:
+        """Test that the export is limited to the current user's tasks."""
+        self.create_tasks(client, auth_token, 2)
+        client.post(
+            "/api/v1/auth/register",
+            json={"email": "other@example.com", "password": "password123"},
+        )
+        other_token = client.post(
+            "/api/v1/auth/login",
+            json={"email": "other@example.com", "password": "password123"},
+        ).json()["access_token"]
+
+        response = client.get(
+            "/api/v1/tasks/export", headers={"Authorization": f"Bearer {other_token}"}
+        )
+        assert response.status_code == 200
+        assert response.text == ""
+
+    def test_export_unknown_format(self, client: TestClient, auth_token: str) -> None:
+        """Test that unsupported formats are rejected."""
+        response = client.get(
+            "/api/v1/tasks/export",
+            params={"format": "xml"},
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+        assert response.status_code == 422
+
+
+class TestTaskBatch:
+    """Test suite for batch task mutations."""
+
+    def create_tasks(self, client: TestClient, auth_token: str, count: int) -> list[int]:
+        """Create tasks and return their IDs."""
+        return [
+            client.post(
+                "/api/v1/tasks",
+                json={"title": f"Task {n}"},
+                headers={"Authorization": f"Bearer {auth_token}"},
+            ).json()["id"]
+            for n in range(count)
+        ]
+
+    def test_batch_applies_all_mutations(self, client: TestClient, auth_token: str) -> None:
+        """Test creating, updating and deleting tasks in one request."""
+        ids = self.create_tasks(client, auth_token, 4)
+        headers = {"Authorization": f"Bearer {auth_token}"}
+
+        response = client.post(
+            "/api/v1/tasks/batch",
+            json={
+                "create": [{"title": "New 1"}, {"title": "New 2", "priority": "high"}],
+                "update": [
+                    {"id": ids[2], "status": "done"},
+                    {"id": ids[0], "status": "done"},
+                    {"id": ids[1], "title": "Renamed"},
+                ],
+                "delete": [ids[3]],
+            },
+            headers=headers,
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [task["title"] for task in data["created"]] == ["New 1", "New 2"]
+        assert data["created"][1]["priority"] == "high"
+        assert [task["id"] for task in data["updated"]] == [ids[2], ids[0], ids[1]]
+        assert data["updated"][0]["status"] == "done"
+        assert data["updated"][2]["title"] == "Renamed"
+        assert data["deleted"] == [ids[3]]
+
+        tasks = {
+            task["title"]: task
+            for task in client.get("/api/v1/tasks", headers=headers).json()
+        }
+        assert set(tasks) == {"Task 0", "Renamed", "Task 2", "New 1", "New 2"}
+        assert tasks["Task 0"]["status"] == "done"
+
+    def test_identical_updates_share_one_statement(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that moving many cards to one column is a single UPDATE."""
+        ids = self.create_tasks(client, auth_token, 10)
+        statements: list[str] = []
+
+        def record(
+            conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, many: bool
+        ) -> None:
+            statements.append(statement.split(None, 1)[0].upper())
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            response = client.post(
+                "/api/v1/tasks/batch",
+                json={"update": [{"id": task_id, "status": "done"} for task_id in ids]},
+                headers={"Authorization": f"Bearer {auth_token}"},
+            )
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+        assert response.status_code == 200
+        assert all(task["status"] == "done" for task in response.json()["updated"])
+        assert statements.count("UPDATE") == 1
+
+    def test_batch_is_atomic(self, client: TestClient, auth_token: str) -> None:
+        """Test that nothing is applied when a task in the batch is missing."""
+        ids = self.create_tasks(client, auth_token, 1)
+        headers = {"Authorization": f"Bearer {auth_token}"}
+
+        response = client.post(
+            "/api/v1/tasks/batch",
+            json={
+                "create": [{"title": "Should not exist"}],
+                "update": [{"id": ids[0], "status": "done"}],
+                "delete": [99999],
+            },
+            headers=headers,
+        )
+        assert response.status_code == 404
+        assert "99999" in response.json()["detail"]
+
+        tasks = client.get("/api/v1/tasks", headers=headers).json()
+        assert [(task["title"], task["status"]) for task in tasks] == [("Task 0", "todo")]
+
+    def test_batch_cannot_touch_other_users_tasks(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that tasks owned by someone else count as missing."""
+        ids = self.create_tasks(client, auth_token, 1)
+        client.post(
+            "/api/v1/auth/register",
+            json={"email": "other@example.com", "password": "password123"},
+        )
+        other_token = client.post(
+            "/api/v1/auth/login",
+            json={"email": "other@example.com", "password": "password123"},
+        ).json()["access_token"]
+
+        response = client.post(
+            "/api/v1/tasks/batch",
+            json={"delete": ids},
+            headers={"Authorization": f"Bearer {other_token}"},
+        )
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize(
+        "batch",
+        [
+            {},
+            {"update": [{"id": 1, "status": "done"}], "delete": [1]},
+            {"delete": list(range(501))},
+            {"update": [{"id": 1, "title": None}]},
+        ],
+        ids=["empty", "duplicate", "too_large", "null_title"],
+    )
+    def test_invalid_batches(
+        self, client: TestClient, auth_token: str, batch: dict
+    ) -> None:
+        """Test that empty, conflicting, oversized and invalid batches are rejected."""
+        response = client.post(
+            "/api/v1/tasks/batch",
+            json=batch,
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+        assert response.status_code == 422
+
+
+class TestTaskRanking:
+    """Test suite for card order within board columns."""
+
+    def create_tasks(
+        self, client: TestClient, auth_token: str, count: int, status: str = "todo"
+    ) -> list[int]:
+        """Create tasks in one column and return their IDs."""
+        return [
+            client.post(
+                "/api/v1/tasks",
+                json={"title": f"Task {n}", "status": status},
+                headers={"Authorization": f"Bearer {auth_token}"},
+            ).json()["id"]
+            for n in range(count)
+        ]
+
+    def column(self, client: TestClient, auth_token: str, status: str = "todo") -> list[int]:
+        """Get the IDs of a column's tasks in board order."""
+        tasks = client.get(
+            "/api/v1/tasks", headers={"Authorization": f"Bearer {auth_token}"}
+        ).json()
+        return [
+            task["id"]
+            for task in sorted(tasks, key=lambda task: (task["rank"], task["id"]))
+            if task["status"] == status
+        ]
+
+    def move(
+        self, client: TestClient, auth_token: str, task_id: int, **body: Any
+    ) -> Any:
+        """Move a task and return the response."""
+        return client.post(
+            f"/api/v1/tasks/{task_id}/move",
+            json=body,
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+
+    def test_rank_between_keeps_order(self) -> None:
+        """Test that ranks inserted at random positions stay ordered and short."""
+        rng = random.Random(16)
+        ranks = [rank_between(None, None)]
+        for _ in range(2000):
+            index = rng.randint(0, len(ranks))
+            before = ranks[index - 1] if index > 0 else None
+            after = ranks[index] if index < len(ranks) else None
+            ranks.insert(index, rank_between(before, after))
+
+        assert ranks == sorted(ranks)
+        assert len(set(ranks)) == len(ranks)
+        assert max(len(rank) for rank in ranks) <= 8
+        with pytest.raises(ValueError):
+            rank_between("b", "a")
+
+    def test_evenly_spaced_ranks(self) -> None:
+        """Test that compacted ranks are ordered, unique and short."""
+        for count in (0, 1, 35, 36, 5000):
+            ranks = evenly_spaced_ranks(count)
+            assert len(ranks) == count
+            assert ranks == sorted(set(ranks))
+            assert all(len(rank) <= 3 for rank in ranks)
+
+    def test_new_tasks_go_to_the_bottom(self, client: TestClient, auth_token: str) -> None:
+        """Test that created and batch-created tasks are appended to their column."""
+        ids = self.create_tasks(client, auth_token, 3)
+        self.create_tasks(client, auth_token, 1, status="done")
+        created = client.post(
+            "/api/v1/tasks/batch",
+            json={"create": [{"title": "B1"}, {"title": "B2", "status": "done"}, {"title": "B3"}]},
+            headers={"Authorization": f"Bearer {auth_token}"},
+        ).json()["created"]
+
+        assert self.column(client, auth_token) == [*ids, created[0]["id"], created[2]["id"]]
+        assert self.column(client, auth_token, "done")[-1] == created[1]["id"]
+
+    def test_move_within_and_between_columns(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test placing a task at the top, after another task and in another column."""
+        a, b, c = self.create_tasks(client, auth_token, 3)
+        (d,) = self.create_tasks(client, auth_token, 1, status="done")
+
+        assert self.move(client, auth_token, c).status_code == 200
+        assert self.column(client, auth_token) == [c, a, b]
+
+        assert self.move(client, auth_token, b, after_id=c).status_code == 200
+        assert self.column(client, auth_token) == [c, b, a]
+
+        response = self.move(client, auth_token, a, status="done", after_id=d)
+        assert response.status_code == 200
+        assert response.json()["status"] == "done"
+        assert self.column(client, auth_token) == [c, b]
+        assert self.column(client, auth_token, "done") == [d, a]
+
+    def test_move_writes_one_row(self, client: TestClient, auth_token: str) -> None:
+        """Test that a move is a single-row UPDATE however long the column is."""
+        ids = self.create_tasks(client, auth_token, 20)
+        statements: list[str] = []
+
+        def record(
+            conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, many: bool
+        ) -> None:
+            if statement.lstrip().upper().startswith("UPDATE"):
+                statements.append(statement)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            response = self.move(client, auth_token, ids[-1], after_id=ids[5])
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+        assert response.status_code == 200
+        assert len(statements) == 1
+        assert "WHERE tasks.id = " in statements[0]
+        assert self.column(client, auth_token)[6] == ids[-1]
+
+    def test_invalid_moves(self, client: TestClient, auth_token: str) -> None:
+        """Test moves to unknown tasks or relative to a task in another column."""
+        (a,) = self.create_tasks(client, auth_token, 1)
+        (d,) = self.create_tasks(client, auth_token, 1, status="done")
+
+        assert self.move(client, auth_token, 99999).status_code == 404
+        assert self.move(client, auth_token, a, after_id=d).status_code == 400
+        assert self.move(client, auth_token, a, after_id=a).status_code == 400
+        assert self.move(client, auth_token, a, after_id=99999).status_code == 400
+
+    def test_long_ranks_trigger_rebalance(
+        self, client: TestClient, auth_token: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that the column is compacted once a rank grows too long."""
+        ids = self.create_tasks(client, auth_token, 4)
+        monkeypatch.setattr(settings, "TASK_RANK_MAX_LENGTH", 1)
+
+        # Repeatedly splitting the same gap lengthens the moved task's rank
+        for task_id in (ids[3], ids[2]):
+            self.move(client, auth_token, task_id, after_id=ids[0])
+
+        tasks = client.get(
+            "/api/v1/tasks", headers={"Authorization": f"Bearer {auth_token}"}
+        ).json()
+        assert all(len(task["rank"]) == 1 for task in tasks)
+        assert self.column(client, auth_token) == [ids[0], ids[2], ids[3], ids[1]]
+
+    def test_appends_trigger_rebalance(
+        self, client: TestClient, auth_token: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that creating and batch-creating at the bottom also compacts the column."""
+        monkeypatch.setattr(settings, "TASK_RANK_MAX_LENGTH", 1)
+
+        # Appending to a column lengthens the last rank every few dozen tasks
+        ids = self.create_tasks(client, auth_token, 20)
+        created = client.post(
+            "/api/v1/tasks/batch",
+            json={"create": [{"title": f"B{n}", "status": "done"} for n in range(20)]},
+            headers={"Authorization": f"Bearer {auth_token}"},
+        ).json()["created"]
+
+        tasks = client.get(
+            "/api/v1/tasks", headers={"Authorization": f"Bearer {auth_token}"}
+        ).json()
+        assert all(len(task["rank"]) == 1 for task in tasks)
+        assert self.column(client, auth_token) == ids
+        assert self.column(client, auth_token, "done") == [task["id"] for task in created]
+
+
+class TestConditionalRequests:
+    """Test suite for task ETags, If-None-Match and If-Match."""
+
+    def create_task(self, client: TestClient, auth_token: str, title: str = "Task") -> dict:
+        """Create a task and return it."""
+        return client.post(
+            "/api/v1/tasks",
+            json={"title": title},
+            headers={"Authorization": f"Bearer {auth_token}"},
+        ).json()
+
+    def test_unchanged_task_is_not_modified(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that a task's ETag gets a 304 until the task changes."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        task = self.create_task(client, auth_token)
+        assert task["version"] == 1
+
+        response = client.get(f"/api/v1/tasks/{task['id']}", headers=headers)
+        etag = response.headers["ETag"]
+        response = client.get(
+            f"/api/v1/tasks/{task['id']}", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+        client.put(f"/api/v1/tasks/{task['id']}", json={"title": "New"}, headers=headers)
+        response = client.get(
+            f"/api/v1/tasks/{task['id']}", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.json()["version"] == 2
+        assert response.headers["ETag"] != etag
+
+    def test_unchanged_board_costs_one_aggregate(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that re-checking an unchanged task list does not read the tasks."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        task = self.create_task(client, auth_token)
+        etag = client.get("/api/v1/tasks", headers=headers).headers["ETag"]
+        statements: list[str] = []
+
+        def record(
+            conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, many: bool
+        ) -> None:
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = client.get("/api/v1/tasks", headers={**headers, "If-None-Match": etag})
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert response.status_code == 304
+        assert len(statements) == 1  # the aggregate; the user is cached
+        assert "count(" in statements[0]
+
+        # Any change to the board changes the ETag
+        etags = {etag}
+        for method, url, body in [
+            ("put", f"/api/v1/tasks/{task['id']}", {"status": "done"}),
+            ("post", "/api/v1/tasks", {"title": "Another"}),
+            ("delete", f"/api/v1/tasks/{task['id']}", None),
+        ]:
+            client.request(method, url, json=body, headers=headers)
+            response = client.get("/api/v1/tasks", headers={**headers, "If-None-Match": etag})
+            assert response.status_code == 200
+            etag = response.headers["ETag"]
+            assert etag not in etags
+            etags.add(etag)
+
+        # Different pages have different ETags
+        response = client.get("/api/v1/tasks?limit=1", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+
+    def test_list_etag_survives_reused_ids(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that deleting the newest task and creating another changes the ETag."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        self.create_task(client, auth_token, "First")
+        newest = self.create_task(client, auth_token, "Second")
+        etag = client.get("/api/v1/tasks", headers=headers).headers["ETag"]
+
+        client.delete(f"/api/v1/tasks/{newest['id']}", headers=headers)
+        replacement = self.create_task(client, auth_token, "Replacement")
+        assert replacement["id"] == newest["id"]  # SQLite reuses the highest ID
+
+        response = client.get("/api/v1/tasks", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert "Replacement" in [task["title"] for task in response.json()]
+
+    def test_conditional_update(self, client: TestClient, auth_token: str) -> None:
+        """Test that a stale If-Match fails with 412 and leaves the task alone."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        task = self.create_task(client, auth_token)
+        etag = client.get(f"/api/v1/tasks/{task['id']}", headers=headers).headers["ETag"]
+
+        response = client.put(
+            f"/api/v1/tasks/{task['id']}",
+            json={"title": "First"},
+            headers={**headers, "If-Match": etag},
+        )
+        assert response.status_code == 200
+        new_etag = response.headers["ETag"]
+
+        response = client.put(
+            f"/api/v1/tasks/{task['id']}",
+            json={"title": "Second"},
+            headers={**headers, "If-Match": etag},
+        )
+        assert response.status_code == 412
+        current = client.get(f"/api/v1/tasks/{task['id']}", headers=headers).json()
+        assert current["title"] == "First"
+
+        for if_match in (new_etag, "*"):
+            response = client.put(
+                f"/api/v1/tasks/{task['id']}",
+                json={"title": "Third"},
+                headers={**headers, "If-Match": if_match},
+            )
+            assert response.status_code == 200
+
+        response = client.put(
+            "/api/v1/tasks/99999", json={"title": "X"}, headers={**headers, "If-Match": etag}
+        )
+        assert response.status_code == 404
+
+    def test_conditional_delete(self, client: TestClient, auth_token: str) -> None:
+        """Test that a stale If-Match keeps the task from being deleted."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        task = self.create_task(client, auth_token)
+        stale = f'"{task["id"]}-0"'
+        current = f'"{task["id"]}-1"'
+
+        url = f"/api/v1/tasks/{task['id']}"
+        assert client.delete(url, headers={**headers, "If-Match": stale}).status_code == 412
+        assert client.get(url, headers=headers).status_code == 200
+        assert client.delete(url, headers={**headers, "If-Match": current}).status_code == 204
+        assert client.delete(url, headers={**headers, "If-Match": current}).status_code == 404
+
+    def test_conditional_writes_without_returning(
+        self, client: TestClient, auth_token: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test If-Match on the read-modify-write fallback."""
+        monkeypatch.setattr(task_service, "_returning", lambda db, kind: False)
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        task = self.create_task(client, auth_token)
+        url = f"/api/v1/tasks/{task['id']}"
+        stale = {**headers, "If-Match": f'"{task["id"]}-0"'}
+
+        assert client.put(url, json={"title": "X"}, headers=stale).status_code == 412
+        assert client.delete(url, headers=stale).status_code == 412
+        response = client.put(url, json={"title": "X"}, headers=headers)
+        assert response.json()["version"] == 2
+
+    def test_every_write_bumps_the_version(self, client: TestClient, auth_token: str) -> None:
+        """Test that moves and batch updates change the version too."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        task = self.create_task(client, auth_token)
+
+        moved = client.post(
+            f"/api/v1/tasks/{task['id']}/move", json={"status": "done"}, headers=headers
+        ).json()
+        assert moved["version"] == 2
+        updated = client.post(
+            "/api/v1/tasks/batch",
+            json={"update": [{"id": task["id"], "priority": "high"}]},
+            headers=headers,
+        ).json()["updated"]
+        assert updated[0]["version"] == 3
+
+    def test_if_match_parsing(self) -> None:
+        """Test which If-Match tags allow a write to a task."""
+        assert if_match_versions(None, 1) is None
+        assert if_match_versions("*", 1) is None
+        assert if_match_versions('"1-3", "1-4"', 1) == [3, 4]
+        assert if_match_versions('W/"1-3"', 1) == []  # weak tags never match
+        assert if_match_versions('"2-3"', 1) == []
+
+
 class TestUpdateTask:
     """Test suite for updating tasks."""
 
@@ -188,6 +862,25 @@ class TestUpdateTask:
         assert data["title"] == "Original"  # unchanged
         assert data["priority"] == "low"  # unchanged
 
+    def test_update_task_null_required_field(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that a required field cannot be cleared with null."""
+        create_response = client.post(
+            "/api/v1/tasks",
+            json={"title": "Original"},
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+        task_id = create_response.json()["id"]
+
+        for field in ("title", "status", "priority"):
+            response = client.put(
+                f"/api/v1/tasks/{task_id}",
+                json={field: None},
+                headers={"Authorization": f"Bearer {auth_token}"},
+            )
+            assert response.status_code == 422, field
+
     def test_update_nonexistent_task(self, client: TestClient, auth_token: str) -> None:
         """Test updating non-existent task returns 404."""
         response = client.put(
@@ -245,3 +938,111 @@ class TestDeleteTask:
         """Test deleting task without authentication fails."""
         response = client.delete("/api/v1/tasks/1")
         assert response.status_code == 403  # HTTPBearer returns 403 for missing auth
+
+
+class TestAsyncDatabase:
+    """Test suite for the async session path used by async endpoints."""
+
+    def test_write_endpoints_do_not_use_sync_session(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that create, update and delete never touch the blocking session."""
+        def no_sync_db() -> Iterator[None]:
+            raise AssertionError("async endpoint used the sync session")
+            yield
+
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        app.dependency_overrides[get_db] = no_sync_db
+        try:
+            response = client.post("/api/v1/tasks", json={"title": "Async"}, headers=headers)
+            assert response.status_code == 201
+            task_id = response.json()["id"]
+
+            response = client.put(
+                f"/api/v1/tasks/{task_id}", json={"status": "done"}, headers=headers
+            )
+            assert response.status_code == 200
+            assert response.json()["status"] == "done"
+
+            response = client.delete(f"/api/v1/tasks/{task_id}", headers=headers)
+            assert response.status_code == 204
+        finally:
+            app.dependency_overrides[get_db] = override_get_db
+
+    async def test_async_service_functions(self) -> None:
+        """Test the async task and user service functions end to end."""
+        async with TestingAsyncSessionLocal() as db:
+            user = await user_service.create_user_async(
+                db, UserCreate(email="async@example.com", password="password123")
+            )
+            assert await user_service.get_user_by_email_async(db, "async@example.com") == user
+
+            task = await task_service.create_task_async(db, TaskCreate(title="A"), user)
+            assert await task_service.get_tasks_async(db, user) == [task]
+
+            updated = await task_service.update_task_async(
+                db, task.id, TaskUpdate(title="B"), user
+            )
+            assert updated is not None and updated.title == "B"
+
+            deleted = await task_service.delete_task_async(db, task.id, user)
+            assert deleted is not None and deleted.id == task.id
+            assert await task_service.get_task_async(db, task.id, user) is None
+            assert await task_service.delete_task_async(db, task.id, user) is None
+
+    def test_writes_are_single_statements(self, client: TestClient, auth_token: str) -> None:
+        """Test that create, update and delete read the row back with RETURNING."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        statements: list[str] = []
+
+        def record(
+            conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, many: bool
+        ) -> None:
+            statements.append(" ".join(statement.split()[:3]).upper())
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            response = client.post("/api/v1/tasks", json={"title": "A"}, headers=headers)
+            task_id = response.json()["id"]
+            created = statements.copy()
+            statements.clear()
+
+            response = client.put(
+                f"/api/v1/tasks/{task_id}", json={"title": "B"}, headers=headers
+            )
+            assert response.json()["title"] == "B"
+            updated = statements.copy()
+            statements.clear()
+
+            assert client.delete(f"/api/v1/tasks/{task_id}", headers=headers).status_code == 204
+            deleted = statements.copy()
+            statements.clear()
+
+            assert client.delete(f"/api/v1/tasks/{task_id}", headers=headers).status_code == 404
+            assert client.put(
+                f"/api/v1/tasks/{task_id}", json={"title": "C"}, headers=headers
+            ).status_code == 404
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+        # Create looks the user up (later requests hit the user cache) and
+        # reads the column's last rank
+        assert [s.split()[0] for s in created] == ["SELECT", "SELECT", "INSERT"]
+        assert [s.split()[0] for s in updated] == ["UPDATE"]
+        assert [s.split()[0] for s in deleted] == ["DELETE"]
+
+    def test_writes_without_returning(
+        self, client: TestClient, auth_token: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test the read-modify-write fallback for databases without RETURNING."""
+        monkeypatch.setattr(task_service, "_returning", lambda db, kind: False)
+        headers = {"Authorization": f"Bearer {auth_token}"}
+
+        response = client.post("/api/v1/tasks", json={"title": "A"}, headers=headers)
+        assert response.status_code == 201
+        task_id = response.json()["id"]
+
+        response = client.put(f"/api/v1/tasks/{task_id}", json={"title": "B"}, headers=headers)
+        assert response.json()["title"] == "B"
+        assert client.delete(f"/api/v1/tasks/{task_id}", headers=headers).status_code == 204
+        assert client.delete(f"/api/v1/tasks/{task_id}", headers=headers).status_code == 404
@@ -0,0 +1,134 @@
+"""Tests for the authenticated-user cache."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.core import db_metrics
+from app.core.config import settings
+from app.core.user_cache import UserCache, user_cache
+from app.models.user import User
+from app.tests.conftest import TestingSessionLocal
+
+
+def make_user(email: str = "cached@example.com", user_id: int = 1) -> User:
+    """Build an unsaved user for unit tests."""
+    return User(id=user_id, email=email, hashed_password="x", is_active=True)
+
+
+class TestUserCache:
+    """Test suite for caching users by token."""
+
+    def test_warm_requests_skip_the_database(self, client: TestClient, auth_token: str) -> None:
+        """Test that only the first request with a token looks the user up."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        db_metrics.reset_metrics()
+        for _ in range(5):
+            assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+        stats = db_metrics.get_route_stats()["GET /api/v1/auth/me"]
+        assert stats["requests"] == 5
+        assert stats["queries"] == 1
+        assert user_cache.get_stats()["size"] == 1
+
+    def test_deactivation_invalidates(self, client: TestClient, auth_token: str) -> None:
+        """Test that a deactivated user is refused at once, not after the TTL."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+        with TestingSessionLocal() as db:
+            user = db.query(User).filter(User.email == "testuser@example.com").one()
+            user.is_active = False
+            db.commit()
+
+        assert user_cache.get_stats()["size"] == 0
+        assert client.get("/api/v1/auth/me", headers=headers).status_code == 401
+
+    def test_profile_change_is_visible(self, client: TestClient, auth_token: str) -> None:
+        """Test that a changed user is reloaded on the next request."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        assert client.get("/api/v1/auth/me", headers=headers).json()["full_name"] == "Test User"
+
+        with TestingSessionLocal() as db:
+            user = db.query(User).filter(User.email == "testuser@example.com").one()
+            user.full_name = "Renamed"
+            db.commit()
+
+        assert client.get("/api/v1/auth/me", headers=headers).json()["full_name"] == "Renamed"
+
+    def test_bulk_update_clears_cache(self, client: TestClient, auth_token: str) -> None:
+        """Test that an UPDATE statement on users drops every entry."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+        with TestingSessionLocal() as db:
+            db.execute(update(User).values(is_active=False))
+            assert user_cache.get_stats()["size"] == 1  # not before the commit
+            db.commit()
+
+        assert user_cache.get_stats()["size"] == 0
+        assert client.get("/api/v1/auth/me", headers=headers).status_code == 401
+
+    def test_rollback_keeps_cache(self, client: TestClient, auth_token: str) -> None:
+        """Test that changes that never commit do not invalidate."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+        with TestingSessionLocal() as db:
+            user = db.query(User).filter(User.email == "testuser@example.com").one()
+            user.is_active = False
+            db.flush()
+            db.rollback()
+
+        assert user_cache.get_stats()["size"] == 1
+
+    def test_entries_expire(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test the TTL and the token's own expiry, whichever comes first."""
+        monkeypatch.setattr(settings, "USER_CACHE_TTL_SECONDS", 30.0)
+        cache = UserCache()
+        cache.put("long", make_user(), token_expires_at=None, now=1000.0)
+        cache.put("short", make_user(), token_expires_at=1010.0, now=1000.0)
+
+        assert cache.get("long", now=1020.0) is not None
+        assert cache.get("short", now=1020.0) is None
+        assert cache.get("long", now=1030.0) is None
+        assert cache.get_stats()["size"] == 0
+
+    def test_size_is_bounded(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that the least recently used token is evicted."""
+        monkeypatch.setattr(settings, "USER_CACHE_SIZE", 2)
+        cache = UserCache()
+        cache.put("a", make_user("a@example.com"), None)
+        cache.put("b", make_user("b@example.com"), None)
+        cache.get("a")
+        cache.put("c", make_user("c@example.com"), None)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+        monkeypatch.setattr(settings, "USER_CACHE_SIZE", 0)
+        cache.clear()
+        cache.put("a", make_user(), None)
+        assert cache.get("a") is None
+
+    def test_stale_lookup_not_cached(self) -> None:
+        """Test that a user loaded before an invalidation is not cached after it."""
+        cache = UserCache()
+        generation = cache.generation
+        user = make_user()
+        cache.invalidate(user.email)  # a change committed while the user was loading
+        cache.put("token", user, None, generation)
+
+        assert cache.get("token") is None
+
+    def test_hits_are_private_copies(self) -> None:
+        """Test that changing a cached user does not change the cache."""
+        cache = UserCache()
+        cache.put("token", make_user(), None)
+        hit = cache.get("token")
+        assert hit is not None
+        hit.full_name = "Changed"
+
+        cached = cache.get("token")
+        assert cached is not None
+        assert cached.full_name is None
@@ -1,9 +1,87 @@
 """Tests for WebSocket connection manager and real-time features - TDD."""
+import asyncio
+import json
+import zlib
+from collections import deque
+from typing import Any
+
+import msgpack
 import pytest
 from fastapi.testclient import TestClient
-
-from app.core.websocket_manager import ConnectionManager
+from sqlalchemy import create_engine, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.config import settings
+from app.core.websocket_manager import (
+    ClientConnection,
+    ConnectionManager,
+    EncodedMessage,
+    OverflowPolicy,
+)
+from app.core.ws_protocol import WireFormat
+from app.main import app
+from app.models.base import Base, get_async_database_url, get_async_session_factory
 from app.models.user import User
+from app.tests.conftest import TestingSessionLocal, override_get_async_session_factory
+
+
+class FakeWebSocket:
+    """Minimal WebSocket stand-in that records frames and can be stalled."""
+
+    def __init__(self, stalled: bool = False) -> None:
+        self.sent: list[Any] = []
+        self.close_code: int | None = None
+        self.release = asyncio.Event()
+        if not stalled:
+            self.release.set()
+
+    async def send_text(self, data: str) -> None:
+        await self.release.wait()
+        self.sent.append(json.loads(data))
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self.release.wait()
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000) -> None:
+        self.close_code = code
+
+
+def register_and_login(client: TestClient, email: str) -> str:
+    """Register a user and return their auth token."""
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "password": "password123"},
+    )
+    response = client.post(
+        "/api/v1/auth/login",
+        json={"email": email, "password": "password123"},
+    )
+    return response.json()["access_token"]
+
+
+def receive_event(websocket: Any) -> dict[str, Any]:
+    """Receive the next event frame, skipping presence and session frames."""
+    while True:
+        message = websocket.receive_json()
+        if message["type"] != "session" and not message["type"].startswith("presence_"):
+            return message
+
+
+def receive_presence(websocket: Any, users: set[int], version: int, size: int) -> int:
+    """Apply presence deltas from a test WebSocket until ``size`` users are online."""
+    while len(users) != size:
+        message = websocket.receive_json()
+        if message["type"] != "presence_delta":
+            continue
+        assert message["version"] == version + 1
+        version = message["version"]
+        users.update(message["joined"])
+        users.difference_update(message["left"])
+    return version
 
 
 class TestConnectionManager:
@@ -93,6 +171,354 @@ class TestConnectionManager:
         assert manager.is_connected(user_id)
 
 
+class TestHeartbeat:
+    """Test suite for per-socket tracking, pings and idle reaping."""
+
+    def test_closing_one_tab_keeps_user_online(self) -> None:
+        """Test that a user stays online until their last socket closes."""
+        manager = ConnectionManager()
+        first, second = FakeWebSocket(), FakeWebSocket()
+        manager.connect(1, first)
+        manager.connect(1, second)
+        manager._presence_changes.clear()
+
+        manager.disconnect(1, first)
+        assert manager.is_connected(1)
+        assert [c.websocket for c in manager.active_connections[1]] == [second]
+        assert 1 not in manager._presence_changes
+
+        manager.disconnect(1, second)
+        assert not manager.is_connected(1)
+        assert manager._presence_changes == {1: False}
+
+    def test_heartbeat_pings_every_socket(self) -> None:
+        """Test that a heartbeat queues one shared ping per socket."""
+        manager = ConnectionManager()
+        connections = [manager.connect(user_id, FakeWebSocket()) for user_id in (1, 2, 2)]
+
+        manager.send_heartbeat()
+
+        for connection in connections:
+            assert list(connection._queue) == [manager.ping_message]
+
+    async def test_reaper_closes_only_idle_sockets(self) -> None:
+        """Test that silent sockets are closed and active ones are kept."""
+        manager = ConnectionManager()
+        manager.idle_timeout = 10
+        idle_socket, active_socket = FakeWebSocket(), FakeWebSocket()
+        idle = manager.connect(1, idle_socket)
+        active = manager.connect(1, active_socket)
+        idle.start()
+        active.start()
+        start = idle.last_seen
+
+        # Nothing is due yet
+        assert manager.reap_idle(now=start + 5) == 0
+
+        active.last_seen = start + 8  # client answered a ping
+        assert manager.reap_idle(now=start + 11) == 1
+        await asyncio.sleep(0)
+
+        assert idle_socket.close_code == 1001
+        assert manager.active_connections[1] == [active]
+        assert manager._expiry_heap[0][0] == start + 18
+
+        assert manager.reap_idle(now=start + 19) == 1
+        assert not manager.is_connected(1)
+        assert manager._expiry_heap == []
+
+    def test_reaper_skips_disconnected_sockets(self) -> None:
+        """Test that sockets closed normally are dropped from the heap quietly."""
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        connection = manager.connect(1, websocket)
+        manager.disconnect(1, websocket)
+
+        assert manager.reap_idle(now=connection.last_seen + manager.idle_timeout) == 0
+        assert manager._expiry_heap == []
+        assert websocket.close_code is None
+
+    def test_client_frames_count_as_activity(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that a pong from the client resets its idle deadline."""
+        manager = ConnectionManager()
+        with client.websocket_connect(f"/ws?token={auth_token}") as websocket:
+            while websocket.receive_json()["type"] != "session":
+                pass
+            (connection,) = next(iter(manager.active_connections.values()))
+            connection.last_seen = 0
+            websocket.send_json({"type": "pong"})
+            websocket.send_json({"type": "presence_sync", "version": -1})
+            assert websocket.receive_json()["type"] == "presence_update"
+            assert connection.last_seen > 0
+
+
+class TestOutboundQueue:
+    """Test suite for per-connection outbound queues."""
+
+    async def test_broadcast_does_not_wait_for_stalled_client(self) -> None:
+        """Test that a stalled socket neither blocks broadcast nor other clients."""
+        manager = ConnectionManager()
+        manager.clear_all()
+
+        slow = FakeWebSocket(stalled=True)
+        fast = FakeWebSocket()
+        manager.connect(1, slow).start()
+        manager.connect(2, fast).start()
+
+        for index in range(2):
+            await asyncio.wait_for(manager.broadcast({"type": "ping", "n": index}), timeout=1)
+            await asyncio.sleep(0)
+
+        assert len(fast.sent) == 2
+        assert slow.sent == []
+        stats = {stat["user_id"]: stat for stat in manager.get_connection_stats()}
+        assert stats[1]["lag"] == 1  # one in flight, one queued
+        assert stats[2]["sent"] == 2
+
+        slow.release.set()
+        await asyncio.sleep(0.01)
+        assert [message["n"] for message in slow.sent] == [0, 1]
+        manager.clear_all()
+
+    def test_connection_stats_served_to_superusers(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that per-connection lag and drops are readable under /internal."""
+        with TestingSessionLocal() as db:
+            db.execute(
+                update(User)
+                .where(User.email == "testuser@example.com")
+                .values(is_superuser=True)
+            )
+            db.commit()
+        other_token = register_and_login(client, "other@example.com")
+
+        with client.websocket_connect(f"/ws?token={auth_token}") as websocket:
+            websocket.receive_json()
+            response = client.get(
+                "/api/v1/internal/ws-metrics",
+                headers={"Authorization": f"Bearer {auth_token}"},
+            )
+            forbidden = client.get(
+                "/api/v1/internal/ws-metrics",
+                headers={"Authorization": f"Bearer {other_token}"},
+            )
+
+        assert response.status_code == 200
+        metrics = response.json()
+        [connection] = metrics["connections"]
+        assert {"lag", "max_lag", "sent", "dropped", "coalesced"} <= set(connection)
+        assert metrics["dropped"] == connection["dropped"] == 0
+        assert forbidden.status_code == 403
+
+    def test_drop_oldest_policy(self) -> None:
+        """Test that a full queue discards its oldest message."""
+        connection = ClientConnection(1, FakeWebSocket(), max_queue_size=2)
+        for index in range(3):
+            connection.enqueue(EncodedMessage({"type": "event", "n": index}))
+
+        assert connection.lag == 2
+        assert connection.dropped == 1
+        assert [message.payload["n"] for message in connection._queue] == [1, 2]
+
+    def test_coalesce_policy(self) -> None:
+        """Test that a full queue merges updates to the same task."""
+        connection = ClientConnection(
+            1, FakeWebSocket(), max_queue_size=2, overflow_policy=OverflowPolicy.COALESCE
+        )
+        for task_id, title in [(1, "a"), (2, "b"), (1, "c")]:
+            connection.enqueue(
+                EncodedMessage({"type": "task_updated", "task": {"id": task_id, "title": title}})
+            )
+
+        assert connection.lag == 2
+        assert connection.coalesced == 1
+        assert connection.dropped == 0
+        titles = [message.payload["task"]["title"] for message in connection._queue]
+        assert titles == ["c", "b"]
+
+    async def test_disconnect_policy(self) -> None:
+        """Test that a client exceeding its queue is evicted."""
+        websocket = FakeWebSocket(stalled=True)
+        connection = ClientConnection(
+            1, websocket, max_queue_size=1, overflow_policy=OverflowPolicy.DISCONNECT
+        )
+        connection.start()
+        connection.enqueue(EncodedMessage({"type": "event", "n": 1}))
+        await asyncio.sleep(0)  # writer picks up the first message and stalls
+        connection.enqueue(EncodedMessage({"type": "event", "n": 2}))
+        connection.enqueue(EncodedMessage({"type": "event", "n": 3}))
+
+        assert connection.closed
+        assert connection.evicted
+        assert connection.lag == 0
+
+        # The socket is closed while the peer is still stalled, not once it
+        # catches up
+        await asyncio.sleep(0.01)
+        assert websocket.close_code == 1013
+        assert connection._writer is not None and connection._writer.done()
+        assert websocket.sent == []
+
+
+class TestEncodedMessage:
+    """Test suite for pre-encoded broadcast frames."""
+
+    async def test_broadcast_encodes_once(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that one broadcast serializes the payload once for all sockets."""
+        manager = ConnectionManager()
+        manager.clear_all()
+        sockets = [FakeWebSocket() for _ in range(5)]
+        for user_id, websocket in enumerate(sockets, start=1):
+            manager.connect(user_id, websocket).start()
+
+        calls = 0
+        real_dumps = json.dumps
+
+        def counting_dumps(*args: Any, **kwargs: Any) -> str:
+            nonlocal calls
+            calls += 1
+            return real_dumps(*args, **kwargs)
+
+        monkeypatch.setattr("app.core.websocket_manager.json.dumps", counting_dumps)
+        await manager.broadcast({"type": "task_deleted", "task_id": 7})
+        await asyncio.sleep(0)
+
+        assert calls == 1
+        assert all(ws.sent == [{"type": "task_deleted", "task_id": 7, "seq": 1}] for ws in sockets)
+        manager.clear_all()
+
+
+class TestWireFormats:
+    """Test suite for subprotocol-negotiated frame encodings."""
+
+    def test_msgpack_subprotocol(self, client: TestClient, auth_token: str) -> None:
+        """Test that MessagePack clients receive binary frames."""
+        with client.websocket_connect(
+            f"/ws?token={auth_token}", subprotocols=["pmtool.msgpack"]
+        ) as websocket:
+            assert websocket.accepted_subprotocol == "pmtool.msgpack"
+            message = msgpack.unpackb(websocket.receive_bytes())
+            assert message["type"] == "presence_update"
+
+            while message["type"] != "session":
+                message = msgpack.unpackb(websocket.receive_bytes())
+
+            # Binary control messages are decoded with the same format
+            websocket.send_bytes(msgpack.packb({"type": "presence_sync", "version": -1}))
+            message = msgpack.unpackb(websocket.receive_bytes())
+            while message["type"] != "presence_update":
+                message = msgpack.unpackb(websocket.receive_bytes())
+            assert message["version"] != -1
+
+    def test_deflate_subprotocol(self, client: TestClient, auth_token: str) -> None:
+        """Test that deflate clients receive compressed JSON frames."""
+        with client.websocket_connect(
+            f"/ws?token={auth_token}", subprotocols=["unknown", "pmtool.json+deflate"]
+        ) as websocket:
+            assert websocket.accepted_subprotocol == "pmtool.json+deflate"
+            raw = websocket.receive_bytes()
+            message = json.loads(zlib.decompress(raw, -zlib.MAX_WBITS))
+            assert message["type"] == "presence_update"
+
+    def test_unknown_subprotocol_falls_back_to_json(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that clients without a supported subprotocol get JSON text."""
+        with client.websocket_connect(
+            f"/ws?token={auth_token}", subprotocols=["graphql-ws"]
+        ) as websocket:
+            assert websocket.accepted_subprotocol is None
+            assert websocket.receive_json()["type"] == "presence_update"
+
+    async def test_encodes_once_per_format(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that each format is encoded once per event, not once per socket."""
+        manager = ConnectionManager()
+        sockets = {
+            user_id: FakeWebSocket()
+            for user_id in range(1, 7)
+        }
+        for user_id, websocket in sockets.items():
+            wire_format = WireFormat.MSGPACK if user_id % 2 else WireFormat.JSON
+            manager.connect(user_id, websocket, wire_format).start()
+
+        calls = 0
+        real_packb = msgpack.packb
+
+        def counting_packb(*args: Any, **kwargs: Any) -> bytes:
+            nonlocal calls
+            calls += 1
+            return real_packb(*args, **kwargs)
+
+        monkeypatch.setattr("app.core.ws_protocol.msgpack.packb", counting_packb)
+        await manager.broadcast({"type": "task_deleted", "task_id": 1})
+        await asyncio.sleep(0)
+
+        assert calls == 1
+        assert msgpack.unpackb(sockets[1].sent[0])["task_id"] == 1
+        assert sockets[2].sent[0]["task_id"] == 1
+        manager.clear_all()
+
+
+class TestPresenceDeltas:
+    """Test suite for debounced presence deltas."""
+
+    async def test_reconnect_storm_is_coalesced(self) -> None:
+        """Test that many joins within the debounce window produce one delta."""
+        manager = ConnectionManager()
+        manager.presence_debounce = 0.05
+        observer = FakeWebSocket()
+        manager.connect(100, observer).start()
+
+        for user_id in range(1, 11):
+            manager.connect(user_id, FakeWebSocket()).start()
+            await manager.broadcast_presence_update()
+        manager.disconnect(10)
+        await manager.broadcast_presence_update()
+
+        await asyncio.sleep(0.1)
+        deltas = [frame for frame in observer.sent if frame["type"] == "presence_delta"]
+        assert deltas == [{
+            "type": "presence_delta",
+            "version": 1,
+            "joined": [1, 2, 3, 4, 5, 6, 7, 8, 9, 100],
+            "left": [],
+        }]
+        manager.presence_debounce = settings.WS_PRESENCE_DEBOUNCE_SECONDS
+        manager.clear_all()
+
+    async def test_connect_then_disconnect_within_window_sends_nothing(self) -> None:
+        """Test that a user who flaps inside the window is never announced."""
+        manager = ConnectionManager()
+        manager.presence_debounce = 0
+        observer = FakeWebSocket()
+        manager.connect(1, observer).start()
+        await manager.broadcast_presence_update()
+        assert manager.presence_version == 1
+
+        manager.connect(2, "ws2")
+        manager.disconnect(2)
+        await manager.broadcast_presence_update()
+        await asyncio.sleep(0)
+
+        assert manager.presence_version == 1
+        assert manager.get_active_users() == [1]
+        manager.presence_debounce = settings.WS_PRESENCE_DEBOUNCE_SECONDS
+
+    def test_snapshot_on_request(self, client: TestClient, auth_token: str) -> None:
+        """Test that clients get a snapshot only when their version is stale."""
+        with client.websocket_connect(f"/ws?token={auth_token}") as websocket:
+            snapshot = websocket.receive_json()
+            users = set(snapshot["users"])
+            version = receive_presence(websocket, users, snapshot["version"], 1)
+
+            websocket.send_json({"type": "presence_sync", "version": version - 1})
+            snapshot = websocket.receive_json()
+            assert snapshot == {"type": "presence_update", "version": version, "users": [1]}
+
+
 class TestWebSocketEndpoint:
     """Test suite for WebSocket endpoint."""
 
@@ -142,19 +568,70 @@ class TestWebSocketEndpoint:
         with client.websocket_connect(f"/ws?token={auth_token}") as ws1:
             data = ws1.receive_json()
             assert data["type"] == "presence_update"
-            initial_count = len(data["users"])
+            users1 = set(data["users"])
+            version1 = receive_presence(ws1, users1, data["version"], 1)
 
             # Connect second user
             with client.websocket_connect(f"/ws?token={token2}") as ws2:
-                # First user should receive presence update
-                data = ws1.receive_json()
-                assert data["type"] == "presence_update"
-                assert len(data["users"]) == initial_count + 1
-
-                # Second user gets initial presence
+                # Second user gets a snapshot, then deltas
                 data = ws2.receive_json()
                 assert data["type"] == "presence_update"
-                assert len(data["users"]) == initial_count + 1
+                users2 = set(data["users"])
+                receive_presence(ws2, users2, data["version"], 2)
+
+                # First user receives a delta announcing the second user
+                receive_presence(ws1, users1, version1, 2)
+                assert users1 == users2
+
+
+    def test_closing_one_tab_keeps_user_online(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that closing one of a user's sockets leaves the other registered."""
+        manager = ConnectionManager()
+        with client.websocket_connect(f"/ws?token={auth_token}") as first:
+            first.receive_json()
+            with client.websocket_connect(f"/ws?token={auth_token}") as second:
+                second.receive_json()
+                assert len(manager.get_connection_stats()) == 2
+
+            assert len(manager.get_active_users()) == 1
+            assert len(manager.get_connection_stats()) == 1
+
+    def test_open_sockets_do_not_hold_pool_connections(
+        self, client: TestClient, auth_token: str, tmp_path: Any
+    ) -> None:
+        """Test that the auth session is returned to the pool once the socket is open."""
+        database_url = f"sqlite:///{tmp_path / 'pool.db'}"
+        setup_engine = create_engine(database_url)
+        Base.metadata.create_all(bind=setup_engine)
+        with sessionmaker(bind=setup_engine)() as db:
+            db.add(User(email="testuser@example.com", hashed_password="x"))
+            db.commit()
+        setup_engine.dispose()
+
+        pool_engine = create_async_engine(
+            get_async_database_url(database_url),
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=1,
+        )
+        factory = async_sessionmaker(bind=pool_engine)
+
+        app.dependency_overrides[get_async_session_factory] = lambda: factory
+        try:
+            # With a one-connection pool the second socket would time out
+            # if the first one were still holding its session
+            with client.websocket_connect(f"/ws?token={auth_token}") as ws1:
+                ws1.receive_json()
+                with client.websocket_connect(f"/ws?token={auth_token}") as ws2:
+                    ws2.receive_json()
+                    assert pool_engine.pool.checkedout() == 0
+        finally:
+            app.dependency_overrides[get_async_session_factory] = (
+                override_get_async_session_factory
+            )
 
 
 class TestTaskBroadcasting:
@@ -178,7 +655,7 @@ class TestTaskBroadcasting:
             task_data = response.json()
 
             # Should receive task created event via WebSocket
-            event = websocket.receive_json()
+            event = receive_event(websocket)
             assert event["type"] == "task_created"
             assert event["task"]["id"] == task_data["id"]
             assert event["task"]["title"] == "Test Task"
@@ -208,7 +685,7 @@ class TestTaskBroadcasting:
             assert response.status_code == 200
 
             # Should receive task updated event
-            event = websocket.receive_json()
+            event = receive_event(websocket)
             assert event["type"] == "task_updated"
             assert event["task"]["id"] == task_id
             assert event["task"]["title"] == "Updated Title"
@@ -238,6 +715,265 @@ class TestTaskBroadcasting:
             assert response.status_code == 204
 
             # Should receive task deleted event
-            event = websocket.receive_json()
+            event = receive_event(websocket)
             assert event["type"] == "task_deleted"
             assert event["task_id"] == task_id
+
+
+class TestTaskEventRouting:
+    """Test suite for visibility-scoped task events."""
+
+    def test_events_only_reach_users_who_can_see_the_task(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that task events skip users who are neither owner nor assignee."""
+        token2 = register_and_login(client, "user2@example.com")
+        user2_id = client.get(
+            "/api/v1/auth/me", headers={"Authorization": f"Bearer {token2}"}
+        ).json()["id"]
+
+        with client.websocket_connect(f"/ws?token={token2}") as ws2:
+            ws2.receive_json()  # presence
+
+            # Private task: user 2 must not hear about it
+            client.post(
+                "/api/v1/tasks",
+                json={"title": "Private"},
+                headers={"Authorization": f"Bearer {auth_token}"},
+            )
+            # Assigned task: user 2 can see it
+            response = client.post(
+                "/api/v1/tasks",
+                json={"title": "Shared", "assigned_to_id": user2_id},
+                headers={"Authorization": f"Bearer {auth_token}"},
+            )
+            shared_id = response.json()["id"]
+
+            event = receive_event(ws2)
+            assert event["type"] == "task_created"
+            assert event["task"]["title"] == "Shared"
+
+            # Unassigning still notifies the former assignee
+            client.put(
+                f"/api/v1/tasks/{shared_id}",
+                json={"assigned_to_id": None},
+                headers={"Authorization": f"Bearer {auth_token}"},
+            )
+            event = receive_event(ws2)
+            assert event["type"] == "task_updated"
+            assert event["task"]["assigned_to_id"] is None
+
+    def test_former_assignee_not_notified_after_unassign(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that the subscription index forgets users who lost access."""
+        manager = ConnectionManager()
+        token2 = register_and_login(client, "user2@example.com")
+        user2_id = client.get(
+            "/api/v1/auth/me", headers={"Authorization": f"Bearer {token2}"}
+        ).json()["id"]
+        response = client.post(
+            "/api/v1/tasks",
+            json={"title": "Shared", "assigned_to_id": user2_id},
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+        task_id = response.json()["id"]
+        assert user2_id in manager.task_subscribers[task_id]
+
+        client.put(
+            f"/api/v1/tasks/{task_id}",
+            json={"assigned_to_id": None},
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+        assert user2_id not in manager.task_subscribers[task_id]
+
+        client.delete(
+            f"/api/v1/tasks/{task_id}",
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+        assert task_id not in manager.task_subscribers
+
+
+class TestTaskBatchEvents:
+    """Test suite for batched task events."""
+
+    def test_batch_sends_one_frame(self, client: TestClient, auth_token: str) -> None:
+        """Test that a bulk move reaches a subscriber as one event."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        ids = [
+            client.post("/api/v1/tasks", json={"title": f"T{n}"}, headers=headers).json()["id"]
+            for n in range(3)
+        ]
+
+        with client.websocket_connect(f"/ws?token={auth_token}") as websocket:
+            websocket.receive_json()  # presence
+            client.post(
+                "/api/v1/tasks/batch",
+                json={"update": [{"id": task_id, "status": "done"} for task_id in ids]},
+                headers=headers,
+            )
+            client.post("/api/v1/tasks", json={"title": "After"}, headers=headers)
+
+            event = receive_event(websocket)
+            assert event["type"] == "tasks_batch"
+            assert [task["id"] for task in event["updated"]] == ids
+            # The next event is the single create, not more batch frames
+            assert receive_event(websocket)["type"] == "task_created"
+
+    async def test_each_user_gets_only_visible_tasks(self) -> None:
+        """Test that a batch is split so users only receive tasks they can see."""
+        manager = ConnectionManager()
+        owner, assignee, outsider = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        manager.connect(1, owner).start()
+        manager.connect(2, assignee).start()
+        manager.connect(3, outsider).start()
+
+        await manager.publish_task_batch(
+            {
+                "type": "tasks_batch",
+                "created": [{"id": 10}],
+                "updated": [{"id": 11}],
+                "deleted": [12],
+            },
+            [(10, (1, None), False), (11, (1, 2), False), (12, (1, 2), True)],
+        )
+        await asyncio.sleep(0)
+
+        assert len(owner.sent) == 1
+        assert owner.sent[0]["created"] == [{"id": 10}]
+        assert owner.sent[0]["deleted"] == [12]
+        assert len(assignee.sent) == 1
+        assert assignee.sent[0]["created"] == []
+        assert assignee.sent[0]["updated"] == [{"id": 11}]
+        assert assignee.sent[0]["deleted"] == [12]
+        assert outsider.sent == []
+        assert 12 not in manager.task_subscribers
+
+
+class TestEventReplay:
+    """Test suite for resumable event streams."""
+
+    def receive_session(self, websocket: Any) -> dict[str, Any]:
+        """Skip frames until the session frame arrives."""
+        while True:
+            message = websocket.receive_json()
+            if message["type"] == "session":
+                return message
+
+    def test_reconnect_replays_missed_events(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that a reconnecting client receives only what it missed."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        with client.websocket_connect(f"/ws?token={auth_token}") as websocket:
+            session = self.receive_session(websocket)
+
+        client.post("/api/v1/tasks", json={"title": "Missed 1"}, headers=headers)
+        client.post("/api/v1/tasks", json={"title": "Missed 2"}, headers=headers)
+
+        url = f"/ws?token={auth_token}&last_seq={session['seq']}&stream={session['stream']}"
+        with client.websocket_connect(url) as websocket:
+            first = receive_event(websocket)
+            second = receive_event(websocket)
+            assert [first["task"]["title"], second["task"]["title"]] == ["Missed 1", "Missed 2"]
+            assert second["seq"] == first["seq"] + 1
+
+    def test_unknown_stream_requires_resync(
+        self, client: TestClient, auth_token: str
+    ) -> None:
+        """Test that a seq from another worker or process triggers a resync."""
+        with client.websocket_connect(
+            f"/ws?token={auth_token}&last_seq=5&stream=other-worker"
+        ) as websocket:
+            event = receive_event(websocket)
+            assert event["type"] == "resync_required"
+
+    async def test_gap_larger_than_buffer_requires_resync(self) -> None:
+        """Test that clients behind the oldest buffered event must resync."""
+        manager = ConnectionManager()
+        manager.replay_buffer = deque(maxlen=2)
+        for index in range(3):
+            await manager.broadcast({"type": "event", "n": index})
+
+        connection = ClientConnection(1, FakeWebSocket())
+        assert manager.resume(connection, 1, manager.stream_id)
+        assert [message.payload["seq"] for message in connection._queue] == [2, 3]
+
+        connection = ClientConnection(1, FakeWebSocket())
+        assert not manager.resume(connection, 0, manager.stream_id)
+        assert connection._queue[0].type == "resync_required"
+
+        manager.replay_buffer = deque(maxlen=settings.WS_REPLAY_BUFFER_SIZE)
+
+
+class ProtocolClient:
+    """Speaks the client side of the protocol the way the frontend hook does."""
+
+    def __init__(self, client: TestClient, token: str) -> None:
+        self.client = client
+        self.token = token
+        self.stream: str | None = None
+        self.last_seq: int | None = None
+        self.pings = 0
+
+    def url(self) -> str:
+        """Build the connect URL, resuming from the last event seen."""
+        url = f"/ws?token={self.token}"
+        if self.stream is not None and self.last_seq is not None:
+            url += f"&last_seq={self.last_seq}&stream={self.stream}"
+        return url
+
+    def receive(self, websocket: Any) -> dict[str, Any]:
+        """Receive a frame, answering pings and noting where the stream is."""
+        message = websocket.receive_json()
+        if message["type"] == "ping":
+            self.pings += 1
+            websocket.send_json({"type": "pong"})
+        elif message["type"] in ("session", "resync_required"):
+            self.stream, self.last_seq = message["stream"], message["seq"]
+        elif isinstance(message.get("seq"), int):
+            self.last_seq = message["seq"]
+        return message
+
+
+class TestClientProtocol:
+    """Test suite running the client protocol against a live heartbeat."""
+
+    def test_ponging_client_stays_connected_and_resumes(
+        self, auth_token: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that pongs keep a socket open past the idle timeout and last_seq resumes it."""
+        manager = ConnectionManager()
+        monkeypatch.setattr(manager, "ping_interval", 0.05)
+        monkeypatch.setattr(manager, "idle_timeout", 0.3)
+        monkeypatch.setattr(settings, "GUEST_TTL_HOURS", 0)
+        headers = {"Authorization": f"Bearer {auth_token}"}
+
+        with TestClient(app) as client:
+            protocol = ProtocolClient(client, auth_token)
+            with client.websocket_connect(protocol.url()) as websocket:
+                while protocol.receive(websocket)["type"] != "session":
+                    pass
+                # Several idle timeouts pass while only pings and pongs are exchanged
+                while protocol.pings < 20:
+                    protocol.receive(websocket)
+                assert len(manager.active_connections) == 1
+
+            # A client that never answers is closed as idle
+            with client.websocket_connect(f"/ws?token={auth_token}") as websocket:
+                with pytest.raises(WebSocketDisconnect) as closed:
+                    while True:
+                        websocket.receive_json()
+                assert closed.value.code == 1001
+
+            client.post("/api/v1/tasks", json={"title": "Missed 1"}, headers=headers)
+            client.post("/api/v1/tasks", json={"title": "Missed 2"}, headers=headers)
+
+            assert protocol.last_seq is not None
+            with client.websocket_connect(protocol.url()) as websocket:
+                titles = []
+                while len(titles) < 2:
+                    message = protocol.receive(websocket)
+                    if message["type"] == "task_created":
+                        titles.append(message["task"]["title"])
+                assert titles == ["Missed 1", "Missed 2"]
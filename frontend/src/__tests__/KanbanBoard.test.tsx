@@ -1,7 +1,24 @@
 import { describe, it, expect, vi, beforeEach } from 'vitest'
-import { render, screen, within } from '@testing-library/react'
+import { act, render, screen, within } from '@testing-library/react'
 import KanbanBoard from '../components/KanbanBoard'
 
+// Keep the real board but capture its drop handler, since jsdom has no
+// pointer geometry for dnd-kit to drag with
+let dragEnd: ((event: any) => void) | undefined
+vi.mock('@dnd-kit/core', async (importOriginal) => {
+  const actual = await importOriginal<typeof import('@dnd-kit/core')>()
+  return {
+    ...actual,
+    DndContext: (props: any) => {
+      dragEnd = props.onDragEnd
+      return <actual.DndContext {...props} />
+    },
+  }
+})
+
+const drop = (activeId: number, overId: number | string) =>
+  act(() => dragEnd?.({ active: { id: activeId }, over: { id: overId } }))
+
 const mockTasks = [
   {
     id: 1,
@@ -9,6 +26,8 @@ const mockTasks = [
     description: 'Description 1',
     status: 'todo',
     priority: 'high',
+    rank: 'i',
+    version: 1,
     owner_id: 1,
     assigned_to_id: 1,
     created_at: '2025-01-01T00:00:00Z',
@@ -20,6 +39,8 @@ const mockTasks = [
     description: 'Description 2',
     status: 'in_progress',
     priority: 'medium',
+    rank: 'i',
+    version: 1,
     owner_id: 1,
     assigned_to_id: 1,
     created_at: '2025-01-01T00:00:00Z',
@@ -31,6 +52,8 @@ const mockTasks = [
     description: 'Description 3',
     status: 'done',
     priority: 'low',
+    rank: 'i',
+    version: 1,
     owner_id: 1,
     assigned_to_id: null,
     created_at: '2025-01-01T00:00:00Z',
@@ -106,4 +129,44 @@ describe('KanbanBoard', () => {
     const description = screen.getByText(/This is a very long description/)
     expect(description.textContent?.length).toBeLessThan(longDescriptionTask.description.length + 10)
   })
+
+  describe('dropping a card', () => {
+    const column = [
+      { ...mockTasks[0], id: 1, rank: 'a' },
+      { ...mockTasks[0], id: 2, rank: 'b' },
+      { ...mockTasks[0], id: 3, rank: 'c' },
+      { ...mockTasks[1], id: 4, rank: 'a' },
+    ] as any[]
+
+    it('moves a card down below the card it lands on', () => {
+      render(<KanbanBoard tasks={column} onTaskMove={mockOnTaskMove} />)
+      drop(1, 2)
+      expect(mockOnTaskMove).toHaveBeenCalledWith(1, 'todo', 2)
+    })
+
+    it('moves a card up to the top of its column', () => {
+      render(<KanbanBoard tasks={column} onTaskMove={mockOnTaskMove} />)
+      drop(3, 1)
+      expect(mockOnTaskMove).toHaveBeenCalledWith(3, 'todo', null)
+    })
+
+    it('moves a card into another column above the card it lands on', () => {
+      render(<KanbanBoard tasks={column} onTaskMove={mockOnTaskMove} />)
+      drop(2, 4)
+      expect(mockOnTaskMove).toHaveBeenCalledWith(2, 'in_progress', null)
+    })
+
+    it('appends a card dropped on an empty column', () => {
+      render(<KanbanBoard tasks={column} onTaskMove={mockOnTaskMove} />)
+      drop(4, 'done')
+      expect(mockOnTaskMove).toHaveBeenCalledWith(4, 'done', null)
+    })
+
+    it('ignores a card dropped back where it was', () => {
+      render(<KanbanBoard tasks={column} onTaskMove={mockOnTaskMove} />)
+      drop(2, 2)
+      drop(3, 'todo')
+      expect(mockOnTaskMove).not.toHaveBeenCalled()
+    })
+  })
 })
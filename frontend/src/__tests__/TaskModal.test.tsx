@@ -9,6 +9,7 @@ describe('TaskModal', () => {
   beforeEach(() => {
     mockOnClose.mockClear()
     mockOnSave.mockClear()
+    global.fetch = vi.fn()
   })
 
   it('renders create task modal when no task is provided', () => {
@@ -28,6 +29,8 @@ describe('TaskModal', () => {
       description: 'Task description',
       status: 'in_progress' as const,
       priority: 'high' as const,
+      rank: 'i',
+      version: 1,
       owner_id: 1,
       assigned_to_id: null,
       created_at: '2025-01-01T00:00:00Z',
@@ -114,4 +117,30 @@ describe('TaskModal', () => {
 
     expect(screen.getByLabelText(/title/i)).toHaveValue('')
   })
+
+  it('searches users for the assignee picker', async () => {
+    ;(global.fetch as any).mockResolvedValue({
+      ok: true,
+      json: async () => [{ id: 2, email: 'ada@example.com', full_name: 'Ada Lovelace' }],
+    })
+
+    render(
+      <TaskModal isOpen={true} onClose={mockOnClose} onSave={mockOnSave} token="test-token" />
+    )
+    fireEvent.change(screen.getByLabelText(/search users/i), {
+      target: { value: 'ada' },
+    })
+
+    await waitFor(() => {
+      expect(screen.getByRole('option', { name: 'Ada Lovelace' })).toBeInTheDocument()
+    })
+    expect(global.fetch).toHaveBeenLastCalledWith(
+      'http://localhost:8000/api/v1/auth/users/search?q=ada',
+      expect.objectContaining({ headers: { Authorization: 'Bearer test-token' } })
+    )
+    expect(global.fetch).not.toHaveBeenCalledWith(
+      'http://localhost:8000/api/v1/auth/users',
+      expect.anything()
+    )
+  })
 })
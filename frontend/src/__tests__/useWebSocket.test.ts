@@ -0,0 +1,108 @@
+import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest'
+import { renderHook, act } from '@testing-library/react'
+import { useWebSocket } from '../hooks/useWebSocket'
+
+class FakeWebSocket {
+  static OPEN = 1
+  static instances: FakeWebSocket[] = []
+
+  url: string
+  readyState = FakeWebSocket.OPEN
+  sent: any[] = []
+  onopen: (() => void) | null = null
+  onmessage: ((event: { data: string }) => void) | null = null
+  onerror: ((error: unknown) => void) | null = null
+  onclose: ((event: { code: number; reason: string }) => void) | null = null
+
+  constructor(url: string) {
+    this.url = url
+    FakeWebSocket.instances.push(this)
+  }
+
+  send(data: string) {
+    this.sent.push(JSON.parse(data))
+  }
+
+  close() {}
+
+  receive(message: object) {
+    act(() => this.onmessage?.({ data: JSON.stringify(message) }))
+  }
+}
+
+describe('useWebSocket', () => {
+  beforeEach(() => {
+    FakeWebSocket.instances = []
+    vi.stubGlobal('WebSocket', FakeWebSocket)
+    vi.useFakeTimers()
+  })
+
+  afterEach(() => {
+    vi.useRealTimers()
+    vi.unstubAllGlobals()
+  })
+
+  it('answers pings so the server does not close the socket', () => {
+    const onMessage = vi.fn()
+    renderHook(() => useWebSocket({ token: 'abc', onMessage }))
+    const socket = FakeWebSocket.instances[0]
+
+    socket.receive({ type: 'ping' })
+
+    expect(socket.sent).toEqual([{ type: 'pong' }])
+    expect(onMessage).not.toHaveBeenCalled()
+  })
+
+  it('resumes from the last event it saw when reconnecting', () => {
+    const onMessage = vi.fn()
+    renderHook(() => useWebSocket({ token: 'abc', onMessage }))
+    const first = FakeWebSocket.instances[0]
+    expect(first.url).toBe('ws://localhost:8000/ws?token=abc')
+
+    first.receive({ type: 'session', stream: 'node-1', seq: 4 })
+    first.receive({ type: 'task_created', seq: 5, task: { id: 1 } })
+    expect(onMessage).toHaveBeenCalledTimes(1)
+
+    // Idle or server restart closes are not normal closures
+    act(() => first.onclose?.({ code: 1001, reason: 'idle' }))
+    act(() => {
+      vi.runAllTimers()
+    })
+
+    expect(FakeWebSocket.instances[1].url).toBe(
+      'ws://localhost:8000/ws?token=abc&last_seq=5&stream=node-1'
+    )
+  })
+
+  it('applies presence deltas on top of the snapshot', () => {
+    const onPresenceUpdate = vi.fn()
+    renderHook(() => useWebSocket({ token: 'abc', onMessage: vi.fn(), onPresenceUpdate }))
+    const socket = FakeWebSocket.instances[0]
+
+    socket.receive({ type: 'presence_update', version: 3, users: [1, 2] })
+    expect(onPresenceUpdate).toHaveBeenLastCalledWith([1, 2])
+
+    socket.receive({ type: 'presence_delta', version: 4, joined: [3], left: [1] })
+    expect(onPresenceUpdate).toHaveBeenLastCalledWith([2, 3])
+
+    // Deltas the snapshot already covers are ignored
+    socket.receive({ type: 'presence_delta', version: 4, joined: [9], left: [] })
+    expect(onPresenceUpdate).toHaveBeenCalledTimes(2)
+    expect(socket.sent).toEqual([])
+  })
+
+  it('asks for a snapshot when it misses a presence delta', () => {
+    const onPresenceUpdate = vi.fn()
+    renderHook(() => useWebSocket({ token: 'abc', onMessage: vi.fn(), onPresenceUpdate }))
+    const socket = FakeWebSocket.instances[0]
+
+    socket.receive({ type: 'presence_update', version: 3, users: [1] })
+    socket.receive({ type: 'presence_delta', version: 5, joined: [2], left: [] })
+
+    expect(socket.sent).toEqual([{ type: 'presence_sync', version: 3 }])
+    expect(onPresenceUpdate).toHaveBeenCalledTimes(1)
+
+    socket.receive({ type: 'presence_update', version: 5, users: [1, 2] })
+    expect(onPresenceUpdate).toHaveBeenLastCalledWith([1, 2])
+  })
+})
@@ -11,22 +11,17 @@ import { useWebSocket } from '@/hooks/useWebSocket'
 
 const API_BASE_URL = 'http://localhost:8000/api/v1'
 
-interface User {
-  id: number
-  email: string
-  full_name: string
-}
-
 export default function DashboardPage() {
   const { user, token, isGuest, logout } = useAuth()
   const router = useRouter()
   const [tasks, setTasks] = useState<Task[]>([])
-  const [users, setUsers] = useState<User[]>([])
   const [isLoading, setIsLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
   const [isModalOpen, setIsModalOpen] = useState(false)
   const [editingTask, setEditingTask] = useState<Task | undefined>(undefined)
   const [onlineUsers, setOnlineUsers] = useState<number[]>([])
+  // Bumped when the server cannot replay missed events, to refetch tasks
+  const [resyncCount, setResyncCount] = useState(0)
 
   const handleWebSocketMessage = useCallback((data: any) => {
     if (data.type === 'task_created') {
@@ -37,6 +32,17 @@ export default function DashboardPage() {
       )
     } else if (data.type === 'task_deleted') {
       setTasks((prevTasks) => prevTasks.filter((task) => task.id !== data.task_id))
+    } else if (data.type === 'tasks_batch') {
+      const updated = new Map<number, Task>(data.updated.map((task: Task) => [task.id, task]))
+      const deleted = new Set<number>(data.deleted)
+      setTasks((prevTasks) => [
+        ...prevTasks
+          .filter((task) => !deleted.has(task.id))
+          .map((task) => updated.get(task.id) ?? task),
+        ...data.created,
+      ])
+    } else if (data.type === 'resync_required') {
+      setResyncCount((count) => count + 1)
     }
   }, [])
 
@@ -53,27 +59,36 @@ export default function DashboardPage() {
   useEffect(() => {
     if (token) {
       fetchTasks()
-      fetchUsers()
     }
-  }, [token])
+  }, [token, resyncCount])
 
   const fetchTasks = async () => {
     if (!token) return
 
     try {
       setIsLoading(true)
-      const response = await fetch(`${API_BASE_URL}/tasks`, {
-        headers: {
-          Authorization: `Bearer ${token}`,
-        },
-      })
-
-      if (!response.ok) {
-        throw new Error('Failed to fetch tasks')
-      }
-
-      const data = await response.json()
-      setTasks(data)
+      // The list is paginated; follow X-Next-Cursor until the last page
+      const allTasks: Task[] = []
+      let cursor: string | null = null
+      do {
+        const url: string = cursor
+          ? `${API_BASE_URL}/tasks?cursor=${encodeURIComponent(cursor)}`
+          : `${API_BASE_URL}/tasks`
+        const response = await fetch(url, {
+          headers: {
+            Authorization: `Bearer ${token}`,
+          },
+        })
+
+        if (!response.ok) {
+          throw new Error('Failed to fetch tasks')
+        }
+
+        allTasks.push(...(await response.json()))
+        cursor = response.headers.get('X-Next-Cursor')
+      } while (cursor)
+
+      setTasks(allTasks)
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to fetch tasks')
     } finally {
@@ -81,50 +96,32 @@ export default function DashboardPage() {
     }
   }
 
-  const fetchUsers = async () => {
-    if (!token) return
-
-    try {
-      const response = await fetch(`${API_BASE_URL}/auth/users`, {
-        headers: {
-          Authorization: `Bearer ${token}`,
-        },
-      })
-
-      if (!response.ok) {
-        throw new Error('Failed to fetch users')
-      }
-
-      const data = await response.json()
-      setUsers(data)
-    } catch (err) {
-      console.error('Error fetching users:', err)
-    }
-  }
-
-  const handleTaskMove = async (taskId: number, newStatus: 'todo' | 'in_progress' | 'done') => {
+  const handleTaskMove = async (
+    taskId: number,
+    newStatus: 'todo' | 'in_progress' | 'done',
+    afterId: number | null
+  ) => {
     if (!token) return
 
     try {
-      const response = await fetch(`${API_BASE_URL}/tasks/${taskId}`, {
-        method: 'PUT',
+      // The server ranks the task below afterId, so only this task changes
+      const response = await fetch(`${API_BASE_URL}/tasks/${taskId}/move`, {
+        method: 'POST',
         headers: {
           'Content-Type': 'application/json',
           Authorization: `Bearer ${token}`,
         },
-        body: JSON.stringify({ status: newStatus }),
+        body: JSON.stringify({ status: newStatus, after_id: afterId }),
       })
 
       if (!response.ok) {
-        throw new Error('Failed to update task')
+        throw new Error('Failed to move task')
       }
 
-      // Optimistically update the UI
-      setTasks((prevTasks) =>
-        prevTasks.map((task) => (task.id === taskId ? { ...task, status: newStatus } : task))
-      )
+      const movedTask: Task = await response.json()
+      setTasks((prevTasks) => prevTasks.map((task) => (task.id === taskId ? movedTask : task)))
     } catch (err) {
-      console.error('Error updating task:', err)
+      console.error('Error moving task:', err)
       // Revert on error by refetching
       fetchTasks()
     }
@@ -283,7 +280,7 @@ export default function DashboardPage() {
           onClose={handleModalClose}
           onSave={editingTask ? handleEditTask : handleCreateTask}
           task={editingTask}
-          users={users}
+          token={token}
         />
       </div>
     </ProtectedRoute>
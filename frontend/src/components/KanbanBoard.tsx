@@ -1,8 +1,8 @@
 'use client'
 
-import { DndContext, DragEndEvent, DragOverlay, DragStartEvent, PointerSensor, useSensor, useSensors } from '@dnd-kit/core'
+import { DndContext, DragEndEvent, DragOverlay, DragStartEvent, PointerSensor, useDroppable, useSensor, useSensors } from '@dnd-kit/core'
 import { SortableContext, verticalListSortingStrategy } from '@dnd-kit/sortable'
-import { useState } from 'react'
+import { ReactNode, useState } from 'react'
 import TaskCard from './TaskCard'
 
 export interface Task {
@@ -11,6 +11,8 @@ export interface Task {
   description: string | null
   status: 'todo' | 'in_progress' | 'done'
   priority: 'low' | 'medium' | 'high'
+  rank: string
+  version: number
   owner_id: number
   assigned_to_id: number | null
   created_at: string
@@ -20,7 +22,7 @@ export interface Task {
 
 interface KanbanBoardProps {
   tasks: Task[]
-  onTaskMove: (taskId: number, newStatus: 'todo' | 'in_progress' | 'done') => void
+  onTaskMove: (taskId: number, newStatus: 'todo' | 'in_progress' | 'done', afterId: number | null) => void
 }
 
 const COLUMNS = [
@@ -29,6 +31,18 @@ const COLUMNS = [
   { id: 'done', title: 'Done', status: 'done' as const },
 ]
 
+// A column's card list, which takes drops that miss every card (e.g. an
+// empty column or the space below the last card)
+function ColumnDropArea({ id, children }: { id: string; children: ReactNode }) {
+  const { setNodeRef } = useDroppable({ id })
+
+  return (
+    <div ref={setNodeRef} className="space-y-3 min-h-[200px] transition-all duration-200">
+      {children}
+    </div>
+  )
+}
+
 export default function KanbanBoard({ tasks, onTaskMove }: KanbanBoardProps) {
   const [activeId, setActiveId] = useState<number | null>(null)
 
@@ -53,18 +67,34 @@ export default function KanbanBoard({ tasks, onTaskMove }: KanbanBoardProps) {
     }
 
     const taskId = active.id as number
-    const newStatus = over.id as 'todo' | 'in_progress' | 'done'
-
     const task = tasks.find((t) => t.id === taskId)
-    if (task && task.status !== newStatus) {
-      onTaskMove(taskId, newStatus)
+    const overTask = tasks.find((t) => t.id === over.id)
+    // Cards are the drop targets; anything else is a column id
+    const newStatus = overTask ? overTask.status : (over.id as 'todo' | 'in_progress' | 'done')
+
+    if (task && overTask?.id !== taskId) {
+      const target = getTasksByStatus(newStatus)
+      const from = target.findIndex((t) => t.id === taskId)
+      const rest = target.filter((t) => t.id !== taskId)
+      let index = overTask ? rest.findIndex((t) => t.id === overTask.id) : rest.length
+      // Dragging down a column lands below the card it was dropped on
+      if (overTask && from !== -1 && from <= index) index += 1
+      const afterId = index > 0 ? rest[index - 1].id : null
+
+      // Dropping a card where it already is changes nothing
+      if (from === -1 || from !== index) {
+        onTaskMove(taskId, newStatus, afterId)
+      }
     }
 
     setActiveId(null)
   }
 
   const getTasksByStatus = (status: 'todo' | 'in_progress' | 'done') => {
-    return tasks.filter((task) => task.status === status)
+    // Ranks compare code point by code point, like the database's ordering
+    return tasks
+      .filter((task) => task.status === status)
+      .sort((a, b) => (a.rank < b.rank ? -1 : a.rank > b.rank ? 1 : a.id - b.id))
   }
 
   const activeTask = activeId ? tasks.find((t) => t.id === activeId) : null
@@ -89,7 +119,7 @@ export default function KanbanBoard({ tasks, onTaskMove }: KanbanBoardProps) {
                 items={columnTasks.map((t) => t.id)}
                 strategy={verticalListSortingStrategy}
               >
-                <div className="space-y-3 min-h-[200px] transition-all duration-200">
+                <ColumnDropArea id={column.id}>
                   {columnTasks.length === 0 ? (
                     <div className="text-center py-8 text-gray-500 text-sm">
                       <svg className="w-8 h-8 mx-auto mb-2 opacity-50" fill="none" stroke="currentColor" viewBox="0 0 24 24" xmlns="http://www.w3.org/2000/svg">
@@ -102,16 +132,8 @@ export default function KanbanBoard({ tasks, onTaskMove }: KanbanBoardProps) {
                       <TaskCard key={task.id} task={task} />
                     ))
                   )}
-                </div>
+                </ColumnDropArea>
               </SortableContext>
-
-              {/* Droppable area */}
-              <div
-                className="h-4"
-                onDragOver={(e) => e.preventDefault()}
-                onDrop={() => {}}
-                data-status={column.status}
-              />
             </div>
           )
         })}
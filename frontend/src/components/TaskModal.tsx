@@ -3,12 +3,16 @@
 import { useState, useEffect, FormEvent } from 'react'
 import { Task } from './KanbanBoard'
 
+const API_BASE_URL = 'http://localhost:8000/api/v1'
+// Wait for a pause in typing before searching
+const SEARCH_DELAY_MS = 250
+
 interface TaskModalProps {
   isOpen: boolean
   onClose: () => void
   onSave: (taskData: TaskFormData) => void
   task?: Task
-  users?: User[]
+  token?: string | null
 }
 
 export interface TaskFormData {
@@ -25,12 +29,14 @@ interface User {
   full_name: string
 }
 
-export default function TaskModal({ isOpen, onClose, onSave, task, users = [] }: TaskModalProps) {
+export default function TaskModal({ isOpen, onClose, onSave, task, token }: TaskModalProps) {
   const [title, setTitle] = useState('')
   const [description, setDescription] = useState('')
   const [priority, setPriority] = useState<'low' | 'medium' | 'high'>('medium')
   const [status, setStatus] = useState<'todo' | 'in_progress' | 'done'>('todo')
   const [assignedToId, setAssignedToId] = useState<number | null>(null)
+  const [assigneeQuery, setAssigneeQuery] = useState('')
+  const [users, setUsers] = useState<User[]>([])
   const [errors, setErrors] = useState<{ title?: string }>({})
 
   useEffect(() => {
@@ -48,9 +54,43 @@ export default function TaskModal({ isOpen, onClose, onSave, task, users = [] }:
       setStatus('todo')
       setAssignedToId(null)
     }
+    setAssigneeQuery('')
     setErrors({})
   }, [task, isOpen])
 
+  useEffect(() => {
+    if (!isOpen || !token) return
+
+    // Only the first page is shown; typing more narrows the matches
+    const controller = new AbortController()
+    const timeout = setTimeout(async () => {
+      try {
+        const params = new URLSearchParams({ q: assigneeQuery.trim() })
+        const response = await fetch(`${API_BASE_URL}/auth/users/search?${params}`, {
+          headers: {
+            Authorization: `Bearer ${token}`,
+          },
+          signal: controller.signal,
+        })
+
+        if (!response.ok) {
+          throw new Error('Failed to search users')
+        }
+
+        setUsers(await response.json())
+      } catch (err) {
+        if (!controller.signal.aborted) {
+          console.error('Error searching users:', err)
+        }
+      }
+    }, SEARCH_DELAY_MS)
+
+    return () => {
+      clearTimeout(timeout)
+      controller.abort()
+    }
+  }, [isOpen, token, assigneeQuery])
+
   const validateForm = (): boolean => {
     const validationErrors: { title?: string } = {}
 
@@ -159,6 +199,14 @@ export default function TaskModal({ isOpen, onClose, onSave, task, users = [] }:
             <label htmlFor="assignedTo" className="block text-sm font-medium text-gray-300 mb-1">
               Assign To
             </label>
+            <input
+              type="search"
+              aria-label="Search users"
+              placeholder="Search by name or email"
+              value={assigneeQuery}
+              onChange={(e) => setAssigneeQuery(e.target.value)}
+              className="w-full px-3 py-2 mb-2 bg-gray-700 border border-gray-600 text-white rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500 placeholder-gray-400"
+            />
             <select
               id="assignedTo"
               value={assignedToId || ''}
@@ -166,6 +214,9 @@ export default function TaskModal({ isOpen, onClose, onSave, task, users = [] }:
               className="w-full px-3 py-2 bg-gray-700 border border-gray-600 text-white rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
             >
               <option value="">Unassigned</option>
+              {assignedToId !== null && !users.some((user) => user.id === assignedToId) && (
+                <option value={assignedToId}>Current assignee</option>
+              )}
               {users.map((user) => (
                 <option key={user.id} value={user.id}>
                   {user.full_name || user.email}
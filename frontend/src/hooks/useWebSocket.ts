@@ -12,12 +12,23 @@ export function useWebSocket({ token, onMessage, onPresenceUpdate }: UseWebSocke
   const reconnectTimeout = useRef<NodeJS.Timeout>()
   const shouldReconnect = useRef(true)
   const reconnectAttempts = useRef(0)
+  // Where this client is in the server's event stream, so a reconnect
+  // replays only what it missed
+  const lastSeq = useRef<number | null>(null)
+  const stream = useRef<string | null>(null)
+  // Online users, kept current by presence_delta frames on top of the
+  // presence_update snapshot each socket starts with
+  const presenceUsers = useRef<Set<number>>(new Set())
+  const presenceVersion = useRef<number | null>(null)
 
   useEffect(() => {
     if (!token) return
 
     shouldReconnect.current = true
     reconnectAttempts.current = 0
+    // A previous login's place in the stream does not apply to this token
+    lastSeq.current = null
+    stream.current = null
 
     const connect = () => {
       // Don't reconnect if we've exceeded attempts or component unmounted
@@ -27,8 +38,12 @@ export function useWebSocket({ token, onMessage, onPresenceUpdate }: UseWebSocke
       }
 
       try {
-        const wsUrl = `ws://localhost:8000/ws?token=${token}`
+        let wsUrl = `ws://localhost:8000/ws?token=${token}`
+        if (lastSeq.current !== null && stream.current !== null) {
+          wsUrl += `&last_seq=${lastSeq.current}&stream=${encodeURIComponent(stream.current)}`
+        }
         const socket = new WebSocket(wsUrl)
+        presenceVersion.current = null
 
         socket.onopen = () => {
           console.log('WebSocket connected')
@@ -40,9 +55,39 @@ export function useWebSocket({ token, onMessage, onPresenceUpdate }: UseWebSocke
           try {
             const data = JSON.parse(event.data)
 
+            if (data.type === 'ping') {
+              // The server closes sockets that stay silent
+              socket.send(JSON.stringify({ type: 'pong' }))
+              return
+            }
+            if (data.type === 'session' || data.type === 'resync_required') {
+              stream.current = data.stream
+              lastSeq.current = data.seq
+            } else if (typeof data.seq === 'number') {
+              lastSeq.current = data.seq
+            }
+
             if (data.type === 'presence_update') {
-              onPresenceUpdate?.(data.active_users || [])
-            } else {
+              presenceUsers.current = new Set(data.users || [])
+              presenceVersion.current = data.version
+              onPresenceUpdate?.(Array.from(presenceUsers.current))
+            } else if (data.type === 'presence_delta') {
+              if (presenceVersion.current !== null && data.version <= presenceVersion.current) {
+                // Already part of the snapshot
+                return
+              }
+              if (presenceVersion.current === null || data.version !== presenceVersion.current + 1) {
+                // A delta was missed; ask for a fresh snapshot instead
+                socket.send(
+                  JSON.stringify({ type: 'presence_sync', version: presenceVersion.current ?? -1 })
+                )
+                return
+              }
+              for (const userId of data.joined || []) presenceUsers.current.add(userId)
+              for (const userId of data.left || []) presenceUsers.current.delete(userId)
+              presenceVersion.current = data.version
+              onPresenceUpdate?.(Array.from(presenceUsers.current))
+            } else if (data.type !== 'session') {
               onMessage(data)
             }
           } catch (error) {